@@ -0,0 +1,14 @@
+"""Performance benchmarks for ReGraph.
+
+This package contains parameterised generators of graphs, spans
+and typings (`benchmarks.generators`), a small runner measuring time
+and peak memory and comparing results against a stored baseline
+(`benchmarks.runner`) and the benchmark suites themselves:
+
+* `benchmarks.bench_category_utils` -- categorical constructions
+  from `regraph.category_utils`;
+* `benchmarks.bench_hierarchies` -- rule propagation in hierarchies;
+* `benchmarks.bench_rules` -- composition of sequences of rules;
+* `benchmarks.bench_command_parser` -- parsing of transformation
+  command scripts.
+"""
@@ -0,0 +1,170 @@
+"""Benchmarks of the categorical constructions in `regraph.category_utils`.
+
+Run from the root of the repository, for example::
+
+    python -m benchmarks.bench_category_utils --sizes 100 1000 \
+        --output results.json \
+        --baseline benchmarks/baselines/category_utils.json
+
+Benchmarks whose cost is quadratic in the size of the input are
+skipped above their `max_size` unless `--no-limit` is specified.
+"""
+import sys
+
+from regraph.category_utils import (pullback,
+                                    pushout,
+                                    pullback_complement,
+                                    image_factorization,
+                                    get_unique_map_to_pullback_complement,
+                                    compose_relation_dicts,
+                                    compose_chain,
+                                    relation_to_span)
+from regraph.dense import SparseRelation
+
+from benchmarks.generators import (random_graph,
+                                   random_type_graph,
+                                   random_typed_graph,
+                                   clone_heavy_span,
+                                   merge_heavy_span,
+                                   typing_chain,
+                                   random_relation)
+from benchmarks.runner import Benchmark, main
+
+
+RULE_SIZE = 10
+
+
+def _setup_pullback(size, seed):
+    d = random_type_graph(max(1, size // 2), seed=seed)
+    b, _, b_d = random_typed_graph(size, d, seed=seed)
+    c, _, c_d = random_typed_graph(size, d, seed=seed + 1)
+    return (b, c, d, b_d, c_d)
+
+
+def _setup_pushout_merges(size, seed):
+    return merge_heavy_span(size, seed=seed)
+
+
+def _setup_pushout_rule(size, seed):
+    return merge_heavy_span(size, span_ratio=RULE_SIZE / size, seed=seed)
+
+
+def _setup_pbc_clones(size, seed):
+    return clone_heavy_span(size, seed=seed)
+
+
+def _setup_pbc_rule(size, seed):
+    return clone_heavy_span(size, span_ratio=RULE_SIZE / size, seed=seed)
+
+
+def _setup_image_factorization(size, seed):
+    a, b, a_b = random_typed_graph(
+        size, n_types=max(1, size // 10), seed=seed)
+    return (a, b, a_b)
+
+
+def _setup_unique_map_to_pbc(size, seed):
+    # Z = P = C, where C is the pullback complement of A->B->D,
+    # the unique map Z->P is then the identity
+    a, b, d, a_b, b_d = clone_heavy_span(size, seed=seed)
+    c, a_c, c_d = pullback_complement(a, b, d, a_b, b_d)
+    a_prime_a = {n: n for n in a.nodes()}
+    return (a_c, c_d, a_prime_a, a_c, c_d)
+
+
+def _setup_compose_relations(size, seed):
+    return (
+        random_relation(size, size, seed=seed),
+        random_relation(size, size, seed=seed + 1)
+    )
+
+
+def _setup_sparse_relations(size, seed):
+    left, right = _setup_compose_relations(size, seed)
+    return (SparseRelation.from_dict(left), SparseRelation.from_dict(right))
+
+
+def _setup_relation_span(size, seed):
+    g1 = random_graph(size, seed=seed)
+    g2 = random_graph(size, seed=seed + 1)
+    return (g1, g2, random_relation(size, size, avg_degree=1, seed=seed))
+
+
+def _setup_typing_chain(size, seed):
+    return (typing_chain(size, depth=8, seed=seed),)
+
+
+def _pushout_overlay(a, b, c, a_b, a_c):
+    return pushout(a, b, c, a_b, a_c, overlay=True)
+
+
+def _pullback_complement_overlay(a, b, d, a_b, b_d):
+    return pullback_complement(a, b, d, a_b, b_d, overlay=True)
+
+
+def _compose_sparse_relations(left, right):
+    return left.compose(right)
+
+
+def _invert_sparse_relation(left, right):
+    return left.invert()
+
+
+def _relation_to_span_sparse(g1, g2, relation):
+    return relation_to_span(g1, g2, relation, sparse=True)
+
+
+def _compose_chain_dense(chain):
+    return compose_chain(chain, dense=True)
+
+
+BENCHMARKS = [
+    Benchmark("pullback", _setup_pullback, pullback, max_size=1000),
+    Benchmark(
+        "pushout/merge_heavy", _setup_pushout_merges, pushout,
+        max_size=1000),
+    Benchmark(
+        "pushout/rule_sized", _setup_pushout_rule, pushout),
+    Benchmark(
+        "pushout/rule_sized_overlay", _setup_pushout_rule,
+        _pushout_overlay),
+    Benchmark(
+        "pullback_complement/clone_heavy", _setup_pbc_clones,
+        pullback_complement, max_size=10000),
+    Benchmark(
+        "pullback_complement/rule_sized", _setup_pbc_rule,
+        pullback_complement),
+    Benchmark(
+        "pullback_complement/rule_sized_overlay", _setup_pbc_rule,
+        _pullback_complement_overlay),
+    Benchmark(
+        "image_factorization", _setup_image_factorization,
+        image_factorization, max_size=10000),
+    Benchmark(
+        "get_unique_map_to_pullback_complement",
+        _setup_unique_map_to_pbc,
+        get_unique_map_to_pullback_complement, max_size=10000),
+    Benchmark(
+        "compose_relation_dicts", _setup_compose_relations,
+        compose_relation_dicts),
+    Benchmark(
+        "sparse_relation/compose", _setup_sparse_relations,
+        _compose_sparse_relations),
+    Benchmark(
+        "sparse_relation/invert", _setup_sparse_relations,
+        _invert_sparse_relation),
+    Benchmark(
+        "relation_to_span/dict", _setup_relation_span,
+        relation_to_span, max_size=1000),
+    Benchmark(
+        "relation_to_span/sparse", _setup_relation_span,
+        _relation_to_span_sparse),
+    Benchmark(
+        "compose_chain/dict", _setup_typing_chain, compose_chain),
+    Benchmark(
+        "compose_chain/dense", _setup_typing_chain, _compose_chain_dense),
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main(BENCHMARKS))
@@ -0,0 +1,57 @@
+"""Benchmarks of the parsing of transformation command scripts.
+
+The size of a benchmark is the number of commands in a script
+generated by `benchmarks.generators.random_command_script`. The script
+is parsed line by line by the pyparsing grammar
+(`regraph.command_parser.parser`) or by `parse_script`, either bypassing
+its cache or with the script already in the cache.
+
+Run from the root of the repository, for example::
+
+    python -m benchmarks.bench_command_parser --sizes 100 1000 \
+        --output results.json \
+        --baseline benchmarks/baselines/command_parser.json
+"""
+import sys
+
+from regraph.command_parser import parser, parse_script
+
+from benchmarks.generators import random_command_script
+from benchmarks.runner import Benchmark, main
+
+
+def _setup_script(size, seed):
+    return (random_command_script(size, seed=seed),)
+
+
+def _setup_cached_script(size, seed):
+    script = random_command_script(size, seed=seed)
+    parse_script(script)
+    return (script,)
+
+
+def _parse_pyparsing(script):
+    return [
+        parser.parseString(command).asDict()
+        for command in script.splitlines()
+        if len(command.strip()) > 0
+    ]
+
+
+def _parse_uncached(script):
+    return parse_script(script, use_cache=False)
+
+
+BENCHMARKS = [
+    Benchmark(
+        "command_parser/pyparsing", _setup_script,
+        _parse_pyparsing, max_size=10000),
+    Benchmark(
+        "parse_script/uncached", _setup_script, _parse_uncached),
+    Benchmark(
+        "parse_script/cached", _setup_cached_script, parse_script),
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main(BENCHMARKS))
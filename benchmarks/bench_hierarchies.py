@@ -0,0 +1,64 @@
+"""Benchmarks of the rule propagation in hierarchies.
+
+The benchmarked hierarchies are trees of `N_GRAPHS` graphs generated
+by `benchmarks.generators.random_hierarchy`, the size of a benchmark
+is the number of nodes in every graph (except the root). The rewritten
+graph is the root of the hierarchy, so the changes are propagated
+to all the other graphs.
+
+Run from the root of the repository, for example::
+
+    python -m benchmarks.bench_hierarchies --sizes 10 100 \
+        --output results.json \
+        --baseline benchmarks/baselines/hierarchies.json
+"""
+import sys
+
+from regraph import NXGraph, Rule
+
+from benchmarks.generators import random_hierarchy
+from benchmarks.runner import Benchmark, main
+
+
+N_GRAPHS = 60
+
+
+def _clone_rule():
+    pattern = NXGraph()
+    pattern.add_node("t0")
+    rule = Rule.from_transform(pattern)
+    rule.inject_clone_node("t0")
+    return rule
+
+
+def _setup_get_rule_hierarchy(size, seed):
+    hierarchy = random_hierarchy(N_GRAPHS, size, seed=seed)
+    return (hierarchy, _clone_rule())
+
+
+def _setup_apply_rule_hierarchy(size, seed):
+    hierarchy, rule = _setup_get_rule_hierarchy(size, seed)
+    rule_hierarchy, instances = hierarchy.get_rule_hierarchy("g0", rule)
+    return (hierarchy, rule_hierarchy, instances)
+
+
+def _get_rule_hierarchy(hierarchy, rule):
+    return hierarchy.get_rule_hierarchy("g0", rule)
+
+
+def _apply_rule_hierarchy(hierarchy, rule_hierarchy, instances):
+    return hierarchy.apply_rule_hierarchy(rule_hierarchy, instances)
+
+
+BENCHMARKS = [
+    Benchmark(
+        "get_rule_hierarchy", _setup_get_rule_hierarchy,
+        _get_rule_hierarchy, max_size=1000),
+    Benchmark(
+        "apply_rule_hierarchy", _setup_apply_rule_hierarchy,
+        _apply_rule_hierarchy, max_size=100, fresh_inputs=True),
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main(BENCHMARKS))
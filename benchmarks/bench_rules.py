@@ -0,0 +1,45 @@
+"""Benchmarks of the composition of rules.
+
+The size of a benchmark is the number of rules in the composed
+sequence (generated by `benchmarks.generators.random_rule_sequence`).
+The sequence is composed either from left to right by `compose_rules`
+or in a balanced tree by `compose_rule_sequence`.
+
+Run from the root of the repository, for example::
+
+    python -m benchmarks.bench_rules --sizes 10 100 \
+        --output results.json \
+        --baseline benchmarks/baselines/rules.json
+"""
+import sys
+
+from regraph.rules import compose_rules, compose_rule_sequence
+
+from benchmarks.generators import random_rule_sequence
+from benchmarks.runner import Benchmark, main
+
+
+def _setup_sequence(size, seed):
+    return (random_rule_sequence(size, seed=seed),)
+
+
+def _compose_left_to_right(sequence):
+    result = sequence[0]
+    for rule, lhs_instance, rhs_instance in sequence[1:]:
+        result = compose_rules(
+            *result, rule, lhs_instance, rhs_instance)
+    return result
+
+
+BENCHMARKS = [
+    Benchmark(
+        "compose_rules/left_to_right", _setup_sequence,
+        _compose_left_to_right, max_size=100),
+    Benchmark(
+        "compose_rule_sequence", _setup_sequence,
+        compose_rule_sequence, max_size=1000),
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main(BENCHMARKS))
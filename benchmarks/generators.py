@@ -0,0 +1,389 @@
+"""Generators of random graphs, spans and typings for benchmarks.
+
+All the generators are deterministic given the `seed` parameter.
+
+* `random_graph` -- random graph with set-valued node attributes;
+* `random_type_graph` -- random type graph;
+* `random_typed_graph` -- random graph typed by a type graph;
+* `clone_heavy_span` -- input of a pullback complement whose
+  left homomorphism clones many nodes;
+* `merge_heavy_span` -- input of a pushout whose right homomorphism
+  merges many nodes;
+* `typing_chain` -- chain of composable typings of decreasing size;
+* `random_relation` -- random relation between two sets of nodes;
+* `random_hierarchy` -- tree-shaped hierarchy of random typed graphs;
+* `random_rule_sequence` -- sequence of rules applied to a random graph;
+* `random_command_script` -- script of random transformation commands.
+"""
+import random
+
+from regraph import NXGraph, NXHierarchy, Rule
+
+
+def _node_attrs(rng, n_values):
+    return {"kind": {rng.randrange(n_values)}}
+
+
+def random_graph(n, avg_degree=2, n_values=10, seed=0):
+    """Generate a random graph.
+
+    Parameters
+    ----------
+    n : int
+        Number of nodes
+    avg_degree : float, optional
+        Average out-degree of a node
+    n_values : int, optional
+        Number of distinct values of the node attribute 'kind'
+    seed : int, optional
+        Random seed
+
+    Returns
+    -------
+    graph : regraph.NXGraph
+    """
+    rng = random.Random(seed)
+    graph = NXGraph()
+    graph.add_nodes_from([
+        (i, _node_attrs(rng, n_values)) for i in range(n)
+    ])
+    edges = set()
+    for _ in range(int(n * avg_degree)):
+        edges.add((rng.randrange(n), rng.randrange(n)))
+    graph.add_edges_from(edges)
+    return graph
+
+
+def random_type_graph(n_types, avg_degree=2, n_values=10, seed=0):
+    """Generate a random type graph.
+
+    Every node of the type graph carries all the values of the
+    attribute 'kind' and has a loop, so that it can type any node
+    generated by `random_graph` with the same `n_values`.
+    """
+    rng = random.Random(seed)
+    type_graph = NXGraph()
+    type_graph.add_nodes_from([
+        ("t{}".format(i), {"kind": set(range(n_values))})
+        for i in range(n_types)
+    ])
+    edges = set((t, t) for t in type_graph.nodes())
+    types = list(type_graph.nodes())
+    for _ in range(int(n_types * avg_degree)):
+        edges.add((rng.choice(types), rng.choice(types)))
+    type_graph.add_edges_from(edges)
+    return type_graph
+
+
+def random_typed_graph(n, type_graph=None, n_types=10, avg_degree=2,
+                       n_values=10, seed=0):
+    """Generate a random graph typed by a type graph.
+
+    Parameters
+    ----------
+    n : int
+        Number of nodes
+    type_graph : regraph.NXGraph, optional
+        Type graph, generated by `random_type_graph` if not specified
+    n_types : int, optional
+        Number of nodes of the generated type graph
+    avg_degree : float, optional
+        Average out-degree of a node
+    n_values : int, optional
+        Number of distinct values of the node attribute 'kind'
+    seed : int, optional
+        Random seed
+
+    Returns
+    -------
+    graph : regraph.NXGraph
+        Random graph with `n` nodes
+    type_graph : regraph.NXGraph
+    typing : dict
+        Typing of `graph` by `type_graph`
+    """
+    rng = random.Random(seed)
+    if type_graph is None:
+        type_graph = random_type_graph(
+            n_types, avg_degree, n_values, seed)
+    types = list(type_graph.nodes())
+
+    graph = NXGraph()
+    typing = dict()
+    preimages = {t: [] for t in types}
+    for i in range(n):
+        graph.add_node(i, _node_attrs(rng, n_values))
+        typing[i] = rng.choice(types)
+        preimages[typing[i]].append(i)
+
+    type_edges = [
+        (s, t) for s, t in type_graph.edges()
+        if len(preimages[s]) > 0 and len(preimages[t]) > 0
+    ]
+    edges = set()
+    for _ in range(int(n * avg_degree)):
+        s, t = rng.choice(type_edges)
+        edges.add((rng.choice(preimages[s]), rng.choice(preimages[t])))
+    graph.add_edges_from(edges)
+    return graph, type_graph, typing
+
+
+def clone_heavy_span(n, span_ratio=0.1, clone_ratio=0.5, seed=0):
+    """Generate the input of a pullback complement with many clones.
+
+    Produces graphs A, B, D and homomorphisms A->B->D such that
+    B is a subgraph of D induced by `span_ratio * n` nodes and
+    every node of B is cloned in A with probability `clone_ratio`.
+
+    Returns
+    -------
+    a, b, d : regraph.NXGraph
+    a_b, b_d : dict
+    """
+    rng = random.Random(seed)
+    d = random_graph(n, seed=seed)
+    k = max(1, int(n * span_ratio))
+    b = d.subgraph(set(rng.sample(list(d.nodes()), k)))
+    b_d = {node: node for node in b.nodes()}
+
+    a = NXGraph()
+    a_b = dict()
+    for node in b.nodes():
+        n_copies = 2 if rng.random() < clone_ratio else 1
+        for i in range(n_copies):
+            a_node = "{}_{}".format(node, i)
+            a.add_node(a_node, b.get_node(node))
+            a_b[a_node] = node
+    preimages = dict()
+    for a_node, b_node in a_b.items():
+        preimages.setdefault(b_node, []).append(a_node)
+    for s, t in b.edges():
+        for a_s in preimages[s]:
+            for a_t in preimages[t]:
+                a.add_edge(a_s, a_t, b.get_edge(s, t))
+    return a, b, d, a_b, b_d
+
+
+def merge_heavy_span(n, span_ratio=0.1, merge_ratio=0.5, n_added=10, seed=0):
+    """Generate the input of a pushout with many merges.
+
+    Produces graphs A, B, C and homomorphisms B<-A->C such that
+    A is a subgraph of B induced by `span_ratio * n` nodes,
+    the nodes of A are merged pairwise in C with probability
+    `merge_ratio` and C contains `n_added` new nodes.
+
+    Returns
+    -------
+    a, b, c : regraph.NXGraph
+    a_b, a_c : dict
+    """
+    rng = random.Random(seed)
+    b = random_graph(n, seed=seed)
+    k = max(1, int(n * span_ratio))
+    a = b.subgraph(set(rng.sample(list(b.nodes()), k)))
+    a_b = {node: node for node in a.nodes()}
+
+    a_c = dict()
+    a_nodes = list(a.nodes())
+    rng.shuffle(a_nodes)
+    i = 0
+    while i < len(a_nodes):
+        if i + 1 < len(a_nodes) and rng.random() < merge_ratio:
+            group = a_nodes[i:i + 2]
+        else:
+            group = a_nodes[i:i + 1]
+        c_node = "c{}".format(i)
+        for node in group:
+            a_c[node] = c_node
+        i += len(group)
+
+    c = NXGraph()
+    for a_node, c_node in a_c.items():
+        if c_node not in c.nodes():
+            c.add_node(c_node)
+        c.add_node_attrs(c_node, a.get_node(a_node))
+    for s, t in a.edges():
+        if (a_c[s], a_c[t]) not in c.edges():
+            c.add_edge(a_c[s], a_c[t])
+    for i in range(n_added):
+        c.add_node("new_{}".format(i))
+        c.add_edge("new_{}".format(i), a_c[rng.choice(a_nodes)])
+    return a, b, c, a_b, a_c
+
+
+def typing_chain(n, depth=5, shrink=2, seed=0):
+    """Generate a chain of composable typings.
+
+    Parameters
+    ----------
+    n : int
+        Number of nodes in the source of the chain
+    depth : int, optional
+        Number of typings in the chain
+    shrink : int, optional
+        Factor by which the number of nodes decreases at every level
+
+    Returns
+    -------
+    chain : list of dict
+    """
+    rng = random.Random(seed)
+    sizes = [max(1, n // (shrink ** i)) for i in range(depth + 1)]
+    return [
+        {
+            "l{}_{}".format(i, j): "l{}_{}".format(
+                i + 1, rng.randrange(sizes[i + 1]))
+            for j in range(sizes[i])
+        }
+        for i in range(depth)
+    ]
+
+
+def random_relation(n, m, avg_degree=2, seed=0):
+    """Generate a random relation as a dictionary of sets.
+
+    Returns
+    -------
+    relation : dict
+        Dictionary whose keys are integers in `range(n)` and whose values
+        are sets of integers in `range(m)`
+    """
+    rng = random.Random(seed)
+    relation = dict()
+    for _ in range(int(n * avg_degree)):
+        relation.setdefault(rng.randrange(n), set()).add(rng.randrange(m))
+    return relation
+
+
+def random_hierarchy(n_graphs, n, n_types=10, branching=3, avg_degree=2,
+                     seed=0):
+    """Generate a tree-shaped hierarchy of random typed graphs.
+
+    The root of the hierarchy (the graph 'g0') is a random type
+    graph with `n_types` nodes, every other graph 'gi' has `n` nodes
+    and is typed by its parent in the tree, every graph having at most
+    `branching` children. Nodes of a graph carry the attributes
+    of their types.
+
+    Returns
+    -------
+    hierarchy : regraph.NXHierarchy
+    """
+    rng = random.Random(seed)
+    hierarchy = NXHierarchy()
+    hierarchy.add_graph("g0", random_type_graph(n_types, seed=seed))
+    for i in range(1, n_graphs):
+        parent_id = "g{}".format((i - 1) // branching)
+        parent = hierarchy.get_graph(parent_id)
+        types = list(parent.nodes())
+
+        graph = NXGraph()
+        typing = dict()
+        preimages = {t: [] for t in types}
+        for node in range(n):
+            t = rng.choice(types)
+            graph.add_node(node, parent.get_node(t))
+            typing[node] = t
+            preimages[t].append(node)
+        type_edges = [
+            (s, t) for s, t in parent.edges()
+            if len(preimages[s]) > 0 and len(preimages[t]) > 0
+        ]
+        edges = set()
+        if len(type_edges) > 0:
+            for _ in range(int(n * avg_degree)):
+                s, t = rng.choice(type_edges)
+                edges.add(
+                    (rng.choice(preimages[s]), rng.choice(preimages[t])))
+        graph.add_edges_from(edges)
+
+        graph_id = "g{}".format(i)
+        hierarchy.add_graph(graph_id, graph)
+        hierarchy.add_typing(graph_id, parent_id, typing)
+    return hierarchy
+
+
+def random_rule_sequence(n_rules, n=50, seed=0):
+    """Generate a sequence of rules applied to a random graph.
+
+    Every rule of the sequence either clones a random node of the
+    current graph or adds a new node connected to it, and is applied
+    to the graph before the next rule is generated.
+
+    Returns
+    -------
+    sequence : list of tuple
+        List of triples `(rule, lhs_instance, rhs_instance)`
+    """
+    rng = random.Random(seed)
+    graph = random_graph(n, seed=seed)
+    sequence = []
+    for i in range(n_rules):
+        pattern = NXGraph()
+        pattern.add_node("x")
+        rule = Rule.from_transform(pattern)
+        if i % 2 == 0:
+            rule.inject_clone_node("x")
+        else:
+            rule.inject_add_node("new")
+            rule.inject_add_edge("new", "x")
+        lhs_instance = {"x": rng.choice(list(graph.nodes()))}
+        rhs_instance = graph.rewrite(rule, lhs_instance)
+        sequence.append((rule, lhs_instance, rhs_instance))
+    return sequence
+
+
+def _command_node(rng, n):
+    i = rng.randrange(n)
+    if i % 2 == 0:
+        return str(i)
+    return "'n{}'".format(i)
+
+
+def _command_attrs(rng, n_values):
+    return "{{'kind': {{{}, {}}}, 'weight': {:.2f}, 'label': 'l{}'}}".format(
+        rng.randrange(n_values), rng.randrange(n_values),
+        rng.random(), rng.randrange(n_values))
+
+
+def random_command_script(n_commands, n=100, n_values=10, seed=0):
+    """Generate a script of random transformation commands.
+
+    The commands use all the keywords of `regraph.command_parser`
+    and refer to random nodes among `n` node ids (the script is not
+    meant to be applied to a particular pattern).
+
+    Returns
+    -------
+    script : str
+        Script containing `n_commands` commands, one per line
+    """
+    rng = random.Random(seed)
+    commands = []
+    for _ in range(n_commands):
+        kind = rng.randrange(8)
+        u = _command_node(rng, n)
+        v = _command_node(rng, n)
+        if kind == 0:
+            commands.append("CLONE {} AS 'c{}'.".format(u, rng.randrange(n)))
+        elif kind == 1:
+            commands.append(
+                "MERGE [{}, {}] METHOD union AS 'm{}' "
+                "EDGES intersection.".format(u, v, rng.randrange(n)))
+        elif kind == 2:
+            commands.append("ADD_NODE {} TYPE 't{}' {}.".format(
+                u, rng.randrange(n_values), _command_attrs(rng, n_values)))
+        elif kind == 3:
+            commands.append("DELETE_NODE {}.".format(u))
+        elif kind == 4:
+            commands.append("ADD_EDGE {} {} {}.".format(
+                u, v, _command_attrs(rng, n_values)))
+        elif kind == 5:
+            commands.append("DELETE_EDGE {} {}.".format(u, v))
+        elif kind == 6:
+            commands.append("ADD_NODE_ATTRS {} {}.".format(
+                u, _command_attrs(rng, n_values)))
+        else:
+            commands.append("DELETE_EDGE_ATTRS {} {} {}.".format(
+                u, v, _command_attrs(rng, n_values)))
+    return "\n".join(commands)
@@ -0,0 +1,258 @@
+"""Runner for ReGraph benchmarks.
+
+A benchmark is a `Benchmark` object given by a name, a `setup` function
+producing the arguments of the benchmarked call for a given size and
+the benchmarked function itself. The runner measures the best wall-clock
+time over several repetitions and the peak memory allocated during
+a single call (with `tracemalloc`), and produces a JSON report that can
+be compared against a stored baseline.
+"""
+import argparse
+import datetime
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+
+class Benchmark(object):
+    """Benchmark of a function on inputs of increasing size.
+
+    Attributes
+    ----------
+    name : str
+        Name of the benchmark
+    setup : callable
+        Function taking a size and a seed and returning a tuple
+        of arguments for `func`
+    func : callable
+        Benchmarked function
+    max_size : int, optional
+        Largest size at which the benchmark is run by default
+        (used to skip sizes at which the benchmarked function
+        is known to be impractically slow)
+    fresh_inputs : bool, optional
+        If True, `setup` is called (outside of the measurement) before
+        every call of `func`, which is required for benchmarked
+        functions that modify their inputs
+    """
+
+    def __init__(self, name, setup, func, max_size=None,
+                 fresh_inputs=False):
+        """Initialize a benchmark."""
+        self.name = name
+        self.setup = setup
+        self.func = func
+        self.max_size = max_size
+        self.fresh_inputs = fresh_inputs
+
+
+def measure(func, make_args, repeat=3):
+    """Measure the best time and the peak memory of `func(*args)`.
+
+    Parameters
+    ----------
+    func : callable
+        Benchmarked function
+    make_args : callable
+        Function returning a tuple of arguments of `func`,
+        called before every call of `func`
+    repeat : int, optional
+        Number of timed calls
+
+    Returns
+    -------
+    time : float
+        Best wall-clock time (in seconds) over `repeat` calls
+    peak_memory : int
+        Peak memory (in bytes) allocated during a single call
+    """
+    times = []
+    for _ in range(repeat):
+        args = make_args()
+        gc.collect()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+
+    args = make_args()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def run_benchmarks(benchmarks, sizes=None, repeat=3, seed=0,
+                   no_limit=False, names=None, log=None):
+    """Run benchmarks for all the sizes.
+
+    Parameters
+    ----------
+    benchmarks : iterable of benchmarks.runner.Benchmark
+    sizes : list of int, optional
+        Sizes of the generated inputs, by default `DEFAULT_SIZES`
+    repeat : int, optional
+        Number of timed repetitions
+    seed : int, optional
+        Random seed passed to the setup functions
+    no_limit : bool, optional
+        If True, ignore `max_size` of the benchmarks
+    names : collection of str, optional
+        Names of the benchmarks to run (all by default)
+    log : file-like, optional
+        Stream where the progress is reported
+
+    Returns
+    -------
+    results : list of dict
+        List of records with keys 'benchmark', 'size', 'time'
+        and 'peak_memory'
+    """
+    if sizes is None:
+        sizes = DEFAULT_SIZES
+    results = []
+    for benchmark in benchmarks:
+        if names and benchmark.name not in names:
+            continue
+        for size in sizes:
+            if not no_limit and benchmark.max_size is not None and\
+                    size > benchmark.max_size:
+                continue
+            if benchmark.fresh_inputs:
+                def make_args():
+                    return benchmark.setup(size, seed)
+            else:
+                args = benchmark.setup(size, seed)
+
+                def make_args():
+                    return args
+            best_time, peak = measure(benchmark.func, make_args, repeat)
+            record = {
+                "benchmark": benchmark.name,
+                "size": size,
+                "time": best_time,
+                "peak_memory": peak
+            }
+            results.append(record)
+            if log is not None:
+                log.write("{:<45} {:>8} {:>12.6f}s {:>12} B\n".format(
+                    benchmark.name, size, best_time, peak))
+                log.flush()
+    return results
+
+
+def make_report(results):
+    """Wrap benchmark results into a JSON-serializable report."""
+    return {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    """Compare benchmark results against a baseline report.
+
+    Parameters
+    ----------
+    results : list of dict
+        Benchmark results
+    baseline : dict
+        Baseline report (as produced by `make_report`)
+    tolerance : float, optional
+        Relative slowdown (or memory increase) tolerated before
+        a result is reported as a regression
+
+    Returns
+    -------
+    regressions : list of dict
+        Records with keys 'benchmark', 'size', 'metric', 'baseline',
+        'value' and 'ratio' for every measurement exceeding the tolerance
+    """
+    reference = {
+        (r["benchmark"], r["size"]): r for r in baseline["results"]
+    }
+    regressions = []
+    for r in results:
+        key = (r["benchmark"], r["size"])
+        if key not in reference:
+            continue
+        for metric in ["time", "peak_memory"]:
+            old_value = reference[key][metric]
+            if old_value > 0:
+                ratio = r[metric] / old_value
+                if ratio > 1 + tolerance:
+                    regressions.append({
+                        "benchmark": r["benchmark"],
+                        "size": r["size"],
+                        "metric": metric,
+                        "baseline": old_value,
+                        "value": r[metric],
+                        "ratio": ratio
+                    })
+    return regressions
+
+
+def main(benchmarks, argv=None):
+    """Command-line entry point of a benchmark suite.
+
+    Returns the exit status: 1 if regressions against the baseline
+    were found, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Run ReGraph benchmarks.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+        help="sizes of the generated inputs")
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="number of timed repetitions")
+    parser.add_argument(
+        "--seed", type=int, default=0, help="random seed")
+    parser.add_argument(
+        "--only", nargs="+", default=None,
+        help="names of the benchmarks to run")
+    parser.add_argument(
+        "--no-limit", action="store_true",
+        help="run quadratic benchmarks at all the sizes")
+    parser.add_argument(
+        "--output", default=None,
+        help="file where the JSON report is written")
+    parser.add_argument(
+        "--baseline", default=None,
+        help="JSON report to compare the results against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25,
+        help="tolerated relative slowdown before reporting a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        benchmarks, args.sizes, args.repeat, args.seed,
+        args.no_limit, args.only, log=sys.stdout)
+    report = make_report(results)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for r in regressions:
+            sys.stdout.write(
+                "REGRESSION {benchmark} (size {size}): {metric} "
+                "{baseline:.6g} -> {value:.6g} (x{ratio:.2f})\n".format(**r))
+        if len(regressions) > 0:
+            return 1
+    return 0
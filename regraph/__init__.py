@@ -6,7 +6,9 @@ from regraph.backends.networkx.plotting import *
 from regraph.backends.neo4j.graphs import Neo4jGraph
 from regraph.backends.neo4j.hierarchies import Neo4jHierarchy, TypedNeo4jGraph
 
-from regraph.rules import Rule, compose_rule_hierarchies, compose_rules
+from regraph.rules import (Rule, compose_rule_hierarchies, compose_rules,
+                           compose_rule_sequence,
+                           compose_rule_hierarchy_sequence)
 
 from regraph.exceptions import *
 
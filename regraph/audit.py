@@ -21,6 +21,8 @@ from regraph.rules import (compose_rules, Rule,
                            _create_merging_rule,
                            _create_merging_rule_hierarchy,
                            compose_rule_hierarchies,
+                           compose_rule_sequence,
+                           compose_rule_hierarchy_sequence,
                            invert_rule_hierarchy)
 from regraph.utils import keys_by_value
 
@@ -56,6 +58,7 @@ class Versioning(ABC):
     _invert_delta
     _merge_into_current_branch
     _create_identity_delta
+    _compose_delta_sequence
     _compose_delta_path
     """
 
@@ -118,20 +121,20 @@ class Versioning(ABC):
         """Abstract method for creating an identity-delta."""
         pass
 
+    @abstractmethod
+    def _compose_delta_sequence(self, deltas):
+        """Abstract method for composing a sequence of deltas."""
+        pass
+
     def _compose_delta_path(self, path):
         if len(path) > 1:
-            result_delta = self._revision_graph.adj[
-                path[0]][path[1]]["delta"]
-            previous_commit = path[1]
-            for current_commit in path[2:]:
-                result_delta = self._compose_deltas(
-                    result_delta,
-                    self._revision_graph.adj[
-                        previous_commit][current_commit]["delta"])
-
-                d = self._revision_graph.adj[previous_commit][current_commit]["delta"]
-                previous_commit = current_commit
-            return result_delta
+            deltas = [
+                self._revision_graph.adj[s][t]["delta"]
+                for s, t in zip(path[:-1], path[1:])
+            ]
+            if len(deltas) == 1:
+                return deltas[0]
+            return self._compose_delta_sequence(deltas)
         else:
             return self._create_identity_delta()
 
@@ -520,6 +523,18 @@ class VersionedGraph(Versioning):
             "rhs_instance": rhs
         }
 
+    def _compose_delta_sequence(self, deltas):
+        """Compose a sequence of deltas in a balanced tree."""
+        rule, lhs, rhs = compose_rule_sequence([
+            (d["rule"], d["lhs_instance"], d["rhs_instance"])
+            for d in deltas
+        ])
+        return {
+            "rule": rule,
+            "lhs_instance": lhs,
+            "rhs_instance": rhs
+        }
+
     @staticmethod
     def _invert_delta(delta):
         """Reverse the direction of delta."""
@@ -541,27 +556,31 @@ class VersionedGraph(Versioning):
         return identity_delta
 
     def _apply_delta(self, delta, relabel=True):
-        """Apply delta to the current graph version."""
+        """Apply delta to the current graph version.
 
-        rhs_instance = self.graph.rewrite(
-            delta["rule"], delta["lhs_instance"])
+        The delta is applied in a transaction of the graph: if its
+        application fails, the graph is left unchanged.
+        """
+        with self.graph.transaction():
+            rhs_instance = self.graph.rewrite(
+                delta["rule"], delta["lhs_instance"])
 
-        if relabel:
-            # Relabel nodes to correspond to the stored rhs
-            new_labels = {
-                v: delta["rhs_instance"][k]
-                for k, v in rhs_instance.items()
-            }
-
-            for n in self.graph.nodes():
-                if n not in new_labels.keys():
-                    new_labels[n] = n
-
-            self.graph.relabel_nodes(new_labels)
-            rhs_instance = {
-                k: new_labels[v]
-                for k, v in rhs_instance.items()
-            }
+            if relabel:
+                # Relabel nodes to correspond to the stored rhs
+                new_labels = {
+                    v: delta["rhs_instance"][k]
+                    for k, v in rhs_instance.items()
+                }
+
+                for n in self.graph.nodes():
+                    if n not in new_labels.keys():
+                        new_labels[n] = n
+
+                self.graph.relabel_nodes(new_labels)
+                rhs_instance = {
+                    k: new_labels[v]
+                    for k, v in rhs_instance.items()
+                }
         return rhs_instance
 
     def _merge_into_current_branch(self, delta):
@@ -590,7 +609,7 @@ class VersionedGraph(Versioning):
     def rewrite(self, rule, instance=None, message=None, **kwargs):
         """Rewrite the versioned graph and commit."""
         # Refine a rule to be side-effect free
-        refined_instance = rule.refine(self.graph, instance)
+        rule, refined_instance = rule.refined(self.graph, instance)
         rhs_instance = self.graph.rewrite(
             rule, refined_instance)
         commit_id = self.commit({
@@ -669,6 +688,18 @@ class VersionedHierarchy(Versioning):
             "rhs_instances": rhs
         }
 
+    def _compose_delta_sequence(self, deltas):
+        """Compose a sequence of deltas in a balanced tree."""
+        rule, lhs, rhs = compose_rule_hierarchy_sequence([
+            (d["rule_hierarchy"], d["lhs_instances"], d["rhs_instances"])
+            for d in deltas
+        ])
+        return {
+            "rule_hierarchy": rule,
+            "lhs_instances": lhs,
+            "rhs_instances": rhs
+        }
+
     @staticmethod
     def _invert_delta(delta):
         """Reverse the direction of delta."""
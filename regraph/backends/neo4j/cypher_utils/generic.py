@@ -280,7 +280,7 @@ def match_node(var_name, node_id, node_label):
         var_name, node_label, node_id)
 
 
-def match_nodes(var_id_dict, node_label=None):
+def match_nodes(var_id_dict, node_label=None, literal_ids=True):
     """Match a collection of nodes by their id.
 
     Parameters
@@ -291,14 +291,20 @@ def match_nodes(var_id_dict, node_label=None):
         to match
     label : str
         Label of the nodes to match
+    literal_ids : bool
+        True if the ids are literals, otherwise they are treated
+        as Cypher expressions (for example, query parameters)
     """
     node_label_str = ""
     if node_label:
         node_label_str = ":{}".format(node_label)
 
+    id_template = "{}"
+    if literal_ids:
+        id_template = "'{}'"
     query =\
         "MATCH " +\
-        ", ".join("({}{} {{ id : '{}'}}) ".format(
+        ", ".join(("({}{} {{ id : " + id_template + "}}) ").format(
             var_name, node_label_str, node_id)
             for var_name, node_id in var_id_dict.items()) + " "
     return query
@@ -465,6 +471,40 @@ def predecessors_query(var_name, node_id, node_label,
     return query
 
 
+def neighbourhoods_query(node_ids, node_label, edge_label):
+    """Generate query for getting the incident edges of a set of nodes.
+
+    Every record of the result contains the id of one of the input
+    nodes ('node_id'), the id of its successor or predecessor
+    ('neighbour_id'), the direction of the edge ('outgoing') and the
+    properties of the edge ('attributes').
+
+    Parameters
+    ----------
+    node_ids : iterable
+        Ids of the nodes to match
+    node_label
+        Label of the nodes to match
+    edge_label
+        Label of the edges to match
+    """
+    ids = ", ".join("'{}'".format(n) for n in node_ids)
+    query = (
+        "MATCH (n:{}) WHERE n.id IN [{}]\n".format(node_label, ids) +
+        "OPTIONAL MATCH (n)-[rel:{}]->(suc:{})\n".format(
+            edge_label, node_label) +
+        "RETURN n.id as node_id, suc.id as neighbour_id, "
+        "true as outgoing, properties(rel) as attributes\n" +
+        "UNION ALL\n" +
+        "MATCH (n:{}) WHERE n.id IN [{}]\n".format(node_label, ids) +
+        "OPTIONAL MATCH (pred:{})-[rel:{}]->(n)\n".format(
+            node_label, edge_label) +
+        "RETURN n.id as node_id, pred.id as neighbour_id, "
+        "false as outgoing, properties(rel) as attributes\n"
+    )
+    return query
+
+
 # def get_node(node_id, node_label):
 #     """Get node by its id (match and return it)."""
 #     return match_node(
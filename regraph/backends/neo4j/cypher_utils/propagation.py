@@ -54,6 +54,23 @@ def set_intergraph_edge(domain, codomain, domain_node,
     return query
 
 
+def set_intergraph_edges(domain, codomain, typing_label, attrs=None,
+                         pairs_var="pairs"):
+    """Generate a query setting intergraph edges in a batch.
+
+    The pairs of ids of nodes (domain node, codomain node) are
+    passed in the query parameter `pairs_var`.
+    """
+    query = (
+        "UNWIND ${} AS pair\n".format(pairs_var) +
+        "MATCH (n:{} {{ id: pair[0] }}), (m:{} {{ id: pair[1] }})\n".format(
+            domain, codomain) +
+        "MERGE (n)-[:{}  {{ {} }}]->(m)".format(
+            typing_label, generic.generate_attributes(attrs))
+    )
+    return query
+
+
 def check_homomorphism(tx, domain, codomain, total=True):
     """Check if the homomorphism is valid.
 
@@ -1,4 +1,6 @@
 """Collection of utils for generation of rewriting-related queries."""
+from collections import OrderedDict
+
 from . import generic
 
 from regraph.attribute_sets import (FiniteSet,
@@ -231,7 +233,7 @@ def cloning_query(original_var, clone_var, clone_id, clone_id_var,
                   node_label, edge_labels, sucs_to_ignore=None,
                   preds_to_ignore=None, suc_vars_to_ignore=None,
                   pred_vars_to_ignore=None,
-                  carry_vars=None, ignore_naming=False):
+                  carry_vars=None, ignore_naming=False, literal_ids=True):
     """Generate query for cloning a node.
 
     Parameters
@@ -256,6 +258,9 @@ def cloning_query(original_var, clone_var, clone_id, clone_id_var,
         while reconnecting edges to the new clone node
     carry_vars : iterable
         Collection of variables to carry
+    literal_ids : bool
+        True if the ids of successors and predecessors to ignore are
+        literals, otherwise they are treated as Cypher expressions
 
     Returns
     -------
@@ -338,14 +343,17 @@ def cloning_query(original_var, clone_var, clone_id, clone_id_var,
     carry_vars.add(clone_id_var)
     carry_vars.add(clone_var)
 
+    id_template = "{}"
+    if literal_ids:
+        id_template = "'{}'"
     query += (
         "WITH [{}] as sucIgnore, ".format(
             ", ".join(
-                ["'{}'".format(n) for n in sucs_to_ignore] +
+                [id_template.format(n) for n in sucs_to_ignore] +
                 ["id({})".format(n) for n in suc_vars_to_ignore])) +
         "[{}] as predIgnore, ".format(
             ", ".join(
-                ["'{}'".format(n) for n in preds_to_ignore] +
+                [id_template.format(n) for n in preds_to_ignore] +
                 ["id({})".format(n) for n in pred_vars_to_ignore])) +
         ", ".join(carry_vars) + " \n"
     )
@@ -869,7 +877,8 @@ def find_matching(pattern, node_label, edge_label,
 
 
 def match_pattern_instance(pattern, pattern_vars, instance,
-                           node_label, edge_label, match_edges=True):
+                           node_label, edge_label, match_edges=True,
+                           literal_ids=True):
     """Query to match an instance of the pattern.
 
     Parameters
@@ -883,9 +892,13 @@ def match_pattern_instance(pattern, pattern_vars, instance,
         values are ids of the nodes of the graph
     node_label :
     edge_label :
+    literal_ids : bool
+        True if the ids of the instance are literals, otherwise
+        they are treated as Cypher expressions
     """
     query =\
-        generic.match_nodes(instance, node_label=node_label)
+        generic.match_nodes(
+            instance, node_label=node_label, literal_ids=literal_ids)
 
     if match_edges and len(pattern.edges()) > 0:
         query +=\
@@ -1440,12 +1453,14 @@ def multiple_cloning_query(original_var, clone_var, clone_id, clone_id_var,
 
     return query, carry_vars
 
-def rule_to_cypher(rule, instance, node_label="node",
+def rule_to_cypher(rule, instance=None, node_label="node",
                    edge_label="edge", generate_var_ids=False):
     """Convert a rule on the instance to a Cypher query.
 
-    instance : dict
-        Dictionary specifying an instance of the lhs of the rule
+    instance : dict, optional
+        Dictionary specifying an instance of the lhs of the rule,
+        if not specified, the query is parameterised by the instance
+        (see `rule_instance_parameters`)
     rhs_typing : dict
     node_label : iterable, optional
     edge_label : iterable, optional
@@ -1454,6 +1469,13 @@ def rule_to_cypher(rule, instance, node_label="node",
         (unreadable, but more secure: guaranteed to avoid any var name
         collisions)
     """
+    literal_ids = instance is not None
+    if instance is None:
+        instance = {
+            n: "$instance.{}".format(key)
+            for n, key in _instance_keys(rule).items()
+        }
+
     # If names of nodes of the rule graphs (L, P, R) are used as
     # var names, we need to perform escaping on these names
     # for neo4j not to complain (some symbols are forbidden in
@@ -1491,7 +1513,8 @@ def rule_to_cypher(rule, instance, node_label="node",
         query += "// Match nodes and edges of the instance \n"
         query += match_pattern_instance(
             rule.lhs, lhs_vars, match_instance_vars,
-            node_label=node_label, edge_label=edge_label)
+            node_label=node_label, edge_label=edge_label,
+            literal_ids=literal_ids)
         query += "\n\n"
     else:
         query += "// Empty instance \n\n"
@@ -1513,7 +1536,7 @@ def rule_to_cypher(rule, instance, node_label="node",
         sucs_to_ignore = dict()
 
         # Set a p_node that will correspond to the original
-        fixed_node = generic.keys_by_value(
+        fixed_node = keys_by_value(
             preserved_nodes_index,
             min([preserved_nodes_index[p_node] for p_node in p_nodes]))[0]
         fixed_nodes[lhs_node] = fixed_node
@@ -1561,7 +1584,8 @@ def rule_to_cypher(rule, instance, node_label="node",
                 suc_vars_to_ignore=suc_vars_to_ignore,
                 pred_vars_to_ignore=pred_vars_to_ignore,
                 carry_vars=carry_variables,
-                ignore_naming=True)
+                ignore_naming=True,
+                literal_ids=literal_ids)
             query += q
             query += generic.with_vars(carry_variables)
             query += "\n\n"
@@ -1595,7 +1619,7 @@ def rule_to_cypher(rule, instance, node_label="node",
     for n in rule.lhs.nodes():
         if n not in rule.removed_nodes():
             if n not in rule.cloned_nodes().keys():
-                new_var_name = p_vars[generic.keys_by_value(rule.p_lhs, n)[0]]
+                new_var_name = p_vars[keys_by_value(rule.p_lhs, n)[0]]
                 vars_to_rename[lhs_vars[n]] = new_var_name
                 carry_variables.remove(lhs_vars[n])
             elif n in fixed_nodes.keys():
@@ -1679,11 +1703,11 @@ def rule_to_cypher(rule, instance, node_label="node",
         query +=\
             "// Merging nodes '{}' of the preserved part ".format(p_nodes) +\
             "into '{}' \n".format(rhs_key)
-        merged_id = "_".join(instance[rule.p_lhs[p_n]]for p_n in p_nodes)
+        # the id of the merged node is generated by the database
         q, carry_variables = merging_query1(
             original_vars=[p_vars[n] for n in p_nodes],
             merged_var=rhs_vars[rhs_key],
-            merged_id=merged_id,
+            merged_id=None,
             merged_id_var=generic.generate_var_name(),
             node_label=node_label,
             edge_label=edge_label,
@@ -1789,3 +1813,327 @@ def rule_to_cypher(rule, instance, node_label="node",
     rhs_vars_inverse = {v: k for k, v in rhs_vars.items()}
 
     return query, rhs_vars_inverse
+
+
+def _instance_keys(rule):
+    """Get the keys of the nodes of the lhs in the instance parameter."""
+    return {n: "n{}".format(i) for i, n in enumerate(rule.lhs.nodes())}
+
+
+def rule_instance_parameters(rule, instance):
+    """Get the parameters of a query produced by `rule_to_cypher_template`.
+
+    The ids of the nodes of the instance are converted to strings
+    (as stored in the database).
+
+    Parameters
+    ----------
+    rule : regraph.Rule
+    instance : dict
+        Dictionary specifying an instance of the lhs of the rule
+
+    Returns
+    -------
+    parameters : dict
+        Parameters of the query
+    """
+    canonical_rule, lhs_names, _ = rule._canonical_form()
+    keys = _instance_keys(canonical_rule)
+    return {
+        "instance": {
+            keys[lhs_names[n]]: str(instance[n]) for n in rule.lhs.nodes()
+        }
+    }
+
+
+class TemplateCache(object):
+    """Cache of query templates with the least recently used eviction.
+
+    Attributes
+    ----------
+    maxsize : int
+        Maximal number of cached templates
+    """
+
+    def __init__(self, maxsize=1024):
+        """Initialize an empty cache."""
+        self.maxsize = maxsize
+        self._templates = OrderedDict()
+
+    def get(self, key, generate):
+        """Get the template by its key.
+
+        If the template is not cached, it is produced by calling
+        `generate` (without arguments).
+        """
+        if key in self._templates:
+            self._templates.move_to_end(key)
+            return self._templates[key]
+        template = generate()
+        self._templates[key] = template
+        if len(self._templates) > self.maxsize:
+            self._templates.popitem(last=False)
+        return template
+
+    def clear(self):
+        """Remove all the cached templates."""
+        self._templates.clear()
+
+    def __len__(self):
+        """Return the number of cached templates."""
+        return len(self._templates)
+
+
+_rule_templates = TemplateCache()
+_program_templates = TemplateCache()
+
+
+def rule_to_cypher_template(rule, node_label="node", edge_label="edge"):
+    """Get the Cypher query of a rule parameterised by its instance.
+
+    The query is generated by `rule_to_cypher` from the rule with
+    canonically named nodes (see `regraph.Rule.fingerprint`) once per
+    structure of this rule and labels, and cached: rules that differ
+    only by the naming of nodes share their query. Its parameters
+    for a particular instance are produced by `rule_instance_parameters`,
+    so that the database can reuse the plan of the query for all
+    the instances.
+
+    Parameters
+    ----------
+    rule : regraph.Rule
+    node_label : str, optional
+    edge_label : str, optional
+
+    Returns
+    -------
+    query : str
+        Generated Cypher query
+    rhs_vars_inverse : dict
+        Dictionary whose keys are the variables returned by the query
+        and whose values are the corresponding nodes of the rhs
+    """
+    canonical_rule, _, rhs_names = rule._canonical_form()
+    key = (canonical_rule.compile().key, node_label, edge_label)
+    query, canonical_vars = _rule_templates.get(key, lambda: rule_to_cypher(
+        canonical_rule, node_label=node_label, edge_label=edge_label))
+    rhs_nodes = {v: k for k, v in rhs_names.items()}
+    rhs_vars_inverse = {
+        var: rhs_nodes[n] for var, n in canonical_vars.items()
+    }
+    return query, rhs_vars_inverse
+
+
+def program_to_cypher_template(program, node_label="node",
+                               edge_label="edge"):
+    """Get the Cypher query of a program (cached by the program key).
+
+    See `program_to_cypher`.
+    """
+    if program.key is None:
+        return program_to_cypher(program, node_label, edge_label)
+    key = (program.key, node_label, edge_label)
+    return _program_templates.get(key, lambda: program_to_cypher(
+        program, node_label, edge_label))
+
+
+def batch_rule_to_cypher(rule, instances, node_label="node",
+                         edge_label="edge"):
+    """Convert a rule on many instances to a single Cypher query.
+
+    The instances are passed to the query in the parameter `instances`
+    (a list of maps from the variables of the nodes of the lhs to the
+    ids of their images) and unwound, so that the rule is applied to
+    all of them in one query. The text of the query does not depend on
+    the instances. Only the rules that do not clone, merge or add nodes
+    are supported, the images of the instances are assumed
+    to be pairwise disjoint.
+
+    Parameters
+    ----------
+    rule : regraph.Rule
+        Rewriting rule
+    instances : list of dict
+        Instances of the lhs of the rule
+    node_label : str, optional
+    edge_label : str, optional
+
+    Returns
+    -------
+    query : str
+        Generated Cypher query
+    parameters : dict
+        Parameters of the query
+
+    Raises
+    ------
+    ReGraphError
+        If the rule clones, merges or adds nodes
+    """
+    changes = rule.changes()
+    if len(changes.cloned_nodes) > 0 or len(changes.merged_nodes) > 0 or\
+            len(changes.added_nodes) > 0:
+        raise ReGraphError(
+            "Batch rewriting queries are not implemented for the rules "
+            "cloning, merging or adding nodes")
+
+    lhs_vars = {n: "lhs_{}".format(i) for i, n in enumerate(rule.lhs.nodes())}
+    p_vars = {p: lhs_vars[l] for p, l in rule.p_lhs.items()}
+    rhs_vars = {
+        r: p_vars[changes.rhs_preimages[r][0]] for r in rule.rhs.nodes()
+    }
+
+    parameters = {
+        "instances": [
+            {lhs_vars[k]: str(v) for k, v in instance.items()}
+            for instance in instances
+        ]
+    }
+
+    query = "// Unwind the instances of the lhs \n"
+    query += "UNWIND $instances AS instance\n"
+    if len(lhs_vars) > 0:
+        query += "MATCH {}\n\n".format(", ".join(
+            "({}:{} {{ id : instance.{} }})".format(var, node_label, var)
+            for var in lhs_vars.values()))
+    carry_variables = ["instance"] + list(lhs_vars.values())
+
+    for u, v in changes.removed_edges:
+        query += "// Removing edge '{}'->'{}' of the interface \n".format(
+            u, v)
+        query += "FOREACH(removed_edge IN [({})-[e:{}]->({}) | e] |\n".format(
+            p_vars[u], edge_label, p_vars[v])
+        query += "\tDELETE removed_edge)\n\n"
+
+    for p_node, attrs in changes.removed_node_attrs.items():
+        query += "// Removing properties from node '{}' \n".format(p_node)
+        query += remove_attributes(p_vars[p_node], attrs) + "\n"
+
+    for i, ((u, v), attrs) in enumerate(changes.removed_edge_attrs.items()):
+        edge_var = "removed_attrs_edge_{}".format(i)
+        query += "// Removing properties from edge '{}'->'{}' \n".format(
+            u, v)
+        query += generic.with_vars(carry_variables) + "\n"
+        query += "OPTIONAL MATCH ({})-[{}:{}]->({})\n".format(
+            p_vars[u], edge_var, edge_label, p_vars[v])
+        query += remove_attributes(edge_var, attrs) + "\n"
+
+    if len(changes.removed_nodes) > 0:
+        removed_vars = [lhs_vars[n] for n in changes.removed_nodes]
+        query += "// Removing nodes of the lhs \n"
+        query += remove_nodes(removed_vars) + "\n"
+        carry_variables = [
+            var for var in carry_variables if var not in removed_vars]
+
+    for u, v in changes.added_edges:
+        query += "// Adding edge '{}'->'{}' of the rhs \n".format(u, v)
+        query += add_edge(
+            "", rhs_vars[u], rhs_vars[v], edge_label, merge=True) + "\n"
+
+    for rhs_node, attrs in changes.added_node_attrs.items():
+        query += "// Adding properties to node '{}' \n".format(rhs_node)
+        query += add_attributes(rhs_vars[rhs_node], attrs) + "\n"
+
+    for i, ((u, v), attrs) in enumerate(changes.added_edge_attrs.items()):
+        edge_var = "added_attrs_edge_{}".format(i)
+        query += "// Adding properties to edge '{}'->'{}' \n".format(u, v)
+        query += generic.with_vars(carry_variables) + "\n"
+        query += "MATCH ({})-[{}:{}]->({})\n".format(
+            rhs_vars[u], edge_var, edge_label, rhs_vars[v])
+        query += add_attributes(edge_var, attrs) + "\n"
+
+    return query, parameters
+
+
+def program_to_cypher(program, node_label="node", edge_label="edge"):
+    """Convert a compiled rule to a parameterised Cypher query.
+
+    The generated query does not depend on the instance of the rule:
+    the ids of the nodes of the instance are passed in the query
+    parameter `instance`, a map whose keys are the names `r<i>` of the
+    input registers of the program and whose values are the ids
+    converted to strings (as stored in the database). Only the programs that do not
+    clone, merge or add nodes are supported.
+
+    Parameters
+    ----------
+    program : regraph.rules.RuleProgram
+        Program produced by `regraph.Rule.compile`
+    node_label : str, optional
+    edge_label : str, optional
+
+    Returns
+    -------
+    query : str
+        Generated Cypher query
+
+    Raises
+    ------
+    ReGraphError
+        If the program clones, merges or adds nodes
+    """
+    if not program.is_in_place():
+        raise ReGraphError(
+            "Cypher templates are not implemented for the programs "
+            "cloning, merging or adding nodes")
+
+    variables = {r: "r{}".format(r) for _, r in program.inputs}
+    query = ""
+    if len(variables) > 0:
+        query += "// Match nodes of the instance \n"
+        query += "MATCH {}\n\n".format(", ".join(
+            "({}:{} {{ id : $instance.{} }})".format(var, node_label, var)
+            for var in variables.values()))
+    carry_variables = list(variables.values())
+
+    removed_vars = []
+    for i, op in enumerate(program.restrictive):
+        name = op[0]
+        if name == "clone":
+            variables[op[2][0]] = variables[op[1]]
+        elif name == "remove_node":
+            removed_vars.append(variables[op[1]])
+        elif name == "remove_edge":
+            query += "// Removing edge \n"
+            query += (
+                "FOREACH(removed_edge IN [({})-[e:{}]->({}) | e] |\n".format(
+                    variables[op[1]], edge_label, variables[op[2]]) +
+                "\tDELETE removed_edge)\n\n"
+            )
+        elif name == "remove_node_attrs":
+            query += "// Removing node properties \n"
+            query += remove_attributes(variables[op[1]], op[2]) + "\n"
+        elif name == "remove_edge_attrs":
+            edge_var = "removed_attrs_edge_{}".format(i)
+            query += "// Removing edge properties \n"
+            query += generic.with_vars(carry_variables) + "\n"
+            query += "OPTIONAL MATCH ({})-[{}:{}]->({})\n".format(
+                variables[op[1]], edge_var, edge_label, variables[op[2]])
+            query += remove_attributes(edge_var, op[3]) + "\n"
+
+    if len(removed_vars) > 0:
+        query += "// Removing nodes \n"
+        query += remove_nodes(removed_vars) + "\n"
+        carry_variables = [
+            var for var in carry_variables if var not in removed_vars]
+
+    for i, op in enumerate(program.expansive):
+        name = op[0]
+        if name == "merge":
+            variables[op[1]] = variables[op[2][0]]
+        elif name == "add_edge":
+            query += "// Adding edge \n"
+            query += add_edge(
+                "", variables[op[1]], variables[op[2]],
+                edge_label, merge=True) + "\n"
+        elif name == "add_node_attrs":
+            query += "// Adding node properties \n"
+            query += add_attributes(variables[op[1]], op[2]) + "\n"
+        elif name == "add_edge_attrs":
+            edge_var = "added_attrs_edge_{}".format(i)
+            query += "// Adding edge properties \n"
+            query += generic.with_vars(carry_variables) + "\n"
+            query += "MATCH ({})-[{}:{}]->({})\n".format(
+                variables[op[1]], edge_var, edge_label, variables[op[2]])
+            query += add_attributes(edge_var, op[3]) + "\n"
+    return query
@@ -14,7 +14,8 @@ from regraph.backends.networkx.graphs import NXGraph
 from regraph.utils import (normalize_attrs,
                            normalize_relation,
                            load_nodes_from_json,
-                           load_edges_from_json,)
+                           load_edges_from_json,
+                           select_non_overlapping)
 from regraph.exceptions import ReGraphError
 from .cypher_utils import generic
 from .cypher_utils import rewriting
@@ -86,11 +87,11 @@ class Neo4jGraph(Graph):
                 warnings.warn(
                     "Failed to create id uniqueness constraint")
 
-    def _execute(self, query):
+    def _execute(self, query, parameters=None):
         """Execute a Cypher query."""
         with self._driver.session() as session:
             if len(query) > 0:
-                result = session.run(query)
+                result = session.run(query, parameters)
                 return result
 
     def _close(self):
@@ -376,6 +377,35 @@ class Neo4jGraph(Graph):
                 pred.add(record["pred"])
         return pred
 
+    def get_neighbourhoods(self, nodes):
+        """Get the incident edges of a collection of nodes.
+
+        The neighbourhoods of all the nodes are retrieved
+        by a single query, see `regraph.Graph.get_neighbourhoods`.
+        """
+        nodes = list(nodes)
+        successors = {n: dict() for n in nodes}
+        predecessors = {n: dict() for n in nodes}
+        if len(nodes) == 0:
+            return successors, predecessors
+        query = generic.neighbourhoods_query(
+            nodes, self._node_label, self._edge_label)
+        result = self._execute(query)
+        for record in result:
+            if record["neighbour_id"] is None:
+                continue
+            if record["attributes"]:
+                attrs = generic.convert_props_to_attrs(
+                    dict(record["attributes"]))
+            else:
+                attrs = dict()
+            if record["outgoing"]:
+                successors[record["node_id"]][record["neighbour_id"]] = attrs
+            else:
+                predecessors[record["node_id"]][
+                    record["neighbour_id"]] = attrs
+        return successors, predecessors
+
     def advanced_find_matching(self, pattern_dict,
                                nodes=None, graph_typing=None,
                                pattern_typing=None):
@@ -455,6 +485,138 @@ class Neo4jGraph(Graph):
             instances = []
         return instances
 
+    def rewrite(self, rule, instance=None, record_undo=False):
+        """Perform SqPO rewiting of the graph with a rule.
+
+        If the rule clones, merges or adds nodes, it is performed by
+        a single query parameterised by the instance. The text of the
+        query is cached by the structure of the rule independently of
+        the names of its nodes (see
+        `cypher_utils.rewriting.rule_to_cypher_template`), so that
+        repeated rewritings with the same (or an isomorphic) rule reuse
+        both the query and its plan in the database. Otherwise (or if
+        the changes are recorded in an undo log), the rewriting is
+        performed as in `regraph.Graph.rewrite`.
+
+        Parameters
+        ----------
+        rule : regraph.Rule
+            SqPO rewriting rule
+        instance : dict, optional
+            Instance of the input rule. If not specified,
+            the identity map of the rule's left-hand side
+            is used
+        record_undo : bool, optional
+            If True, the primitive changes performed by the rewriting
+            are recorded in an undo log (see `undo`)
+
+        Returns
+        -------
+        rhs_instance : dict
+            Instance of the right-hand side of the rule
+        undo_log : regraph.graphs.UndoLog
+            Log of the changes (returned only if `record_undo`
+            is True)
+        """
+        if instance is None:
+            instance = {
+                n: n for n in rule.lhs.nodes()
+            }
+        if record_undo or rule.compile().is_in_place() or\
+                self._transaction_log() is not None:
+            return super().rewrite(rule, instance, record_undo)
+
+        query, rhs_vars_inverse = rewriting.rule_to_cypher_template(
+            rule, self._node_label, self._edge_label)
+        result = self._execute(
+            query, rewriting.rule_instance_parameters(rule, instance))
+        record = result.single()
+
+        # The preserved nodes keep the ids of the instance
+        instance_ids = {str(v): v for v in instance.values()}
+        rhs_instance = dict()
+        for var, rhs_node in rhs_vars_inverse.items():
+            node_id = dict(record[var])["id"]
+            rhs_instance[rhs_node] = instance_ids.get(node_id, node_id)
+        return rhs_instance
+
+    def apply_program(self, program, instance, log=None):
+        """Apply a compiled rule to its instance.
+
+        If the program does not clone, merge or add nodes, it is
+        performed by a single query parameterised by the instance.
+        The text of the query is cached by the structure of the compiled
+        rule (see `regraph.rules.RuleProgram.key`), so that repeated
+        rewritings with the same (or an equal) rule reuse both the query
+        and its plan in the database. Otherwise (or if the changes are
+        recorded in an undo log), the program is applied as in
+        `regraph.Graph.apply_program`.
+        """
+        if not program.is_in_place() or log is not None or\
+                self._transaction_log() is not None:
+            return super().apply_program(program, instance, log)
+        query = rewriting.program_to_cypher_template(
+            program, self._node_label, self._edge_label)
+        self._execute(query, {
+            "instance": {
+                "r{}".format(r): str(instance[node])
+                for node, r in program.inputs
+            }
+        })
+        return program.in_place_output(instance)
+
+    def rewrite_all(self, rule, instances, policy="non_overlapping"):
+        """Rewrite the graph with a rule applied to many instances.
+
+        With the `"non_overlapping"` policy, if the rule does not clone,
+        merge or add nodes, the selected instances are rewritten
+        by a single query unwinding the list of instances (passed as
+        a query parameter). Otherwise
+        (or inside a transaction), the rewriting is performed as in
+        `regraph.Graph.rewrite_all`.
+
+        Parameters
+        ----------
+        rule : regraph.Rule
+            SqPO rewriting rule
+        instances : iterable of dict
+            Instances of the rule in the graph
+        policy : str, optional
+            Policy of the selection of the instances to apply
+            (`"non_overlapping"` or `"sequential"`)
+
+        Returns
+        -------
+        rhs_instances : dict
+            Dictionary whose keys are the positions of the applied
+            instances in `instances` and whose values are the
+            corresponding instances of the right-hand side of the rule
+        """
+        changes = rule.changes()
+        if policy != "non_overlapping" or\
+                self._transaction_log() is not None or\
+                len(changes.cloned_nodes) > 0 or\
+                len(changes.merged_nodes) > 0 or\
+                len(changes.added_nodes) > 0:
+            return super().rewrite_all(rule, instances, policy)
+
+        instances = list(instances)
+        selected = select_non_overlapping(instances)
+        if len(selected) > 0:
+            query, parameters = rewriting.batch_rule_to_cypher(
+                rule, [instances[i] for i in selected],
+                node_label=self._node_label,
+                edge_label=self._edge_label)
+            self._execute(query, parameters)
+        return {
+            i: {
+                rhs_node: instances[i][
+                    rule.p_lhs[changes.rhs_preimages[rhs_node][0]]]
+                for rhs_node in rule.rhs.nodes()
+            }
+            for i in selected
+        }
+
     def relabel_node(self, node_id, new_id):
         """Relabel a node in the graph.
 
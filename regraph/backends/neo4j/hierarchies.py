@@ -39,6 +39,7 @@ from .cypher_utils.generic import (constraint_query,
                                    match_edge,
                                    )
 from .cypher_utils.propagation import (set_intergraph_edge,
+                                       set_intergraph_edges,
                                        check_homomorphism,
                                        check_consistency,
                                        get_typing,
@@ -438,6 +439,83 @@ class Neo4jHierarchy(Hierarchy):
             self.execute(skeleton_query)
         # return result
 
+    def add_typings_from(self, typings):
+        """Add typings to the hierarchy.
+
+        The typing edges between the nodes of the graphs are created
+        by one batched (UNWIND) query per typing, the typings are then
+        validated once all of them are inserted. If some typings are
+        invalid, none of them is added and the raised error reports
+        all of them.
+
+        Parameters
+        ----------
+        typings : iterable
+            Typings given by tuples `(source, target, mapping)` or
+            `(source, target, mapping, attrs)`
+
+        Raises
+        ------
+        HierarchyError
+            If some of the typings are not valid homomorphisms or
+            produce paths that do not commute with existing paths
+        """
+        typings = [
+            (t[0], t[1], t[2], t[3] if len(t) > 3 else None)
+            for t in typings
+        ]
+        tmp_attrs = {'tmp': {'true'}}
+        normalize_attrs(tmp_attrs)
+
+        with self._driver.session() as session:
+            tx = session.begin_transaction()
+            for source, target, mapping, _ in typings:
+                if len(mapping) > 0:
+                    tx.run(
+                        set_intergraph_edges(
+                            source, target, "typing", attrs=tmp_attrs),
+                        {"pairs": [
+                            [str(u), str(v)] for u, v in mapping.items()]})
+            tx.commit()
+
+        errors = []
+        for source, target, _, _ in typings:
+            try:
+                with self._driver.session() as session:
+                    tx = session.begin_transaction()
+                    check_homomorphism(tx, source, target)
+                    check_consistency(tx, source, target)
+                    tx.commit()
+            except InvalidHomomorphism as e:
+                errors.append("'{}->{}': {}".format(source, target, e))
+
+        if len(errors) > 0:
+            for source, target, _, _ in typings:
+                self.execute(
+                    "MATCH (:{})-[t:typing]-(:{})\n".format(
+                        source, target) +
+                    "DELETE t\n")
+            raise HierarchyError(
+                "Invalid typings:\n" + "\n".join(errors))
+
+        for source, target, _, attrs in typings:
+            skeleton_query = (
+                match_nodes(
+                    var_id_dict={'g_src': source, 'g_tar': target},
+                    node_label=self._graph_label) +
+                add_edge(
+                    edge_var='new_hierarchy_edge',
+                    source_var='g_src',
+                    target_var='g_tar',
+                    edge_label=self._typing_label,
+                    attrs=attrs) +
+                with_vars(["new_hierarchy_edge"]) +
+                "MATCH (:{})-[t:typing]-(:{})\n".format(
+                    source, target) +
+                "REMOVE t.tmp\n"
+            )
+            self.execute(skeleton_query)
+
     def add_relation(self, left, right, relation, attrs=None):
         """Add relation to the hierarchy.
 
@@ -804,6 +882,40 @@ class Neo4jHierarchy(Hierarchy):
             )
             self.execute(query)
 
+    def _update_mappings(self, mappings):
+        """Update the mapping dictionaries of several typings.
+
+        The typing edges of the nodes whose images are changed are
+        replaced in a single transaction, by one batched (UNWIND)
+        query per typing.
+        """
+        updates = []
+        for (source, target), mapping in mappings.items():
+            old_mapping = self.get_typing(source, target)
+            pairs = [
+                [str(k), str(v)] for k, v in mapping.items()
+                if k not in old_mapping or old_mapping[k] != v
+            ]
+            if len(pairs) > 0:
+                updates.append((source, target, pairs))
+
+        with self._driver.session() as session:
+            tx = session.begin_transaction()
+            for source, target, pairs in updates:
+                query = (
+                    "UNWIND $pairs AS pair\n" +
+                    "MATCH (s:{} {{id: pair[0]}}), ".format(source) +
+                    "(new_t:{} {{id: pair[1]}})\n".format(target) +
+                    "OPTIONAL MATCH (s)-[r:{}]->(:{})\n".format(
+                        self._graph_typing_label, target) +
+                    "DELETE r\n" +
+                    "WITH DISTINCT s, new_t\n" +
+                    "MERGE (s)-[:{}]->(new_t)\n".format(
+                        self._graph_typing_label)
+                )
+                tx.run(query, {"pairs": pairs})
+            tx.commit()
+
     def _update_relation(self, left, right, relation):
         """Update the relation dictionaries (left and right)."""
         old_relation = self.get_relation(left, right)
@@ -989,7 +1101,8 @@ class Neo4jHierarchy(Hierarchy):
                 hierarchy.add_graph_from_json(
                     graph_data["id"], graph_data["graph"], attrs)
 
-        # add typing
+        # add typing (validated once all the typings are added)
+        typings = []
         for typing_data in json_data["typing"]:
             if ignore is not None and\
                "typing" in ignore.keys() and\
@@ -1000,11 +1113,12 @@ class Neo4jHierarchy(Hierarchy):
                     attrs = dict()
                 else:
                     attrs = attrs_from_json(typing_data["attrs"])
-                hierarchy.add_typing(
+                typings.append((
                     typing_data["from"],
                     typing_data["to"],
                     typing_data["mapping"],
-                    attrs)
+                    attrs))
+        hierarchy.add_typings_from(typings)
 
         # add relations
         for relation_data in json_data["relations"]:
@@ -2,8 +2,10 @@
 
 This module implements data structures wrapping the `networkx.DiGraph` class.
 """
+import copy
 import itertools
 import networkx as nx
+import weakref
 from networkx.algorithms import isomorphism
 
 import warnings
@@ -23,7 +25,17 @@ from regraph.utils import (normalize_attrs,
 
 
 class NXGraph(Graph):
-    """Wrapper for NetworkX directed graphs."""
+    """Wrapper for NetworkX directed graphs.
+
+    Attributes
+    ----------
+    _graph : networkx.DiGraph
+        Wrapped NetworkX graph
+    _revision : int
+        Counter of modifications performed through the methods of
+        the wrapper, used to invalidate data computed from the graph
+        (for example, change-sets of rules, see `regraph.Rule.changes`)
+    """
 
     node_dict_factory = dict
     adj_dict_factory = dict
@@ -32,6 +44,43 @@ class NXGraph(Graph):
         """Initialize NetworkX graph."""
         super().__init__()
         self._graph = nx.DiGraph()
+        self._revision = 0
+
+    def __getstate__(self):
+        """Get the state of the graph (without its sharing holders)."""
+        state = self.__dict__.copy()
+        state.pop("_holders", None)
+        return state
+
+    def _share(self, holder, key):
+        """Share the graph with the holder until its next modification.
+
+        Before the graph is modified for the first time after this call,
+        its copy is passed to `holder._unshare(key, graph, graph_copy)`
+        (unless the holder is garbage collected by then). This is used,
+        for example, by hierarchy snapshots (see
+        `regraph.backends.networkx.hierarchies.NXHierarchySnapshot`).
+        """
+        holders = getattr(self, "_holders", None)
+        if holders is None:
+            holders = []
+            self._holders = holders
+        holders.append((weakref.ref(holder), key))
+
+    def _before_change(self):
+        """Pass copies of the graph to its sharing holders."""
+        holders = getattr(self, "_holders", None)
+        if holders is None:
+            return
+        del self._holders
+        holders = [
+            (holder(), key) for holder, key in holders
+            if holder() is not None
+        ]
+        if len(holders) > 0:
+            graph_copy = copy.deepcopy(self)
+            for holder, key in holders:
+                holder._unshare(key, self, graph_copy)
 
     def nodes(self, data=False):
         """Return the list of nodes."""
@@ -83,7 +132,9 @@ class NXGraph(Graph):
             new_attrs = safe_deepcopy_dict(attrs)
             normalize_attrs(new_attrs)
         if node_id not in self.nodes():
+            self._before_change()
             self._graph.add_node(node_id, **new_attrs)
+            self._revision += 1
             return node_id
         else:
             raise GraphError("Node '{}' already exists!".format(node_id))
@@ -97,7 +148,9 @@ class NXGraph(Graph):
         node_id : hashable, node to remove.
         """
         if node_id in self.nodes():
+            self._before_change()
             self._graph.remove_node(node_id)
+            self._revision += 1
         else:
             raise GraphError("Node '{}' does not exist!".format(node_id))
         return
@@ -133,7 +186,9 @@ class NXGraph(Graph):
         if (s, t) in self.edges():
             raise GraphError(
                 "Edge '{}'->'{}' already exists!".format(s, t))
+        self._before_change()
         self._graph.add_edge(s, t, **new_attrs)
+        self._revision += 1
 
     def remove_edge(self, s, t):
         """Remove edge from the graph.
@@ -147,7 +202,9 @@ class NXGraph(Graph):
         if (s, t) not in self.edges():
             raise GraphError(
                 "Edge '{}->{}' does not exist!".format(s, t))
+        self._before_change()
         self._graph.remove_edge(s, t)
+        self._revision += 1
 
     def update_node_attrs(self, node_id, attrs, normalize=True):
         """Update attributes of a node.
@@ -176,9 +233,11 @@ class NXGraph(Graph):
             for k in self._graph.nodes[node_id].keys():
                 if k not in new_attrs.keys():
                     attrs_to_remove.add(k)
+            self._before_change()
             self._graph.add_node(node_id, **new_attrs)
             for k in attrs_to_remove:
                 del self._graph.nodes[node_id][k]
+            self._revision += 1
 
     def update_edge_attrs(self, s, t, attrs, normalize=True):
         """Update attributes of a node.
@@ -206,9 +265,11 @@ class NXGraph(Graph):
         for k in self._graph.adj[s][t].keys():
             if k not in attrs.keys():
                 attrs_to_remove.add(k)
+        self._before_change()
         self._graph.add_edge(s, t, **attrs)
         for k in attrs_to_remove:
             del self._graph.adj[s][t][k]
+        self._revision += 1
 
     def successors(self, node_id):
         """Return the set of successors."""
@@ -3,12 +3,16 @@
 This module contains a data structure implementing
 graph hierarchies based on NetworkX graphs.
 
-* `NXHierarchy` -- class for in-memort graph hierarchies.
+* `NXHierarchy` -- class for in-memort graph hierarchies;
+* `NXHierarchySnapshot` -- class for read-only snapshots of them.
 """
 import copy
 import networkx as nx
 import warnings
 
+from contextlib import contextmanager, nullcontext
+from types import MappingProxyType
+
 from regraph.exceptions import (HierarchyError,
                                 ReGraphError,
                                 InvalidHomomorphism,
@@ -22,9 +26,19 @@ from regraph.category_utils import (compose,
                                     check_homomorphism,
                                     right_relation_dict,
                                     pullback_complement)
+from regraph.dense import NodeIndex, DenseHomomorphism
+from regraph.rules import compose_rules, _rule_key
 from regraph.utils import (normalize_attrs,
                            normalize_relation,
-                           keys_by_value,)
+                           keys_by_value,
+                           generate_new_id)
+
+
+def _copy_typing(typing):
+    """Copy a typing (or a tuple of typings of a rule)."""
+    if isinstance(typing, tuple):
+        return tuple(dict(t) for t in typing)
+    return dict(typing)
 
 
 class NXHierarchy(Hierarchy, NXGraph):
@@ -32,11 +46,16 @@ class NXHierarchy(Hierarchy, NXGraph):
 
     Attributes
     ----------
-
+    lazy : bool
+        If True, changes of rewriting are propagated on demand
+        (see `rewrite`)
     """
 
     rel_dict_factory = dict
 
+    # Maximal number of cached liftings and projections of rules
+    rule_cache_size = 1024
+
     # Implementation of abstract methods
 
     def graphs(self, data=False):
@@ -82,6 +101,7 @@ class NXHierarchy(Hierarchy, NXGraph):
 
     def get_graph(self, graph_id):
         """Get a graph object associated to the node 'graph_id'."""
+        self._apply_pending([graph_id])
         if graph_id not in self.nodes():
             raise HierarchyError(
                 "Hierarchy node '{}' does not exist!".format(graph_id))
@@ -92,6 +112,7 @@ class NXHierarchy(Hierarchy, NXGraph):
 
     def get_typing(self, source, target):
         """Get a typing dict associated to the edge 'source->target'."""
+        self._apply_pending([source, target])
         if (source, target) in self.edges():
             if self.is_graph(source):
                 return self.get_edge(source, target)["mapping"]
@@ -99,16 +120,11 @@ class NXHierarchy(Hierarchy, NXGraph):
                 edge = self.get_edge(source, target)
                 return (edge["lhs_mapping"], edge["rhs_mapping"])
         else:
-            try:
-                path = nx.shortest_path(self._graph, source, target)
-            except:
-                raise HierarchyError(
-                    "No path from '{}' to '{}' in the hierarchy".format(
-                        source, target))
-            return self.compose_path_typing(path)
+            return _copy_typing(self._path_typing(source, target))
 
     def get_relation(self, left, right):
         """Get a relation dict associated to the rel 'left-right'."""
+        self._apply_pending([left, right])
         return self.relation_edges[(left, right)]["rel"]
 
     def get_graph_attrs(self, graph_id):
@@ -131,6 +147,7 @@ class NXHierarchy(Hierarchy, NXGraph):
             attrs[k] = v
 
         nx.set_node_attributes(self._graph, {node_id: {"attrs": attrs}})
+        self._record_node_change(node_id)
 
     def get_typing_attrs(self, source, target):
         """Get attributes of a typing in the hierarchy.
@@ -174,6 +191,7 @@ class NXHierarchy(Hierarchy, NXGraph):
         for k, v in attrs.items():
             self.relation_edges[(left, right)]["attrs"][k] = v
             self.relation_edges[(right, left)]["attrs"][k] = v
+        self._record_relation_change(left, right)
 
     def set_node_relation(self, left_graph, right_graph,
                           left_node, right_node):
@@ -193,6 +211,7 @@ class NXHierarchy(Hierarchy, NXGraph):
         else:
             self.relation_edges[right_graph, left_graph]["rel"][right_node] = {
                 left_node}
+        self._record_relation_change(left_graph, right_graph)
 
     def add_graph(self, graph_id, graph, attrs=None):
         """Add a new graph to the hierarchy.
@@ -289,6 +308,7 @@ class NXHierarchy(Hierarchy, NXGraph):
             the target given by `mapping` is not a valid homomorphism.
 
         """
+        self._apply_pending()
         if source not in self.nodes():
             raise HierarchyError(
                 "Node '{}' is not defined in the hierarchy!".format(source))
@@ -315,14 +335,11 @@ class NXHierarchy(Hierarchy, NXGraph):
             )
 
         # check no cycles are produced
-        self.add_edge(source, target)
-        if not nx.is_directed_acyclic_graph(self._graph):
-            self.remove_edge(source, target)
+        if nx.has_path(self._graph, target, source):
             raise HierarchyError(
                 "Edge '{}->{}' creates a cycle in the hierarchy!".format(
                     source, target)
             )
-        self.remove_edge(source, target)
 
         # check if the homomorphism is valid
         check_homomorphism(
@@ -331,9 +348,13 @@ class NXHierarchy(Hierarchy, NXGraph):
             mapping,
         )
 
-        # check if newly created path commutes with existing shortest paths
-        self._check_consistency(source, target, mapping)
+        # check if newly created paths commute with existing paths
+        if self._deferred_typings is None:
+            self._check_consistency(source, target, mapping)
+        else:
+            self._deferred_typings.append((source, target))
 
+        self._invalidate_typings(nodes=[source, target])
         self.add_edge(source, target)
         if attrs is not None:
             normalize_attrs(attrs)
@@ -383,6 +404,7 @@ class NXHierarchy(Hierarchy, NXGraph):
                 * some node ids specified in `relation` are not found in the
                 `left`/`right` graph.
         """
+        self._apply_pending()
         if left not in self.nodes():
             raise HierarchyError(
                 "Node '{}' is not defined in the hierarchy!".format(left))
@@ -442,6 +464,7 @@ class NXHierarchy(Hierarchy, NXGraph):
         }
         self.relation_edges.update({(left, right): rel_ab_dict})
         self.relation_edges.update({(right, left): rel_ba_dict})
+        self._record_relation_change(left, right)
         return
 
     def remove_graph(self, graph_id, reconnect=False):
@@ -478,10 +501,13 @@ class NXHierarchy(Hierarchy, NXGraph):
 
     def remove_typing(self, s, t):
         """Remove a typing from the hierarchy."""
+        self._apply_pending()
+        self._invalidate_typings(edges=[(s, t)])
         self.remove_edge(s, t)
 
     def remove_relation(self, left, right):
         """Remove a relation from the hierarchy."""
+        self._apply_pending()
         if (left, right) not in self.relations() and\
            (right, left) not in self.relations():
             raise HierarchyError(
@@ -490,6 +516,7 @@ class NXHierarchy(Hierarchy, NXGraph):
             )
         del self.relation_edges[left, right]
         del self.relation_edges[right, left]
+        self._record_relation_change(left, right)
 
     def bfs_tree(self, graph, reverse=False):
         """BFS tree from the graph to all other reachable graphs."""
@@ -564,6 +591,7 @@ class NXHierarchy(Hierarchy, NXGraph):
         new_graph_id : hashable
             New graph id to assign to this graph
         """
+        self._apply_pending()
         self.relabel_node(graph_id, new_graph_id)
 
     def relabel_graphs(self, mapping):
@@ -580,6 +608,7 @@ class NXHierarchy(Hierarchy, NXGraph):
         ReGraphError
             If new id's do not define a set of distinct graph id's.
         """
+        self._apply_pending()
         unique_names = set(mapping.values())
         if len(unique_names) != len(self.nodes()):
             raise ReGraphError(
@@ -603,89 +632,220 @@ class NXHierarchy(Hierarchy, NXGraph):
         return
 
     def _check_consistency(self, source, target, mapping=None):
-        all_paths = dict(nx.all_pairs_shortest_path(self._graph))
+        """Check that paths via a new typing commute with existing paths.
 
-        paths_to_source = {}
-        paths_from_target = {}
-        for s in self.nodes():
-            if source in all_paths[s].keys():
-                paths_to_source[s] = all_paths[s][source]
-            if s == target:
-                for key in all_paths[target].keys():
-                    paths_from_target[key] = all_paths[target][key]
-
-        for s in paths_to_source.keys():
-            if self.is_rule(paths_to_source[s][0]):
-                for t in paths_from_target.keys():
-                    # find homomorphism from s to t via new path
-                    if s == source:
-                        raise HierarchyError(
-                            "Found a rule typing some node in the self!"
-                        )
-                    new_lhs_h, new_rhs_h = self.compose_path_typing(
-                        paths_to_source[s])
-                    new_lhs_h = compose(new_lhs_h, mapping)
-                    new_rhs_h = compose(new_rhs_h, mapping)
-
-                    if t != target:
-                        new_lhs_h = compose(
-                            new_lhs_h,
-                            self.compose_path_typing(paths_from_target[t])
-                        )
-                        new_rhs_h = compose(
-                            new_rhs_h,
-                            self.compose_path_typing(paths_from_target[t]),
-                        )
-                    try:
-                        # find homomorphisms from s to t via other paths
-                        s_t_paths = nx.all_shortest_paths(self._graph, s, t)
-                        for path in s_t_paths:
-                            lhs_h, rhs_h = self.compose_path_typing(path)
-                            if lhs_h != new_lhs_h:
-                                raise HierarchyError(
-                                    "Invalid lhs typing: homomorphism does "
-                                    "not commute with an existing " +
-                                    "path from '{}' to '{}'!".format(s, t)
-                                )
-                            if rhs_h != new_rhs_h:
-                                raise HierarchyError(
-                                    "Invalid rhs typing: homomorphism does "
-                                    "not commute with an existing " +
-                                    "path from '{}' to '{}'!".format(s, t)
-                                )
-                    except(nx.NetworkXNoPath):
-                        pass
+        The new typing `source->target` creates paths from the ancestors
+        of the source (and from the source itself) to the descendants
+        of the target (and to the target itself), only such pairs of
+        graphs connected by some existing path are checked.
+        """
+        if mapping is None:
+            mapping = dict()
+        descendants = nx.descendants(self._graph, target)
+        descendants.add(target)
+
+        # typings of the source via the new edge
+        new_typings = dict()
+        for t in descendants:
+            if t == target:
+                new_typings[t] = mapping
             else:
-                for t in paths_from_target.keys():
-                    # find homomorphism from s to t via new path
-                    if s != source:
-                        new_homomorphism = self.compose_path_typing(
-                            paths_to_source[s])
-                    else:
-                        new_homomorphism = dict([(key, key)
-                                                 for key, _ in mapping.items()])
-                    new_homomorphism = compose(
-                        new_homomorphism, mapping)
-                    if t != target:
-                        new_homomorphism = compose(
-                            new_homomorphism,
-                            self.compose_path_typing(paths_from_target[t])
-                        )
+                new_typings[t] = compose(
+                    mapping, self._path_typing(target, t))
+
+        ancestors = nx.ancestors(self._graph, source)
+        ancestors.add(source)
+        for s in ancestors:
+            targets = descendants.intersection(
+                nx.descendants(self._graph, s))
+            if len(targets) == 0:
+                continue
+            if s != source:
+                s_source = self._path_typing(s, source)
+            for t in targets:
+                if s == source:
+                    new_typing = new_typings[t]
+                elif self.is_rule(s):
+                    new_typing = tuple(
+                        compose(h, new_typings[t]) for h in s_source)
+                else:
+                    new_typing = compose(s_source, new_typings[t])
+                if self._path_typing(s, t) != new_typing:
+                    raise HierarchyError(
+                        "Homomorphism does not commute with an " +
+                        "existing path from '{}' to '{}'!".format(s, t)
+                    )
 
-                    # find homomorphisms from s to t via other paths
-                    s_t_paths = nx.all_shortest_paths(self._graph, s, t)
+    def _check_paths_commute(self, source):
+        """Check that all the paths from the source commute."""
+        descendants = nx.descendants(self._graph, source)
+        descendants.add(source)
+        subgraph = self._graph.subgraph(descendants)
+        typings = dict()
+        for node in nx.topological_sort(subgraph):
+            for pred in subgraph.predecessors(node):
+                if pred == source:
+                    typing = self._path_typing(source, node)
+                elif self.is_rule(source):
+                    typing = tuple(
+                        compose(h, self.get_typing(pred, node))
+                        for h in typings[pred])
+                else:
+                    typing = compose(
+                        typings[pred], self.get_typing(pred, node))
+                if node not in typings:
+                    typings[node] = typing
+                elif typings[node] != typing:
+                    raise HierarchyError(
+                        "Homomorphism does not commute with an " +
+                        "existing path from '{}' to '{}'!".format(
+                            source, node)
+                    )
+
+    @contextmanager
+    def defer_checks(self):
+        """Context deferring the checks of commutativity of typings.
+
+        Inside the context, `add_typing` does not check that the paths
+        created by new typings commute with the existing paths. The
+        check is performed once at the exit of the context for all
+        the graphs from which the new typings are reachable. Nested
+        contexts are checked at the exit of the outermost one.
+
+        Raises
+        ------
+        HierarchyError
+            If some paths do not commute at the exit of the context,
+            the typings added inside the context are then removed
+
+        Examples
+        --------
+        >>> with hierarchy.defer_checks():
+        ...     hierarchy.add_typing("G1", "T", g1_t)
+        ...     hierarchy.add_typing("G2", "T", g2_t)
+        """
+        if self._deferred_typings is not None:
+            yield
+            return
+        self._deferred_typings = []
+        try:
+            yield
+            deferred = self._deferred_typings
+        finally:
+            self._deferred_typings = None
+
+        deferred = [(s, t) for s, t in deferred if (s, t) in self.edges()]
+        sources = set()
+        for s, _ in deferred:
+            if s not in sources:
+                sources.add(s)
+                sources.update(nx.ancestors(self._graph, s))
+        try:
+            for s in sources:
+                self._check_paths_commute(s)
+        except HierarchyError:
+            for s, t in deferred:
+                self.remove_typing(s, t)
+            raise
+
+    def add_typings_from(self, typings):
+        """Add typings to the hierarchy.
+
+        The typings are inserted at once and then validated in a single
+        pass: the homomorphisms are checked one by one, the absence of
+        cycles is checked once and the commutativity of paths is
+        checked once for all the graphs from which the new typings
+        are reachable. If some typings are invalid, none of them is
+        added and the raised error reports all of them.
+
+        Parameters
+        ----------
+        typings : iterable
+            Typings given by tuples `(source, target, mapping)` or
+            `(source, target, mapping, attrs)`
+
+        Raises
+        ------
+        HierarchyError
+            If some of the typings cannot be added (see `add_typing`)
+        """
+        self._apply_pending()
+        errors = []
+        valid = []
+        edges = set()
+        for typing_data in typings:
+            source, target, mapping = typing_data[:3]
+            attrs = typing_data[3] if len(typing_data) > 3 else None
+            if mapping is None:
+                mapping = dict()
+            if source not in self.nodes() or target not in self.nodes():
+                errors.append(
+                    "'{}->{}': graph is not defined in the hierarchy".format(
+                        source, target))
+            elif (source, target) in self.edges() or\
+                    (source, target) in edges:
+                errors.append(
+                    "'{}->{}': edge already exists".format(source, target))
+            elif not self.is_graph(source) or not self.is_graph(target):
+                errors.append(
+                    "'{}->{}': source and target of a typing should "
+                    "be graphs".format(source, target))
+            else:
+                try:
+                    check_homomorphism(
+                        self.get_graph(source),
+                        self.get_graph(target),
+                        mapping)
+                    valid.append((source, target, mapping, attrs))
+                    edges.add((source, target))
+                except InvalidHomomorphism as e:
+                    errors.append("'{}->{}': {}".format(source, target, e))
+
+        for source, target, mapping, attrs in valid:
+            self._invalidate_typings(nodes=[source, target])
+            self.add_edge(source, target)
+            if attrs is not None:
+                normalize_attrs(attrs)
+            else:
+                attrs = dict()
+            self.set_edge(
+                source, target, {
+                    "mapping": mapping,
+                    "attrs": attrs
+                }, normalize=False)
+
+        if not nx.is_directed_acyclic_graph(self._graph):
+            for source, target in edges:
+                if nx.has_path(self._graph, target, source):
+                    errors.append(
+                        "'{}->{}': edge creates a cycle".format(
+                            source, target))
+        elif self._deferred_typings is not None:
+            self._deferred_typings.extend(edges)
+        else:
+            # check the graphs from which the new typings are reachable,
+            # descendants first, the ancestors of a graph whose paths do
+            # not commute are not reported
+            sources = set()
+            for source, _ in edges:
+                if source not in sources:
+                    sources.add(source)
+                    sources.update(nx.ancestors(self._graph, source))
+            failed = set()
+            subgraph = self._graph.subgraph(sources)
+            for source in reversed(list(nx.topological_sort(subgraph))):
+                if failed.isdisjoint(nx.descendants(subgraph, source)):
                     try:
-                        # check only the first path
-                        for path in s_t_paths:
-                            path_homomorphism = self.compose_path_typing(path)
-                            if path_homomorphism != new_homomorphism:
-                                raise HierarchyError(
-                                    "Homomorphism does not commute with an " +
-                                    "existing path from '{}' to '{}'!".format(
-                                        s, t)
-                                )
-                    except(nx.NetworkXNoPath):
-                            pass
+                        self._check_paths_commute(source)
+                    except HierarchyError as e:
+                        errors.append(str(e))
+                        failed.add(source)
+
+        if len(errors) > 0:
+            for source, target in edges:
+                self.remove_typing(source, target)
+            raise HierarchyError(
+                "Invalid typings:\n" + "\n".join(errors))
 
     def _propagate_clone(self, origin_id, node_id, p_origin_m,
                          origin_m_origin, p_typing,
@@ -967,10 +1127,72 @@ class NXHierarchy(Hierarchy, NXGraph):
     def _get_rule_projections(self, graph_id, rule, instance, rhs_typing):
         pass
 
+    def _lift_rule(self, graph_id, origin_id, rule, instance,
+                   origin_typing):
+        """Compute the canonical lifting of a rule (memoised)."""
+        return self._cached_rule_result(
+            "lifting", graph_id, origin_id, rule, instance, origin_typing,
+            lambda: Hierarchy._lift_rule(
+                self, graph_id, origin_id, rule, instance, origin_typing))
+
+    def _project_rule(self, graph_id, rule, instance, origin_typing):
+        """Compute the canonical projection of a rule (memoised)."""
+        return self._cached_rule_result(
+            "projection", graph_id, None, rule, instance,
+            compose(instance, origin_typing),
+            lambda: Hierarchy._project_rule(
+                self, graph_id, rule, instance, origin_typing))
+
+    def _cached_rule_result(self, kind, graph_id, origin_id, rule,
+                            instance, typing, compute):
+        """Get a copy of a cached lifting or projection of a rule.
+
+        An entry is reused if the graphs it was computed from are
+        the same objects, they were not modified since, and the
+        typing of the graph by the origin (for liftings) or of the
+        left-hand side of the rule by the graph (for projections),
+        composed along the paths of the hierarchy, is unchanged.
+
+        The entries are keyed by the exact structure of the rule
+        (including the names of its nodes) and not by its fingerprint:
+        the cached liftings and projections map to the nodes of the
+        rule, so they can only be reused by the rules with the same
+        names of nodes.
+        """
+        graphs = [self.get_graph(graph_id)]
+        if origin_id is not None:
+            graphs.append(self.get_graph(origin_id))
+        stamp = [(g, g._revision) for g in graphs]
+        key = (kind, graph_id, origin_id, _rule_key(rule),
+               frozenset(instance.items()))
+        entry = self._rule_cache.get(key)
+        if entry is None or entry[1] != typing or any(
+                g is not old_g or r != old_r
+                for (g, r), (old_g, old_r) in zip(stamp, entry[0])):
+            entry = (stamp, dict(typing), compute())
+            if self.rule_cache_size > 0:
+                if len(self._rule_cache) >= self.rule_cache_size:
+                    del self._rule_cache[next(iter(self._rule_cache))]
+                self._rule_cache[key] = entry
+        return copy.deepcopy(entry[2])
+
+    def clear_rule_cache(self):
+        """Clear the cache of liftings and projections of rules."""
+        self._rule_cache = dict()
+
     # Implementation of the NXHierarchy-specific methods
 
-    def __init__(self, attrs=None):
-        """Initialize in-memory hierarchy."""
+    def __init__(self, attrs=None, lazy=False):
+        """Initialize in-memory hierarchy.
+
+        Parameters
+        ----------
+        attrs : dict, optional
+            Attributes of the hierarchy
+        lazy : bool, optional
+            If True, changes of rewriting are propagated on demand
+            (see `rewrite`)
+        """
         NXGraph.__init__(self)
         if attrs is None:
             attrs = dict()
@@ -979,6 +1201,312 @@ class NXHierarchy(Hierarchy, NXGraph):
         self.rel_dict_factory = reldf = self.rel_dict_factory
         self.relation_edges = reldf()
 
+        # Cache of typings composed along paths: keys are pairs
+        # (source, target), values are pairs (path, typing); cached
+        # pairs are indexed by the edges and the nodes of their paths
+        self._typing_cache = dict()
+        self._typing_cache_edges = dict()
+        self._typing_cache_nodes = dict()
+        self._typing_cache_stats = {
+            "hits": 0, "misses": 0, "invalidations": 0}
+
+        # Cache of canonical liftings and projections of rules (see
+        # `_lift_rule` and `_project_rule`): keys are tuples (kind,
+        # graph, origin, rule key, instance), values are the graphs and
+        # the typing from which the entry was computed and the result
+        self._rule_cache = dict()
+
+        # Typings whose checks are deferred (see `defer_checks`)
+        self._deferred_typings = None
+
+        # Rewrites whose changes are not propagated yet: keys are ids
+        # of the rewritten graphs (see `rewrite`)
+        self.lazy = lazy
+        self._pending = dict()
+        self._applying_pending = False
+
+        # Journal of changes (see `changes_since`): keys are pairs
+        # (kind, element) ordered by their versions, values are the
+        # versions of the last changes of the elements; revisions of
+        # the graphs at their last recorded changes detect in-place
+        # modifications of the graph objects
+        self._version = 0
+        self._journal = dict()
+        self._journal_revisions = dict()
+
+    def rewrite(self, graph_id, rule, instance,
+                p_typing=None, rhs_typing=None, strict=False,
+                executor=None):
+        """Rewrite and propagate the changes backward & forward.
+
+        See `regraph.hierarchies.Hierarchy.rewrite` for the parameters.
+        If the hierarchy is lazy and no typing by the interface or of
+        the rhs is given (and rewriting is not strict), the changes are
+        not propagated immediately: the rule is applied to a copy of the
+        graph and recorded. The recorded rewrite is applied and
+        propagated when the graph, a graph it is typed by or typing
+        it, or a typing or relation of these graphs is accessed (by
+        `get_graph`, `get_typing`, `get_relation`, `find_matching`,
+        `to_json`, etc.), when the hierarchy is modified, or on
+        `apply_pending`. Consecutive rewrites of the same graph are
+        composed (see `regraph.rules.compose_rules`) and propagated
+        once, the nodes of the graph are then named as in the
+        rhs instances returned by the lazy rewrites.
+
+        Returns
+        -------
+        rhs_instance : dict
+            Instance of the rhs of the rule in the rewritten graph
+        """
+        if not self.lazy or p_typing or rhs_typing or strict:
+            self._apply_pending()
+            return Hierarchy.rewrite(
+                self, graph_id, rule, instance, p_typing, rhs_typing,
+                strict, executor)
+
+        if instance is None:
+            instance = {n: n for n in rule.lhs.nodes()}
+
+        pending = self._pending.get(graph_id)
+        if pending is None:
+            affected = nx.ancestors(self._graph, graph_id)
+            affected.update(nx.descendants(self._graph, graph_id))
+            affected.add(graph_id)
+            self._apply_pending(affected)
+            graph = copy.deepcopy(self.get_graph(graph_id))
+            rhs_instance = graph.rewrite(rule, instance)
+            self._pending[graph_id] = {
+                "graph": graph,
+                "affected": affected,
+                "rule": copy.deepcopy(rule),
+                "lhs_instance": dict(instance),
+                "rhs_instance": dict(rhs_instance),
+                "executor": executor
+            }
+        else:
+            rhs_instance = pending["graph"].rewrite(rule, instance)
+            (pending["rule"],
+             pending["lhs_instance"],
+             pending["rhs_instance"]) = compose_rules(
+                pending["rule"], pending["lhs_instance"],
+                pending["rhs_instance"], rule, instance, rhs_instance)
+            pending["executor"] = executor
+        return dict(rhs_instance)
+
+    def pending_rewrites(self):
+        """Return the ids of graphs rewritten lazily (see `rewrite`)."""
+        return list(self._pending.keys())
+
+    def apply_pending(self):
+        """Apply and propagate all the lazy rewrites (see `rewrite`)."""
+        self._apply_pending()
+
+    def _apply_pending(self, graphs=None):
+        """Apply the lazy rewrites affecting the graphs."""
+        if len(self._pending) == 0 or self._applying_pending:
+            return
+        for graph_id, pending in list(self._pending.items()):
+            if graphs is not None and pending["affected"].isdisjoint(graphs):
+                continue
+            del self._pending[graph_id]
+            self._applying_pending = True
+            try:
+                rhs_instance = Hierarchy.rewrite(
+                    self, graph_id, pending["rule"],
+                    pending["lhs_instance"],
+                    executor=pending["executor"])
+            finally:
+                self._applying_pending = False
+
+            # Name the nodes as in the lazily rewritten graph
+            renaming = {
+                rhs_instance[n]: pending["rhs_instance"][n]
+                for n in pending["rule"].rhs.nodes()
+                if rhs_instance[n] != pending["rhs_instance"][n]
+            }
+            if len(renaming) > 0:
+                graph = self.get_graph(graph_id)
+                used_ids = set(graph.nodes())
+                used_ids.update(renaming.values())
+                temp_ids = dict()
+                for node in renaming:
+                    temp_ids[node] = generate_new_id(used_ids, node)
+                    used_ids.add(temp_ids[node])
+                    self.relabel_graph_node(graph_id, node, temp_ids[node])
+                for node, new_name in renaming.items():
+                    self.relabel_graph_node(
+                        graph_id, temp_ids[node], new_name)
+
+    def typing_cache_info(self):
+        """Get statistics of the cache of composed typings.
+
+        Typings between non-adjacent graphs (see `get_typing`) are
+        composed along the shortest path once and cached. A cached
+        typing is invalidated when some typing along its path is
+        updated or removed, when a graph on its path is updated,
+        relabeled or removed, or when a typing is added to one of
+        the graphs of its path.
+
+        Returns
+        -------
+        info : dict
+            Dictionary with the numbers of cache hits (`"hits"`),
+            misses (`"misses"`), invalidated typings
+            (`"invalidations"`) and the number of currently cached
+            typings (`"size"`)
+        """
+        info = dict(self._typing_cache_stats)
+        info["size"] = len(self._typing_cache)
+        return info
+
+    def clear_typing_cache(self):
+        """Remove all the typings from the cache of composed typings."""
+        self._invalidate_typings(nodes=list(self._typing_cache_nodes))
+
+    def current_version(self):
+        """Get the version of the last change of the hierarchy.
+
+        See `changes_since`.
+        """
+        self._apply_pending()
+        self._sync_journal()
+        return self._version
+
+    def changes_since(self, version):
+        """Get the elements of the hierarchy changed since the version.
+
+        Every change of the hierarchy is recorded in its journal with
+        a new version (an increasing integer): additions, removals
+        and updates of graphs, rules, typings and relations, including
+        the changes made by rewriting and propagation and in-place
+        modifications of the graph objects.
+
+        Parameters
+        ----------
+        version : int
+            Version obtained from `current_version` (0 for all
+            the changes since the creation of the hierarchy)
+
+        Returns
+        -------
+        changes : dict
+            Dictionary whose keys are `"graphs"`, `"rules"`,
+            `"typings"` (typings of graphs and rules) and
+            `"relations"` (both orientations of every relation) and
+            whose values are dictionaries from the ids of the elements
+            changed after `version` (including removed elements) to
+            the versions of their last changes
+        """
+        self._apply_pending()
+        self._sync_journal()
+        changes = {
+            "graphs": dict(),
+            "rules": dict(),
+            "typings": dict(),
+            "relations": dict()
+        }
+        for (kind, key), key_version in reversed(self._journal.items()):
+            if key_version <= version:
+                break
+            changes[kind][key] = key_version
+        return changes
+
+    def _record_change(self, kind, key):
+        """Record the change of an element in the journal."""
+        with self._locked():
+            self._version += 1
+            self._journal.pop((kind, key), None)
+            self._journal[kind, key] = self._version
+
+    def _record_node_change(self, node_id):
+        """Record the change of a graph or a rule in the journal."""
+        node_data = self.get_node(node_id)
+        if "rule" in node_data:
+            self._record_change("rules", node_id)
+        elif "graph" in node_data:
+            self._record_change("graphs", node_id)
+            self._journal_revisions[node_id] = node_data["graph"]._revision
+
+    def _record_relation_change(self, left, right):
+        """Record the change of a relation in the journal."""
+        self._record_change("relations", (left, right))
+        self._record_change("relations", (right, left))
+
+    def _sync_journal(self):
+        """Record the changes of the graphs modified in-place."""
+        with self._locked():
+            for graph_id, node_data in self._graph.nodes(data=True):
+                if "graph" in node_data and\
+                        node_data["graph"]._revision !=\
+                        self._journal_revisions.get(graph_id):
+                    self._record_node_change(graph_id)
+
+    def _path_typing(self, source, target):
+        """Get the typing from source to target without copying it.
+
+        If the source is a rule, the triple of typings of its lhs,
+        p and rhs is returned. Typings between non-adjacent nodes
+        are composed along the shortest path once and cached.
+        """
+        with self._locked():
+            if (source, target) in self.edges():
+                if self.is_graph(source):
+                    return self.get_edge(source, target)["mapping"]
+                return self.get_rule_typing(source, target)
+            cached = self._typing_cache.get((source, target))
+            if cached is not None:
+                self._typing_cache_stats["hits"] += 1
+                return cached[1]
+            self._typing_cache_stats["misses"] += 1
+            try:
+                path = nx.shortest_path(self._graph, source, target)
+            except:
+                raise HierarchyError(
+                    "No path from '{}' to '{}' in the hierarchy".format(
+                        source, target))
+            typing = self.compose_path_typing(path)
+            self._cache_typing(path, typing)
+            return typing
+
+    def _locked(self):
+        """Get the lock of the hierarchy used during propagation."""
+        if self._propagation_lock is None:
+            return nullcontext()
+        return self._propagation_lock
+
+    def _cache_typing(self, path, typing):
+        """Add a typing composed along the path to the cache."""
+        key = (path[0], path[-1])
+        self._typing_cache[key] = (path, typing)
+        for i in range(1, len(path)):
+            self._typing_cache_edges.setdefault(
+                (path[i - 1], path[i]), set()).add(key)
+        for node in path:
+            self._typing_cache_nodes.setdefault(node, set()).add(key)
+
+    def _invalidate_typings(self, edges=None, nodes=None):
+        """Invalidate the cached typings whose paths contain edges or nodes."""
+        with self._locked():
+            keys = set()
+            if edges is not None:
+                for edge in edges:
+                    keys.update(self._typing_cache_edges.get(edge, ()))
+            if nodes is not None:
+                for node in nodes:
+                    keys.update(self._typing_cache_nodes.get(node, ()))
+            for key in keys:
+                path, _ = self._typing_cache.pop(key)
+                for i in range(1, len(path)):
+                    edge = (path[i - 1], path[i])
+                    self._typing_cache_edges[edge].discard(key)
+                    if len(self._typing_cache_edges[edge]) == 0:
+                        del self._typing_cache_edges[edge]
+                for node in path:
+                    self._typing_cache_nodes[node].discard(key)
+                    if len(self._typing_cache_nodes[node]) == 0:
+                        del self._typing_cache_nodes[node]
+            self._typing_cache_stats["invalidations"] += len(keys)
+
     def rules(self, data=True):
         """Return a list of rules in the hierarchy."""
         if data:
@@ -1101,6 +1629,7 @@ class NXHierarchy(Hierarchy, NXGraph):
             the target given by `lhs(rhs)_mapping` is not a valid homomorphism.
 
         """
+        self._apply_pending()
         if rule_id not in self.nodes():
             raise HierarchyError(
                 "Node '{}' is not defined in the hierarchy!".format(rule_id))
@@ -1163,6 +1692,7 @@ class NXHierarchy(Hierarchy, NXGraph):
         # check if newly created path commutes with existing shortest paths
         self._check_rule_typing(rule_id, graph_id, lhs_mapping, new_rhs_mapping)
 
+        self._invalidate_typings(nodes=[rule_id, graph_id])
         self.add_edge(rule_id, graph_id)
         if attrs is not None:
             normalize_attrs(attrs)
@@ -1182,6 +1712,7 @@ class NXHierarchy(Hierarchy, NXGraph):
 
     def get_rule_typing(self, rule_id, graph_id):
         """Get typing dict of `source` by `target` (`source` is rule)."""
+        self._apply_pending([rule_id, graph_id])
         if not self.is_rule(rule_id):
             raise HierarchyError("Hierarchy node '{}' is not a rule".format(
                 rule_id))
@@ -1211,6 +1742,31 @@ class NXHierarchy(Hierarchy, NXGraph):
         """Test if a hierarchy edge is a rule typing."""
         return "lhs_mapping" in self.get_edge(s, t)
 
+    def add_node(self, node_id, attrs=None):
+        """Add a node to the hierarchy and record it in the journal."""
+        NXGraph.add_node(self, node_id, attrs)
+        self._record_node_change(node_id)
+
+    def update_node_attrs(self, node_id, attrs, normalize=True):
+        """Update a node of the hierarchy and record it in the journal."""
+        NXGraph.update_node_attrs(self, node_id, attrs, normalize)
+        self._record_node_change(node_id)
+
+    def add_edge(self, s, t, attrs=None, **attr):
+        """Add an edge to the hierarchy and record it in the journal."""
+        NXGraph.add_edge(self, s, t, attrs, **attr)
+        self._record_change("typings", (s, t))
+
+    def remove_edge(self, s, t):
+        """Remove an edge of the hierarchy and record it in the journal."""
+        NXGraph.remove_edge(self, s, t)
+        self._record_change("typings", (s, t))
+
+    def update_edge_attrs(self, s, t, attrs, normalize=True):
+        """Update an edge of the hierarchy and record it in the journal."""
+        NXGraph.update_edge_attrs(self, s, t, attrs, normalize)
+        self._record_change("typings", (s, t))
+
     def remove_node(self, node_id, reconnect=False):
         """Remove node from the hierarchy.
 
@@ -1237,6 +1793,7 @@ class NXHierarchy(Hierarchy, NXGraph):
         HierarchyError
             If node with `node_id` is not defined in the hierarchy
         """
+        self._apply_pending()
         if node_id not in self.nodes():
             raise HierarchyError(
                 "Node '{}'' is not defined in the hierarchy!".format(node_id))
@@ -1276,12 +1833,19 @@ class NXHierarchy(Hierarchy, NXGraph):
                             self.add_typing(
                                 source, target, mapping)
 
+        self._invalidate_typings(nodes=[node_id])
+        self._record_node_change(node_id)
+        for edge in list(self._graph.in_edges(node_id)) +\
+                list(self._graph.out_edges(node_id)):
+            self._record_change("typings", edge)
+        self._journal_revisions.pop(node_id, None)
         nx.DiGraph.remove_node(self._graph, node_id)
 
         # Update dicts representing relations
-        for u, v in self.relation_edges.keys():
+        for u, v in list(self.relation_edges.keys()):
             if u == node_id or v == node_id:
                 del self.relation_edges[u, v]
+                self._record_change("relations", (u, v))
 
         return
 
@@ -1317,13 +1881,22 @@ class NXHierarchy(Hierarchy, NXGraph):
                 "Use, 'remove_graph' method instead")
         self.remove_node(rule_id, reconnect)
 
-    def compose_path_typing(self, path):
+    def _scoped_typing(self, source, target):
+        """Get a copy of the typing between two graphs (cached)."""
+        return dict(self.get_typing(source, target))
+
+    def compose_path_typing(self, path, dense=False):
         """Compose homomorphisms along the path.
 
         Parameters
         ----------
         path : list
             List of nodes of the hierarchy forming a path
+        dense : bool, optional
+            If True, nodes of the graphs along the path are interned
+            to integers and typings are composed as integer arrays
+            (see `regraph.dense`), which is faster for long paths
+            of large graphs
 
         Returns
         -------
@@ -1345,6 +1918,8 @@ class NXHierarchy(Hierarchy, NXGraph):
             from the right-hand side of the source rule
             of the path by the nodes of the target graph
         """
+        if dense:
+            return self._compose_path_typing_dense(path)
         s = path[0]
         t = path[1]
         if self.is_graph(s):
@@ -1377,11 +1952,59 @@ class NXHierarchy(Hierarchy, NXGraph):
 
             return (lhs_typing, p_typing, rhs_typing)
 
+    def _compose_path_typing_dense(self, path):
+        """Compose homomorphisms along the path as integer arrays."""
+        indices = {
+            g: NodeIndex.from_graph(self.get_graph(g))
+            for g in path[1:]
+        }
+        tail = None
+        for i in range(2, len(path)):
+            s = path[i - 1]
+            t = path[i]
+            h = DenseHomomorphism.from_dict(
+                self.get_typing(s, t), indices[s], indices[t])
+            tail = h if tail is None else tail.compose(h)
+
+        def _compose_with_tail(typing):
+            head = DenseHomomorphism.from_dict(
+                typing, target_index=indices[path[1]])
+            if tail is not None:
+                head = head.compose(tail)
+            return head.to_dict()
+
+        s = path[0]
+        t = path[1]
+        if self.is_graph(s):
+            return _compose_with_tail(self.get_typing(s, t))
+        else:
+            return tuple(
+                _compose_with_tail(typing)
+                for typing in self.get_rule_typing(s, t))
+
     @classmethod
     def copy(cls, hierarchy):
         """Copy the hierarchy object."""
         return copy.deepcopy(hierarchy)
 
+    def snapshot(self):
+        """Take a read-only snapshot of the hierarchy.
+
+        The snapshot shares the graph objects and the typing
+        dictionaries with the hierarchy: a graph is copied only when
+        it is modified in the hierarchy for the first time after
+        the snapshot was taken, typings are never modified in-place
+        (updates of a typing replace its dictionary). Graphs, typings
+        and relations returned by the snapshot should not be modified.
+
+        Returns
+        -------
+        snapshot : NXHierarchySnapshot
+            Immutable view of the current state of the hierarchy
+        """
+        self._apply_pending()
+        return NXHierarchySnapshot(self)
+
     def find_rule_matching(self, graph_id, rule_id):
         """Find matching of a rule `rule_id` form the hierarchy."""
         if self.is_rule(graph_id):
@@ -1411,6 +2034,7 @@ class NXHierarchy(Hierarchy, NXGraph):
 
     def _update_graph(self, graph_id, graph_obj):
         """Update the graph object stored at the node of with id 'graph_id'."""
+        self._invalidate_typings(nodes=[graph_id])
         self.set_node_attrs(
             graph_id, {
                 "graph": graph_obj,
@@ -1421,6 +2045,7 @@ class NXHierarchy(Hierarchy, NXGraph):
 
     def _update_mapping(self, source, target, mapping):
         """Update the mapping dictionary from source to target."""
+        self._invalidate_typings(edges=[(source, target)])
         if self.is_graph(source):
             self.update_edge_attrs(
                 source, target,
@@ -1435,6 +2060,20 @@ class NXHierarchy(Hierarchy, NXGraph):
             self._update_rule_homomorphism(
                 source, target, lhs, rhs)
 
+    def _update_mappings(self, mappings):
+        """Update the mapping dictionaries of several typings."""
+        with self._locked():
+            self._invalidate_typings(edges=list(mappings.keys()))
+            for (source, target), mapping in mappings.items():
+                self.update_edge_attrs(
+                    source, target,
+                    {
+                        "mapping": mapping,
+                        "attrs": self.get_typing_attrs(source, target)
+                    },
+                    normalize=False
+                )
+
     def _update_relation(self, left, right, relation):
         """Update the relation dictionaries (left and right)."""
         old_attrs = copy.deepcopy(self.relation_edges[left, right]["attrs"])
@@ -1453,6 +2092,7 @@ class NXHierarchy(Hierarchy, NXGraph):
         )
 
     def _update_rule_homomorphism(self, source, target, lhs_h, rhs_h):
+        self._invalidate_typings(edges=[(source, target)])
         self.update_edge_attrs(
             source, target,
             {
@@ -1494,52 +2134,56 @@ class NXHierarchy(Hierarchy, NXGraph):
 
     def _restrictive_update_incident_homs(self, node_id, g_m_g):
         """Update incident homomorphisms after a restrictive change."""
-        for suc in self.successors(node_id):
-            typing = self.get_typing(node_id, suc)
-            if self.is_graph(node_id):
-                self._update_mapping(node_id, suc, compose(g_m_g, typing))
-            else:
-                self._update_rule_homomorphism(
-                    node_id, suc,
-                    compose(g_m_g[0], typing[0]),
-                    compose(g_m_g[2], typing[1]))
+        with self._locked():
+            for suc in self.successors(node_id):
+                typing = self.get_typing(node_id, suc)
+                if self.is_graph(node_id):
+                    self._update_mapping(node_id, suc, compose(g_m_g, typing))
+                else:
+                    self._update_rule_homomorphism(
+                        node_id, suc,
+                        compose(g_m_g[0], typing[0]),
+                        compose(g_m_g[2], typing[1]))
 
     def _restrictive_update_incident_rels(self, graph_id, g_m_g):
         """Update incident relations after a restrictive change."""
-        if self.is_graph(graph_id):
-            for related_g in self.adjacent_relations(graph_id):
-                rel = self.get_relation(graph_id, related_g)
-                new_rel = dict()
+        with self._locked():
+            if self.is_graph(graph_id):
+                for related_g in self.adjacent_relations(graph_id):
+                    rel = self.get_relation(graph_id, related_g)
+                    new_rel = dict()
 
-                for node in self.get_graph(graph_id).nodes():
-                    old_node = g_m_g[node]
-                    if old_node in rel.keys():
-                        new_rel[node] = rel[old_node]
+                    for node in self.get_graph(graph_id).nodes():
+                        old_node = g_m_g[node]
+                        if old_node in rel.keys():
+                            new_rel[node] = rel[old_node]
 
-                self._update_relation(graph_id, related_g, new_rel)
+                    self._update_relation(graph_id, related_g, new_rel)
 
     def _expansive_update_incident_homs(self, graph_id, g_m_g_prime,
                                         pred_typings):
         """Update incident homomorphisms after an expansive change."""
-        for pred, typing in pred_typings.items():
-            if self.is_graph(pred):
-                self._update_mapping(
-                    pred, graph_id, compose(typing, g_m_g_prime))
-            else:
-                self._update_rule_homomorphism(
-                    pred, graph_id,
-                    compose(typing[0], g_m_g_prime),
-                    compose(typing[1], g_m_g_prime))
+        with self._locked():
+            for pred, typing in pred_typings.items():
+                if self.is_graph(pred):
+                    self._update_mapping(
+                        pred, graph_id, compose(typing, g_m_g_prime))
+                else:
+                    self._update_rule_homomorphism(
+                        pred, graph_id,
+                        compose(typing[0], g_m_g_prime),
+                        compose(typing[1], g_m_g_prime))
 
     def _expansive_update_incident_rels(self, graph_id, g_m_g_prime,
                                         adj_relations):
         """Update incident relations after an expansive change."""
-        for related_g in self.adjacent_relations(graph_id):
-            if self.is_graph(related_g):
-                super()._expansive_update_incident_rels(
-                    graph_id, g_m_g_prime, adj_relations)
-            else:
-                pass
+        with self._locked():
+            for related_g in self.adjacent_relations(graph_id):
+                if self.is_graph(related_g):
+                    super()._expansive_update_incident_rels(
+                        graph_id, g_m_g_prime, adj_relations)
+                else:
+                    pass
 
     def apply_rule(self, graph_id, rule_id, instance):
         """Apply rule from the hierarchy."""
@@ -1571,6 +2215,7 @@ class NXHierarchy(Hierarchy, NXGraph):
 
     def to_json(self, rename_nodes=None):
         """Convert hierarchy to its json representation."""
+        self._apply_pending()
         return super().to_json(rename_nodes)
 
     def _check_rule_typing(self, rule_id, graph_id, lhs_mapping, rhs_mapping):
@@ -1729,3 +2374,132 @@ class NXHierarchy(Hierarchy, NXGraph):
                 rhs_typing,
                 pred_m_origin_m_lhs)
             return (lhs_hom, rhs_hom)
+
+
+def _read_only(method_name):
+    def method(self, *args, **kwargs):
+        raise ReGraphError(
+            "Cannot call '{}': hierarchy snapshots are read-only".format(
+                method_name))
+    method.__name__ = method_name
+    method.__doc__ = "Not supported by snapshots (raises ReGraphError)."
+    return method
+
+
+class _SnapshotGraph(NXGraph):
+    """Read-only view of a graph of a hierarchy snapshot.
+
+    The view resolves the graph shared by the snapshot on every access
+    (the shared graph is replaced by its copy when it is modified in
+    the live hierarchy, see `NXGraph._share`) and wraps it in a frozen
+    NetworkX view. The methods modifying the graph raise `ReGraphError`,
+    copies of the view (`copy.deepcopy`, `NXGraph.copy`) are ordinary
+    modifiable graphs.
+    """
+
+    def __init__(self, snapshot, graph_id):
+        """Initialize a view of a graph of the snapshot."""
+        self._snapshot = snapshot
+        self._graph_id = graph_id
+
+    def _shared(self):
+        """Get the graph object currently shared by the snapshot."""
+        return self._snapshot._graph.nodes[self._graph_id]["graph"]
+
+    @property
+    def _graph(self):
+        return self._shared()._graph.copy(as_view=True)
+
+    @property
+    def _revision(self):
+        return self._shared()._revision
+
+    def __deepcopy__(self, memo):
+        """Copy the viewed graph."""
+        return copy.deepcopy(self._shared(), memo)
+
+    def __getstate__(self):
+        """Get the state of the viewed graph."""
+        return self._shared().__getstate__()
+
+    def __reduce__(self):
+        """Pickle the view as the viewed graph."""
+        return (copy.deepcopy, (self._shared(),))
+
+
+for _method_name in [
+        "add_node", "remove_node", "add_edge", "remove_edge",
+        "update_node_attrs", "update_edge_attrs"]:
+    setattr(_SnapshotGraph, _method_name, _read_only(_method_name))
+del _method_name
+
+
+class NXHierarchySnapshot(NXHierarchy):
+    """Class for read-only snapshots of in-memory hierarchies.
+
+    Snapshots are produced by `NXHierarchy.snapshot`. The skeleton of
+    the hierarchy, the attributes, the rules and the relations are
+    copied, while the graphs and the typings are shared with the live
+    hierarchy. A shared graph is replaced by its copy before it is
+    modified in the live hierarchy (see `NXGraph._share`). All the
+    methods modifying the hierarchy raise `ReGraphError`, the graphs
+    are returned as read-only views and the typings as read-only
+    mappings.
+    """
+
+    def __init__(self, hierarchy):
+        """Initialize a snapshot of the hierarchy."""
+        NXHierarchy.__init__(self, copy.deepcopy(hierarchy.attrs))
+        # the data dictionaries of nodes and edges are copied
+        # by the NetworkX graph, the values are shared
+        self._graph = hierarchy._graph.copy()
+        for node_id, node_data in self._graph.nodes(data=True):
+            node_data["attrs"] = copy.deepcopy(node_data["attrs"])
+            if "rule" in node_data:
+                node_data["rule"] = copy.deepcopy(node_data["rule"])
+            else:
+                node_data["graph"]._share(self, node_id)
+        for _, _, edge_data in self._graph.edges(data=True):
+            edge_data["attrs"] = copy.deepcopy(edge_data["attrs"])
+        self.relation_edges = copy.deepcopy(hierarchy.relation_edges)
+        hierarchy._sync_journal()
+        self._version = hierarchy._version
+        self._journal = dict(hierarchy._journal)
+        self._journal_revisions = dict(hierarchy._journal_revisions)
+
+    def _unshare(self, graph_id, graph, graph_copy):
+        """Replace the shared graph by its copy."""
+        node_data = self._graph.nodes[graph_id]
+        if node_data.get("graph") is graph:
+            node_data["graph"] = graph_copy
+
+    def snapshot(self):
+        """Snapshots are immutable: return the snapshot itself."""
+        return self
+
+    def get_graph(self, graph_id):
+        """Get a read-only view of a graph of the snapshot."""
+        NXHierarchy.get_graph(self, graph_id)
+        return _SnapshotGraph(self, graph_id)
+
+    def get_typing(self, source, target):
+        """Get a read-only typing (or a pair of typings of a rule)."""
+        typing = NXHierarchy.get_typing(self, source, target)
+        if isinstance(typing, tuple):
+            return tuple(MappingProxyType(t) for t in typing)
+        return MappingProxyType(typing)
+
+
+for _method_name in [
+        "add_node", "remove_node", "add_edge", "remove_edge",
+        "update_node_attrs", "update_edge_attrs",
+        "set_graph_attrs", "set_typing_attrs", "set_relation_attrs",
+        "set_node_relation", "add_graph", "add_empty_graph",
+        "add_graph_from_data", "add_graph_from_json", "add_typing",
+        "add_relation", "add_rule", "add_rule_typing", "remove_graph",
+        "remove_typing", "remove_relation", "remove_rule", "copy_graph",
+        "relabel_graph_node", "relabel_graph", "relabel_graphs",
+        "relabel_nodes", "duplicate_subgraph", "rewrite", "apply_rule",
+        "apply_rule_hierarchy"]:
+    setattr(NXHierarchySnapshot, _method_name, _read_only(_method_name))
+del _method_name
@@ -2,8 +2,11 @@
 import copy
 
 from regraph.backends.networkx.graphs import NXGraph
+from regraph.dense import compose_dense_chain, SparseRelation
+from regraph.overlay import OverlayGraph
 
 from regraph.utils import (keys_by_value,
+                           keys_by_values,
                            merge_attributes,
                            restrict_mapping,
                            dict_sub,
@@ -116,8 +119,24 @@ def check_homomorphism(source, target, dictionary, total=True):
     return True
 
 
-def compose_chain(chain):
-    """Compose a chain of homomorphisms."""
+def compose_chain(chain, dense=False):
+    """Compose a chain of homomorphisms.
+
+    Parameters
+    ----------
+    chain : list of dict
+        Homomorphisms to compose
+    dense : bool, optional
+        If True, homomorphisms are converted to integer arrays
+        (see `regraph.dense`) and composed by array indexing,
+        which is faster for long chains of large homomorphisms
+
+    Returns
+    -------
+    homomorphism : dict
+    """
+    if dense:
+        return compose_dense_chain(chain).to_dict()
     homomorphism = chain[0]
     for i in range(1, len(chain)):
         homomorphism = compose(
@@ -205,8 +224,29 @@ def pullback(b, c, d, b_d, c_d):
     return (a, a_b, a_c)
 
 
-def pushout(a, b, c, a_b, a_c, inplace=False):
-    """Find the pushour of the span b <- a -> c."""
+def pushout(a, b, c, a_b, a_c, inplace=False, overlay=False):
+    """Find the pushour of the span b <- a -> c.
+
+    Parameters
+    ----------
+    a, b, c : regraph.Graph
+        Graphs forming the span
+    a_b, a_c : dict
+        Homomorphisms of the span
+    inplace : bool, optional
+        If True, `b` is modified inplace to become the pushout object
+    overlay : bool, optional
+        If True (and `inplace` is False), the pushout object is
+        represented by a `regraph.overlay.OverlayGraph` on top of `b`,
+        so that `b` is not copied
+
+    Returns
+    -------
+    d : regraph.Graph
+        Pushout object
+    b_d : dict
+    c_d : dict
+    """
     def get_classes_to_merge():
         pass
 
@@ -215,6 +255,8 @@ def pushout(a, b, c, a_b, a_c, inplace=False):
 
     if inplace is True:
         d = b
+    elif overlay is True:
+        d = OverlayGraph(b)
     else:
         d = NXGraph()
         d.add_nodes_from(b.nodes(data=True))
@@ -335,10 +377,29 @@ def pushout(a, b, c, a_b, a_c, inplace=False):
     return (d, b_d, c_d)
 
 
-def pullback_complement(a, b, d, a_b, b_d, inplace=False):
+def pullback_complement(a, b, d, a_b, b_d, inplace=False, overlay=False):
     """Find the final pullback complement from a->b->d.
 
-    Makes changes to d inplace.
+    Parameters
+    ----------
+    a, b, d : regraph.Graph
+        Graphs forming the composable pair of homomorphisms
+    a_b, b_d : dict
+        Homomorphisms a->b and b->d (the latter is required to be monic)
+    inplace : bool, optional
+        If True, `d` is modified inplace to become
+        the pullback complement object
+    overlay : bool, optional
+        If True (and `inplace` is False), the pullback complement object
+        is represented by a `regraph.overlay.OverlayGraph` on top of `d`,
+        so that `d` is not copied
+
+    Returns
+    -------
+    c : regraph.Graph
+        Pullback complement object
+    a_c : dict
+    c_d : dict
     """
     check_homomorphism(a, b, a_b, total=True)
     check_homomorphism(b, d, b_d, total=True)
@@ -351,6 +412,8 @@ def pullback_complement(a, b, d, a_b, b_d, inplace=False):
 
     if inplace is True:
         c = d
+    elif overlay is True:
+        c = OverlayGraph(d)
     else:
         c = NXGraph()
         c.add_nodes_from(d.nodes(data=True))
@@ -423,9 +486,10 @@ def image_factorization(a, b, a_b):
     a_c = {}
     c_b = {}
 
+    b_preimages = keys_by_values(a_b)
     for n in b.nodes():
-        if n in a_b.values():
-            a_nodes = keys_by_value(a_b, n)
+        if n in b_preimages:
+            a_nodes = b_preimages[n]
             if len(a_nodes) > 1:
                 new_id = c.merge_nodes(a_nodes)
             else:
@@ -440,16 +504,18 @@ def image_factorization(a, b, a_b):
 def get_unique_map_to_pullback(p, p_a, p_b, z_a, z_b):
     """Find a unique map to pullback."""
     z_p = dict()
+    a_preimages = keys_by_values(z_a)
+    b_preimages = keys_by_values(z_b)
     for value in p:
         z_keys_from_a = set()
         if value in p_a.keys():
             a_value = p_a[value]
-            z_keys_from_a = set(keys_by_value(z_a, a_value))
+            z_keys_from_a = set(a_preimages.get(a_value, []))
 
         z_keys_from_b = set()
         if value in p_b.keys():
             b_value = p_b[value]
-            z_keys_from_b.update(keys_by_value(z_b, b_value))
+            z_keys_from_b.update(b_preimages.get(b_value, []))
 
         z_keys = z_keys_from_a.intersection(z_keys_from_b)
         for z_key in z_keys:
@@ -461,15 +527,17 @@ def get_unique_map_to_pullback(p, p_a, p_b, z_a, z_b):
 def get_unique_map_from_pushout(p, a_p, b_p, a_z, b_z):
     """Find a unique map to pushout."""
     p_z = dict()
+    a_preimages = keys_by_values(a_p)
+    b_preimages = keys_by_values(b_p)
     for value in p:
         z_values = set()
 
-        a_values = set(keys_by_value(a_p, value))
+        a_values = a_preimages.get(value, [])
         for a_value in a_values:
             if a_value in a_z.keys():
                 z_values.add(a_z[a_value])
 
-        b_values = set(keys_by_value(b_p, value))
+        b_values = b_preimages.get(value, [])
         for b_value in b_values:
             if b_value in b_z.keys():
                 z_values.add(b_z[b_value])
@@ -491,13 +559,15 @@ def get_unique_map_to_pullback_complement(a_p, p_c,
             "Morphism 'a_p' is required to be a mono "
             "to use the UP of the pullback complement")
     z_p = {}
+    z_preimages = keys_by_values(a_prime_z)
+    c_preimages = keys_by_values(p_c)
     for z_element, c_element in z_c.items():
-        a_prime_elements = keys_by_value(a_prime_z, z_element)
+        a_prime_elements = z_preimages.get(z_element, [])
         p_elements1 = set()  # candidate p elements
         for a_prime_element in a_prime_elements:
             p_elements1.add(a_p[a_prime_a[a_prime_element]])
         # resolve ambiguity going the other way
-        p_elements2 = keys_by_value(p_c, c_element)
+        p_elements2 = c_preimages.get(c_element, [])
         if len(p_elements1) == 0:
             if len(p_elements2) == 1:
                 z_p[z_element] = list(p_elements2)[0]
@@ -560,8 +630,20 @@ def get_unique_map_to_pullback_complement(a_p, p_c,
 
 # Relations related utils
 
-def relation_to_span(g1, g2, relation, edges=False, attrs=False):
-    """Convert a relation to a span."""
+def relation_to_span(g1, g2, relation, edges=False, attrs=False,
+                     sparse=False):
+    """Convert a relation to a span.
+
+    If `sparse` is True (or the relation is a
+    `regraph.dense.SparseRelation`), the span is constructed from
+    the CSR representation of the relation, see
+    `regraph.dense.SparseRelation.to_span`.
+    """
+    if sparse or isinstance(relation, SparseRelation):
+        if not isinstance(relation, SparseRelation):
+            relation = SparseRelation.from_dict(relation)
+        return relation.to_span(g1, g2, attrs)
+
     new_graph = type(g1)()
 
     left_h = dict()
@@ -618,10 +700,17 @@ def right_relation_dict(relation):
 
 
 def pushout_from_relation(g1, g2, relation, inplace=False):
-    """Find the pushout from a relation."""
+    """Find the pushout from a relation.
 
-    left_dict = left_relation_dict(relation)
-    right_dict = right_relation_dict(relation)
+    The relation is given either by a collection of pairs or
+    by a `regraph.dense.SparseRelation` object.
+    """
+    if isinstance(relation, SparseRelation):
+        left_dict = relation
+        right_dict = relation.invert()
+    else:
+        left_dict = left_relation_dict(relation)
+        right_dict = right_relation_dict(relation)
 
     if inplace is True:
         g12 = g1
@@ -1,9 +1,23 @@
-"""Parsing of the graph transformation commands."""
+"""Parsing of the graph transformation commands.
+
+This module contains two parsers of the same command grammar:
+
+* `parser` -- pyparsing grammar of a single command;
+* `parse_command` and `parse_script` -- hand-written recursive-descent
+  parser producing dictionaries describing commands (used by
+  `regraph.Rule.from_transform`), parsed scripts are cached by
+  their text.
+"""
+import re
+
+from functools import lru_cache
 
 from pyparsing import (Word, alphanums, nums, CaselessKeyword, Suppress,
                        Literal, delimitedList, Dict, Group,
                        Optional, Forward, Combine, QuotedString)
 
+from regraph.exceptions import ParsingError
+
 # Definition of literals
 point = Literal('.')
 plusorminus = (Literal('+') | Literal('-'))
@@ -194,3 +208,299 @@ command = (
 )
 
 parser = command.setResultsName("keyword") + "."
+
+
+# Fast parser
+
+_KEYWORD_RE = re.compile(r"\s*([A-Za-z0-9_$]+)")
+_NUMBER_RE = re.compile(r"\s*(\d+)")
+_FLOAT_RE = re.compile(r"\s*([+-]?)\s*(\d+\.\d*)")
+_INTEGER_RE = re.compile(r"\s*([+-]?)\s*(\d+)")
+_STRING_RE = re.compile(
+    r"""\s*(?:'((?:[^'\\\n]|\\.)*)'|"((?:[^"\\\n]|\\.)*)")""")
+_SYMBOL_RE = re.compile(r"\s*(\S)")
+_ESCAPE_RE = re.compile(r"\\(.)")
+_WHITESPACE_ESCAPES = {"t": "\t", "n": "\n", "f": "\f", "r": "\r"}
+
+_METHODS = {"UNION", "INTERSECTION"}
+
+# Arguments of the commands in the order of the grammar, optional
+# arguments (and optional clauses 'type', 'as', 'method' and 'edges')
+# are marked by '?'
+_COMMANDS = {
+    "ADD_NODE": ("node?", "type?", "attributes?"),
+    "CLONE": ("node", "as?"),
+    "MERGE": ("nodes", "method?", "as?", "edges?"),
+    "DELETE_NODE": ("node",),
+    "DELETE_EDGE": ("node_1", "node_2"),
+    "ADD_EDGE": ("node_1", "node_2", "attributes?"),
+    "ADD_NODE_ATTRS": ("node", "attributes"),
+    "ADD_EDGE_ATTRS": ("node_1", "node_2", "attributes"),
+    "DELETE_NODE_ATTRS": ("node", "attributes"),
+    "DELETE_EDGE_ATTRS": ("node_1", "node_2", "attributes"),
+    "UPDATE_NODE_ATTRS": ("node", "attributes"),
+    "UPDATE_EDGE_ATTRS": ("node_1", "node_2", "attributes"),
+}
+
+
+class _SyntaxError(Exception):
+    """Internal exception of the fast parser."""
+
+
+def _unescape(match):
+    c = match.group(1)
+    return _WHITESPACE_ESCAPES.get(c, c)
+
+
+class _CommandParser(object):
+    """Recursive-descent parser of a single command."""
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def _match(self, regex):
+        match = regex.match(self.text, self.pos)
+        if match is not None:
+            self.pos = match.end()
+        return match
+
+    def _peek_symbol(self):
+        match = _SYMBOL_RE.match(self.text, self.pos)
+        if match is None:
+            return None
+        return match.group(1)
+
+    def _expect_symbol(self, symbol):
+        match = _SYMBOL_RE.match(self.text, self.pos)
+        if match is None or match.group(1) != symbol:
+            raise _SyntaxError()
+        self.pos = match.end()
+
+    def _keyword(self, keywords=None):
+        """Consume a keyword (from `keywords`, if specified)."""
+        match = _KEYWORD_RE.match(self.text, self.pos)
+        if match is None:
+            return None
+        word = match.group(1).upper()
+        if keywords is not None and word not in keywords:
+            return None
+        self.pos = match.end()
+        return word
+
+    def _string(self):
+        match = self._match(_STRING_RE)
+        if match is None:
+            return None
+        value = match.group(1)
+        if value is None:
+            value = match.group(2)
+        return _ESCAPE_RE.sub(_unescape, value)
+
+    def node(self, optional=False):
+        match = self._match(_NUMBER_RE)
+        if match is not None:
+            return int(match.group(1))
+        value = self._string()
+        if value is None and not optional:
+            raise _SyntaxError()
+        return value
+
+    def nodes(self):
+        self._expect_symbol("[")
+        nodes = [self.node()]
+        while self._peek_symbol() == ",":
+            self._expect_symbol(",")
+            nodes.append(self.node())
+        self._expect_symbol("]")
+        return nodes
+
+    def scalar(self):
+        match = self._match(_FLOAT_RE)
+        if match is not None:
+            return float(match.group(1) + match.group(2))
+        match = self._match(_INTEGER_RE)
+        if match is not None:
+            return int(match.group(1) + match.group(2))
+        value = self._string()
+        if value is None:
+            raise _SyntaxError()
+        return value
+
+    def list_value(self):
+        self._expect_symbol("[")
+        values = []
+        while True:
+            if self._peek_symbol() == "[":
+                values.append(self.list_value())
+            else:
+                values.append(self.scalar())
+            if self._peek_symbol() != ",":
+                break
+            self._expect_symbol(",")
+        self._expect_symbol("]")
+        return values
+
+    def value(self):
+        symbol = self._peek_symbol()
+        if symbol == "{":
+            self._expect_symbol("{")
+            if self._peek_symbol() == "}":
+                self._expect_symbol("}")
+                return dict()
+            start = self.pos
+            if self.node(optional=True) is not None and\
+                    self._peek_symbol() == ":":
+                self.pos = start
+                return self.members()
+            # set of values
+            self.pos = start
+            values = {self.scalar()}
+            while self._peek_symbol() == ",":
+                self._expect_symbol(",")
+                values.add(self.scalar())
+            self._expect_symbol("}")
+            return values
+        elif symbol == "[":
+            return self.list_value()
+        return self.scalar()
+
+    def members(self):
+        """Parse members of a dictionary and the closing bracket."""
+        members = dict()
+        if self._peek_symbol() == "}":
+            self._expect_symbol("}")
+            return members
+        while True:
+            key = self.node()
+            self._expect_symbol(":")
+            members[key] = self.value()
+            if self._peek_symbol() != ",":
+                break
+            self._expect_symbol(",")
+        self._expect_symbol("}")
+        return members
+
+    def attributes(self, optional=False):
+        if self._peek_symbol() != "{":
+            if optional:
+                return None
+            raise _SyntaxError()
+        self._expect_symbol("{")
+        return self.members()
+
+    def command(self):
+        keyword = self._keyword(_COMMANDS)
+        if keyword is None:
+            raise _SyntaxError()
+        action = {"keyword": keyword.lower()}
+        for arg in _COMMANDS[keyword]:
+            optional = arg.endswith("?")
+            arg = arg.rstrip("?")
+            if arg in ["node", "node_1", "node_2"]:
+                value = self.node(optional)
+                if value is not None:
+                    action[arg] = value
+            elif arg == "nodes":
+                action["nodes"] = self.nodes()
+            elif arg == "attributes":
+                value = self.attributes(optional)
+                if value is not None:
+                    action["attributes"] = value
+            elif arg == "type":
+                if self._keyword({"TYPE"}) is not None:
+                    action["type"] = self.node()
+            elif arg == "as":
+                if self._keyword({"AS"}) is not None:
+                    action["node_name"] = self.node()
+            elif arg in ["method", "edges"]:
+                if self._keyword({arg.upper()}) is not None:
+                    method = self._keyword(_METHODS)
+                    if method is None:
+                        raise _SyntaxError()
+                    if arg == "method":
+                        action["method"] = method.lower()
+                    else:
+                        action["edges_method"] = method.lower()
+        # the rest of the line after the terminating point is ignored
+        self._expect_symbol(".")
+        return action
+
+
+def parse_command(command):
+    """Parse a single transformation command.
+
+    Parameters
+    ----------
+    command : str
+        Command terminated by a point, for example
+        `"ADD_EDGE 'a' 'b' {'type': {'friends'}}."`
+
+    Returns
+    -------
+    action : dict
+        Dictionary with the key 'keyword' (name of the command in lower
+        case) and the keys of its arguments ('node', 'nodes', 'node_1',
+        'node_2', 'node_name', 'type', 'method', 'edges_method',
+        'attributes') that are present in the command
+
+    Raises
+    ------
+    ParsingError
+        If the command cannot be parsed
+    """
+    try:
+        return _CommandParser(command).command()
+    except _SyntaxError:
+        raise ParsingError("Cannot parse command '%s'" % command)
+
+
+def _copy_value(value):
+    if isinstance(value, dict):
+        return {k: _copy_value(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [_copy_value(v) for v in value]
+    elif isinstance(value, set):
+        return set(value)
+    return value
+
+
+@lru_cache(maxsize=1024)
+def _parse_script(script):
+    return tuple(
+        parse_command(command)
+        for command in script.splitlines()
+        if len(command.strip()) > 0
+    )
+
+
+def parse_script(script, use_cache=True):
+    """Parse a script of transformation commands (one per line).
+
+    Parsed scripts are cached by their text, the returned actions
+    are copies of the cached ones and can be modified.
+
+    Parameters
+    ----------
+    script : str
+        Script containing transformation commands
+    use_cache : bool, optional
+        If False, the script is parsed without using the cache
+
+    Returns
+    -------
+    actions : list of dict
+        Parsed commands (see `parse_command`)
+
+    Raises
+    ------
+    ParsingError
+        If some command cannot be parsed
+    """
+    if use_cache:
+        return [_copy_value(action) for action in _parse_script(script)]
+    return [
+        parse_command(command)
+        for command in script.splitlines()
+        if len(command.strip()) > 0
+    ]
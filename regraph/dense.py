@@ -0,0 +1,486 @@
+"""Dense integer-array representation of homomorphisms.
+
+This module provides an optional representation of homomorphisms
+in which node ids of every graph are interned to contiguous integers
+and a homomorphism is stored as a NumPy array of target positions
+(where `-1` stands for an undefined image). Composition of such
+homomorphisms is a single fancy-indexing operation, which makes
+composing long chains of large typings considerably cheaper than
+composing their dict-based counterparts key by key.
+
+* `NodeIndex` -- interning of node ids to integer positions;
+* `DenseHomomorphism` -- homomorphism stored as an integer array;
+* `compose_dense_chain` -- compose a chain of dict-based homomorphisms
+  through the dense representation;
+* `SparseRelation` -- relation between two sets of nodes stored as
+  a boolean matrix in the compressed sparse row (CSR) format.
+"""
+from collections.abc import Mapping
+
+import numpy as np
+
+from regraph.exceptions import InvalidHomomorphism, ReGraphError
+from regraph.utils import attrs_intersection
+
+
+UNDEFINED = -1
+
+
+class NodeIndex(object):
+    """Interning of node ids to contiguous integer positions.
+
+    Attributes
+    ----------
+    nodes : list
+        List of node ids, the i-th element is the node interned to i
+    positions : dict
+        Dictionary mapping node ids to their positions
+    """
+
+    def __init__(self, nodes=None):
+        """Initialize an index from a collection of node ids."""
+        if nodes is None:
+            nodes = []
+        self.nodes = list(dict.fromkeys(nodes))
+        self.positions = {n: i for i, n in enumerate(self.nodes)}
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Create an index of the nodes of a graph."""
+        return cls(graph.nodes())
+
+    def __len__(self):
+        """Return the number of interned nodes."""
+        return len(self.nodes)
+
+    def __contains__(self, node):
+        """Test if the node is interned."""
+        return node in self.positions
+
+    def position(self, node):
+        """Get the position of a node (-1 if the node is not interned)."""
+        return self.positions.get(node, UNDEFINED)
+
+    def positions_of(self, nodes):
+        """Get an array of positions of the input nodes."""
+        positions = self.positions
+        return np.fromiter(
+            (positions.get(n, UNDEFINED) for n in nodes),
+            dtype=np.int64, count=len(nodes))
+
+
+class DenseHomomorphism(object):
+    """Homomorphism stored as an array of integer positions.
+
+    Attributes
+    ----------
+    source_index : regraph.dense.NodeIndex
+        Index of the nodes of the source graph
+    target_index : regraph.dense.NodeIndex
+        Index of the nodes of the target graph
+    array : numpy.ndarray
+        Array of length `len(source_index)`, whose i-th element is
+        the position of the image of the i-th source node in
+        `target_index` (or -1 if the image is undefined)
+    """
+
+    def __init__(self, source_index, target_index, array=None):
+        """Initialize a dense homomorphism."""
+        self.source_index = source_index
+        self.target_index = target_index
+        if array is None:
+            array = np.full(len(source_index), UNDEFINED, dtype=np.int64)
+        else:
+            array = np.asarray(array, dtype=np.int64)
+        if array.shape != (len(source_index),):
+            raise InvalidHomomorphism(
+                "Array of shape {} does not match the size "
+                "of the source index ({})".format(
+                    array.shape, len(source_index)))
+        self.array = array
+
+    @classmethod
+    def from_dict(cls, mapping, source_index=None, target_index=None):
+        """Create a dense homomorphism from a dict.
+
+        Parameters
+        ----------
+        mapping : dict
+            Dictionary representing a homomorphism
+        source_index : regraph.dense.NodeIndex, optional
+            Index of the source nodes, by default keys of `mapping`
+            are interned
+        target_index : regraph.dense.NodeIndex, optional
+            Index of the target nodes, by default values of `mapping`
+            are interned. Values not present in the index are
+            considered undefined.
+
+        Returns
+        -------
+        homomorphism : regraph.dense.DenseHomomorphism
+        """
+        if source_index is None:
+            source_index = NodeIndex(mapping.keys())
+        if target_index is None:
+            target_index = NodeIndex(mapping.values())
+        positions = target_index.positions
+        array = np.fromiter(
+            (
+                positions.get(mapping[n], UNDEFINED)
+                if n in mapping else UNDEFINED
+                for n in source_index.nodes
+            ),
+            dtype=np.int64, count=len(source_index))
+        return cls(source_index, target_index, array)
+
+    def to_dict(self):
+        """Convert the dense homomorphism to a dict."""
+        defined = np.flatnonzero(self.array >= 0)
+        source_nodes = self.source_index.nodes
+        target_nodes = self.target_index.nodes
+        return {
+            source_nodes[i]: target_nodes[j]
+            for i, j in zip(defined.tolist(), self.array[defined].tolist())
+        }
+
+    def __len__(self):
+        """Return the number of nodes with a defined image."""
+        return int(np.count_nonzero(self.array >= 0))
+
+    def is_total(self):
+        """Test if the image of every source node is defined."""
+        return bool(np.all(self.array >= 0))
+
+    def reindex(self, target_index):
+        """Express the homomorphism in terms of another target index."""
+        if target_index is self.target_index:
+            return self
+        remap = target_index.positions_of(self.target_index.nodes)
+        return DenseHomomorphism(
+            self.source_index, target_index, _take(remap, self.array))
+
+    def compose(self, other):
+        """Compose with another dense homomorphism.
+
+        The target of `self` and the source of `other` are matched
+        by node ids, if their indices are the same object the
+        composition is a single fancy-indexing operation.
+        """
+        left = self.reindex(other.source_index)
+        return DenseHomomorphism(
+            self.source_index, other.target_index,
+            _take(other.array, left.array))
+
+
+def _take(values, positions):
+    """Index `values` by `positions` propagating undefined positions."""
+    undefined = positions < 0
+    if len(values) == 0:
+        return np.full(len(positions), UNDEFINED, dtype=np.int64)
+    result = values[np.where(undefined, 0, positions)]
+    result[undefined] = UNDEFINED
+    return result
+
+
+def to_dense_chain(chain):
+    """Convert a chain of dict-based homomorphisms to dense ones.
+
+    Consecutive homomorphisms in the resulting chain share indices,
+    so that their composition requires no reindexing.
+    """
+    indices = [NodeIndex(mapping.keys()) for mapping in chain]
+    if len(chain) > 0:
+        indices.append(NodeIndex(chain[-1].values()))
+    return [
+        DenseHomomorphism.from_dict(mapping, indices[i], indices[i + 1])
+        for i, mapping in enumerate(chain)
+    ]
+
+
+def compose_dense_chain(chain):
+    """Compose a chain of homomorphisms using the dense representation.
+
+    Parameters
+    ----------
+    chain : list
+        List of homomorphisms, either dicts or
+        `regraph.dense.DenseHomomorphism` objects
+
+    Returns
+    -------
+    homomorphism : regraph.dense.DenseHomomorphism
+    """
+    if all(isinstance(h, dict) for h in chain):
+        chain = to_dense_chain(chain)
+    else:
+        chain = [
+            h if isinstance(h, DenseHomomorphism)
+            else DenseHomomorphism.from_dict(h)
+            for h in chain
+        ]
+    homomorphism = chain[0]
+    for h in chain[1:]:
+        homomorphism = homomorphism.compose(h)
+    return homomorphism
+
+
+class SparseRelation(Mapping):
+    """Relation stored as a boolean CSR matrix over interned node ids.
+
+    Row `i` of the matrix contains the positions (in `right_index`)
+    of the right nodes related to the `i`-th left node, as a slice
+    `indices[indptr[i]:indptr[i + 1]]` of sorted positions.
+    The relation is also a read-only mapping from left nodes
+    to the sets of related right nodes, so it can be used wherever
+    dict-based relations are expected (left nodes not related to
+    any right node are not keys of the mapping).
+
+    Attributes
+    ----------
+    left_index : regraph.dense.NodeIndex
+        Index of the left nodes
+    right_index : regraph.dense.NodeIndex
+        Index of the right nodes
+    indptr : numpy.ndarray
+        Array of row offsets of length `len(left_index) + 1`
+    indices : numpy.ndarray
+        Array of column positions of the related pairs
+    """
+
+    def __init__(self, left_index, right_index, indptr=None, indices=None):
+        """Initialize a sparse relation (empty by default)."""
+        self.left_index = left_index
+        self.right_index = right_index
+        if indptr is None:
+            indptr = np.zeros(len(left_index) + 1, dtype=np.int64)
+        if indices is None:
+            indices = np.zeros(0, dtype=np.int64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        if self.indptr.shape != (len(left_index) + 1,) or\
+                self.indptr[-1] != len(self.indices):
+            raise ReGraphError(
+                "Row offsets do not match the size of the left index "
+                "({}) and the number of pairs ({})".format(
+                    len(left_index), len(self.indices)))
+
+    @classmethod
+    def _from_coordinates(cls, left_index, right_index, rows, cols):
+        """Create a relation from arrays of row and column positions."""
+        n_right = len(right_index)
+        codes = np.unique(rows * n_right + cols)
+        if n_right > 0:
+            rows = codes // n_right
+            cols = codes % n_right
+        indptr = np.zeros(len(left_index) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(rows, minlength=len(left_index)), out=indptr[1:])
+        return cls(left_index, right_index, indptr, cols)
+
+    @classmethod
+    def from_pairs(cls, pairs, left_index=None, right_index=None):
+        """Create a sparse relation from a collection of pairs.
+
+        Parameters
+        ----------
+        pairs : iterable of tuples
+            Pairs of related left and right nodes
+        left_index : regraph.dense.NodeIndex, optional
+            Index of the left nodes, by default the left nodes
+            of the pairs are interned
+        right_index : regraph.dense.NodeIndex, optional
+            Index of the right nodes, by default the right nodes
+            of the pairs are interned
+
+        Returns
+        -------
+        relation : regraph.dense.SparseRelation
+
+        Raises
+        ------
+        ReGraphError
+            If a node of some pair is not present in the index
+        """
+        pairs = list(pairs)
+        if left_index is None:
+            left_index = NodeIndex(a for a, _ in pairs)
+        if right_index is None:
+            right_index = NodeIndex(b for _, b in pairs)
+        rows = left_index.positions_of([a for a, _ in pairs])
+        cols = right_index.positions_of([b for _, b in pairs])
+        if np.any(rows < 0) or np.any(cols < 0):
+            missing = [
+                pair for pair, i, j in zip(pairs, rows, cols)
+                if i < 0 or j < 0
+            ][0]
+            raise ReGraphError(
+                "Pair '{}' is not defined on the indexed nodes".format(
+                    missing))
+        return cls._from_coordinates(left_index, right_index, rows, cols)
+
+    @classmethod
+    def from_dict(cls, relation, left_index=None, right_index=None):
+        """Create a sparse relation from a dict of sets.
+
+        Parameters
+        ----------
+        relation : dict
+            Dictionary mapping left nodes to collections of right nodes
+        left_index : regraph.dense.NodeIndex, optional
+            Index of the left nodes, by default keys of `relation`
+            are interned
+        right_index : regraph.dense.NodeIndex, optional
+            Index of the right nodes, by default the values
+            of `relation` are interned
+
+        Returns
+        -------
+        relation : regraph.dense.SparseRelation
+        """
+        if left_index is None:
+            left_index = NodeIndex(relation.keys())
+        return cls.from_pairs(
+            [(a, b) for a, bs in relation.items() for b in bs],
+            left_index, right_index)
+
+    def _coordinates(self):
+        """Get arrays of row and column positions of the related pairs."""
+        rows = np.repeat(
+            np.arange(len(self.left_index), dtype=np.int64),
+            np.diff(self.indptr))
+        return rows, self.indices
+
+    def _row(self, node):
+        i = self.left_index.position(node)
+        if i < 0:
+            return self.indices[:0]
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def __getitem__(self, node):
+        """Get the set of right nodes related to a left node."""
+        row = self._row(node)
+        if len(row) == 0:
+            raise KeyError(node)
+        right_nodes = self.right_index.nodes
+        return set(right_nodes[j] for j in row.tolist())
+
+    def __contains__(self, node):
+        """Test if a left node is related to some right node."""
+        return len(self._row(node)) > 0
+
+    def __iter__(self):
+        """Iterate over the left nodes related to some right node."""
+        left_nodes = self.left_index.nodes
+        for i in np.flatnonzero(np.diff(self.indptr)).tolist():
+            yield left_nodes[i]
+
+    def __len__(self):
+        """Return the number of left nodes related to some right node."""
+        return int(np.count_nonzero(np.diff(self.indptr)))
+
+    def __repr__(self):
+        return "SparseRelation({})".format(self.to_dict())
+
+    def n_pairs(self):
+        """Return the number of related pairs."""
+        return len(self.indices)
+
+    def pairs(self):
+        """Iterate over the related pairs."""
+        rows, cols = self._coordinates()
+        left_nodes = self.left_index.nodes
+        right_nodes = self.right_index.nodes
+        for i, j in zip(rows.tolist(), cols.tolist()):
+            yield (left_nodes[i], right_nodes[j])
+
+    def to_dict(self):
+        """Convert the relation to a dict of sets."""
+        return {a: bs for a, bs in self.items()}
+
+    def invert(self):
+        """Get the inverse relation (from right nodes to left nodes)."""
+        rows, cols = self._coordinates()
+        return SparseRelation._from_coordinates(
+            self.right_index, self.left_index, cols, rows)
+
+    def compose(self, other):
+        """Compose with another sparse relation.
+
+        The result relates a left node `a` of `self` to a right node `c`
+        of `other` if there is `b` such that `a` is related to `b`
+        by `self` and `b` is related to `c` by `other`. The right nodes
+        of `self` and the left nodes of `other` are matched by
+        node ids, the composition is computed as a sparse boolean
+        matrix product.
+        """
+        rows, cols = self._coordinates()
+        if self.right_index is not other.left_index:
+            remap = other.left_index.positions_of(self.right_index.nodes)
+            cols = _take(remap, cols)
+            defined = cols >= 0
+            rows = rows[defined]
+            cols = cols[defined]
+
+        starts = other.indptr[cols]
+        lengths = other.indptr[cols + 1] - starts
+        offsets = np.cumsum(lengths) - lengths
+        gather = (
+            np.repeat(starts - offsets, lengths) +
+            np.arange(int(lengths.sum()), dtype=np.int64)
+        )
+        return SparseRelation._from_coordinates(
+            self.left_index, other.right_index,
+            np.repeat(rows, lengths), other.indices[gather])
+
+    def to_span(self, g1, g2, attrs=False):
+        """Convert the relation between two graphs to a span.
+
+        Produces the same span as `regraph.category_utils.relation_to_span`,
+        the edges of the common part are found by scanning the edges
+        of `g1` instead of all the pairs of related nodes.
+
+        Parameters
+        ----------
+        g1 : regraph.Graph
+            Graph containing the left nodes of the relation
+        g2 : regraph.Graph
+            Graph containing the right nodes of the relation
+        attrs : bool, optional
+            If True, the nodes of the common part are equipped with the
+            intersection of the attributes of the related nodes
+
+        Returns
+        -------
+        common : regraph.Graph
+            Common part graph induced by the relation
+        left_h : dict
+            Homomorphism from the common part graph to `g1`
+        right_h : dict
+            Homomorphism from the common part graph to `g2`
+        """
+        new_graph = type(g1)()
+        left_h = dict()
+        right_h = dict()
+        span_nodes = dict()
+        for a, b in self.pairs():
+            new_node = str(a) + "_" + str(b)
+            new_graph.add_node(new_node)
+            if attrs:
+                new_graph.add_node_attrs(
+                    new_node,
+                    attrs_intersection(g1.get_node(a), g2.get_node(b)))
+            left_h[new_node] = a
+            right_h[new_node] = b
+            span_nodes.setdefault(a, []).append((new_node, b))
+
+        for s, t in g1.edges():
+            if s not in span_nodes or t not in span_nodes:
+                continue
+            for n1, b1 in span_nodes[s]:
+                for n2, b2 in span_nodes[t]:
+                    if (b1, b2) in g2.edges():
+                        new_graph.add_edge(
+                            n1, n2,
+                            attrs_intersection(
+                                g1.get_edge(s, t), g2.get_edge(b1, b2)))
+        return new_graph, left_h, right_h
@@ -0,0 +1,359 @@
+"""Fixpoint graph transformation engine.
+
+This module contains an engine applying a set of rewriting rules
+to a graph (or to a graph in a hierarchy) until none of the rules
+matches. Every round of the engine:
+
+1. finds the matches of all the rules (optionally, in a pool
+   of workers);
+2. builds the conflict graph of the matches: two matches are in
+   conflict if the footprint of one of them (its image, together with
+   the neighbours of the nodes it removes, clones or merges)
+   intersects the image of the other;
+3. selects a maximal independent set of the conflict graph (matches
+   of the rules with higher priorities first);
+4. applies the selected matches.
+
+The matching can be performed by a pool of workers. Pools of threads
+do not speed up the matching of the in-memory graphs (it is pure
+Python code holding the GIL), they are only useful if the matching
+waits for I/O (for example, for a database). Pools of processes match
+in parallel, but the target is pickled and sent to the workers in
+every round (once per worker, the rules are split into as many chunks
+as there are workers), which pays off only if the matching is
+expensive compared to the size of the target. By default the matching
+is serial.
+
+* `TransformationEngine` -- fixpoint engine;
+* `RoundStatistics` -- statistics of a round of the engine.
+"""
+import os
+import time
+import warnings
+
+from concurrent.futures import (Executor,
+                                ThreadPoolExecutor,
+                                ProcessPoolExecutor)
+
+from regraph.exceptions import ReGraphError, ReGraphWarning
+
+
+class RoundStatistics(object):
+    """Statistics of a round of the transformation engine.
+
+    Attributes
+    ----------
+    round : int
+        Number of the round (starting from 0)
+    matches_found : dict
+        Number of matches found for every rule
+    applied : dict
+        Number of matches applied for every rule
+    conflicts : int
+        Number of pairs of conflicting matches
+    match_time : float
+        Time (in seconds) spent finding matches
+    time : float
+        Total time (in seconds) of the round
+    """
+
+    def __init__(self, round_number, rule_names):
+        """Initialize empty statistics of a round."""
+        self.round = round_number
+        self.matches_found = {name: 0 for name in rule_names}
+        self.applied = {name: 0 for name in rule_names}
+        self.conflicts = 0
+        self.match_time = 0.0
+        self.time = 0.0
+
+    def total_matches(self):
+        """Return the number of matches found for all the rules."""
+        return sum(self.matches_found.values())
+
+    def total_applied(self):
+        """Return the number of matches applied for all the rules."""
+        return sum(self.applied.values())
+
+    def to_json(self):
+        """Convert the statistics to a JSON-serializable dict."""
+        return {
+            "round": self.round,
+            "matches_found": dict(self.matches_found),
+            "applied": dict(self.applied),
+            "conflicts": self.conflicts,
+            "match_time": self.match_time,
+            "time": self.time
+        }
+
+    def __str__(self):
+        """String representation of the statistics."""
+        return (
+            "Round {}: {} matches found, {} applied, "
+            "{} conflicts, {:.6f}s".format(
+                self.round, self.total_matches(), self.total_applied(),
+                self.conflicts, self.time)
+        )
+
+
+def _find_graph_matches(graph, pattern):
+    return graph.find_matching(pattern)
+
+
+def _find_hierarchy_matches(hierarchy, graph_id, pattern):
+    return hierarchy.find_matching(graph_id, pattern)
+
+
+def _find_chunk_matches(find, target, args):
+    return [find(target, *a) for a in args]
+
+
+class TransformationEngine(object):
+    """Engine applying rules to a graph until a fixpoint is reached.
+
+    Attributes
+    ----------
+    rules : dict
+        Dictionary whose keys are names of the rules and whose
+        values are `regraph.Rule` objects
+    priorities : dict
+        Priorities of the rules, matches of the rules with higher
+        priorities are selected first when resolving conflicts
+    executor : str or concurrent.futures.Executor
+        Pool of workers used to find matches: `"serial"`, `"thread"`,
+        `"process"` or an executor object (see the module documentation
+        for the trade-offs)
+    n_workers : int
+        Number of workers of the pool (if the pool is created by
+        the engine)
+    max_rounds : int
+        Maximal number of rounds
+    neighbourhood : bool
+        If True, neighbours of the nodes removed, cloned or merged by
+        a match are included in its footprint
+    statistics : list of regraph.engine.RoundStatistics
+        Statistics of the rounds of the last run
+    converged : bool
+        True if the last run reached a fixpoint, False if it was
+        stopped after `max_rounds` rounds (None before the first run)
+    """
+
+    def __init__(self, rules, priorities=None, executor="serial",
+                 n_workers=None, max_rounds=100, neighbourhood=True):
+        """Initialize a transformation engine.
+
+        Parameters
+        ----------
+        rules : dict or list of regraph.Rule
+            Rules to apply, if a list is given the rules are named
+            by their positions in the list
+        priorities : dict, optional
+            Priorities of the rules (0 by default)
+        executor : str or concurrent.futures.Executor, optional
+            Pool of workers used to find matches (`"serial"`,
+            `"thread"`, `"process"` or an executor object), by default
+            the matches are found without a pool
+        n_workers : int, optional
+            Number of workers of the pool
+        max_rounds : int, optional
+            Maximal number of rounds
+        neighbourhood : bool, optional
+            If True (default), neighbours of the nodes removed,
+            cloned or merged by a match are included in its footprint
+
+        Raises
+        ------
+        ReGraphError
+            If the executor is unknown
+        """
+        if not isinstance(rules, dict):
+            rules = {i: rule for i, rule in enumerate(rules)}
+        self.rules = rules
+        if priorities is None:
+            priorities = dict()
+        self.priorities = {
+            name: priorities.get(name, 0) for name in rules
+        }
+        if not isinstance(executor, Executor) and\
+                executor not in ["thread", "process", "serial"]:
+            raise ReGraphError(
+                "Unknown executor '{}'".format(executor))
+        self.executor = executor
+        self.n_workers = n_workers
+        self.max_rounds = max_rounds
+        self.neighbourhood = neighbourhood
+        self.statistics = []
+        self.converged = None
+
+    def _find_matches(self, pool, target, graph_id):
+        """Find matches of all the rules."""
+        names = list(self.rules.keys())
+        if graph_id is None:
+            find = _find_graph_matches
+            args = [(self.rules[name].lhs,) for name in names]
+        else:
+            find = _find_hierarchy_matches
+            args = [(graph_id, self.rules[name].lhs) for name in names]
+        if pool is None:
+            results = [find(target, *a) for a in args]
+        elif isinstance(pool, ProcessPoolExecutor):
+            # Send the target to every worker only once
+            n_chunks = min(len(args), self._n_workers(pool))
+            futures = [
+                pool.submit(
+                    _find_chunk_matches, find, target, args[i::n_chunks])
+                for i in range(n_chunks)
+            ]
+            chunks = [future.result() for future in futures]
+            results = [
+                chunks[i % n_chunks][i // n_chunks]
+                for i in range(len(args))
+            ]
+        else:
+            futures = [pool.submit(find, target, *a) for a in args]
+            results = [future.result() for future in futures]
+        return [
+            (name, instance)
+            for name, instances in zip(names, results)
+            for instance in instances
+        ]
+
+    def _footprint(self, graph, name, instance):
+        """Get the footprint of a match."""
+        footprint = set(instance.values())
+        if self.neighbourhood:
+            changes = self.rules[name].changes()
+            touched = set(changes.removed_nodes) | set(changes.cloned_nodes)
+            for p_nodes in changes.merged_nodes.values():
+                touched.update(self.rules[name].p_lhs[p] for p in p_nodes)
+            for lhs_node in touched:
+                node = instance[lhs_node]
+                footprint.update(graph.successors(node))
+                footprint.update(graph.predecessors(node))
+        return footprint
+
+    def _select(self, graph, matches, stats):
+        """Select a maximal independent set of the conflict graph."""
+        images = [set(instance.values()) for _, instance in matches]
+        footprints = [
+            self._footprint(graph, name, instance)
+            for name, instance in matches
+        ]
+
+        # Index of matches by the nodes of their images
+        image_index = dict()
+        for i, image in enumerate(images):
+            for node in image:
+                image_index.setdefault(node, []).append(i)
+
+        conflicts = [set() for _ in matches]
+        for i, footprint in enumerate(footprints):
+            for node in footprint:
+                for j in image_index.get(node, []):
+                    if j != i:
+                        conflicts[i].add(j)
+                        conflicts[j].add(i)
+        stats.conflicts = sum(len(c) for c in conflicts) // 2
+
+        order = sorted(
+            range(len(matches)),
+            key=lambda i: -self.priorities[matches[i][0]])
+        selected = []
+        excluded = set()
+        for i in order:
+            if i not in excluded:
+                selected.append(i)
+                excluded.update(conflicts[i])
+        return selected
+
+    def _apply(self, target, graph_id, matches, selected):
+        """Apply the selected matches."""
+        if graph_id is None:
+            # matches are independent: all the restrictive parts
+            # can be applied before all the expansive parts
+            registers = []
+            for i in selected:
+                name, instance = matches[i]
+                registers.append(target._rewrite_restrictive(
+                    self.rules[name].compile(), instance))
+            for i, r in zip(selected, registers):
+                program = self.rules[matches[i][0]].compile()
+                target._rewrite_expansive(program, r)
+        else:
+            for i in selected:
+                name, instance = matches[i]
+                target.rewrite(graph_id, self.rules[name], instance)
+
+    def _n_workers(self, pool):
+        """Get the number of workers of the pool."""
+        n_workers = getattr(pool, "_max_workers", None)
+        if n_workers is None:
+            n_workers = self.n_workers or os.cpu_count() or 1
+        return n_workers
+
+    def _create_pool(self):
+        if isinstance(self.executor, Executor):
+            return self.executor, False
+        if self.executor == "thread":
+            return ThreadPoolExecutor(self.n_workers), True
+        if self.executor == "process":
+            return ProcessPoolExecutor(self.n_workers), True
+        return None, False
+
+    def run(self, target, graph_id=None):
+        """Apply the rules until none of them matches.
+
+        Parameters
+        ----------
+        target : regraph.NXGraph or regraph.NXHierarchy
+            Graph to transform (in-place) or a hierarchy containing it
+        graph_id : hashable, optional
+            Id of the graph to transform, if `target` is a hierarchy
+            (the changes are then propagated in the hierarchy)
+
+        Returns
+        -------
+        statistics : list of regraph.engine.RoundStatistics
+            Statistics of the performed rounds
+
+        Warns
+        -----
+        ReGraphWarning
+            If the fixpoint was not reached in `max_rounds` rounds
+            (the attribute `converged` is then set to False)
+        """
+        self.statistics = []
+        self.converged = False
+        pool, owned = self._create_pool()
+        try:
+            for round_number in range(self.max_rounds):
+                start = time.perf_counter()
+                stats = RoundStatistics(round_number, self.rules.keys())
+
+                matches = self._find_matches(pool, target, graph_id)
+                stats.match_time = time.perf_counter() - start
+                for name, _ in matches:
+                    stats.matches_found[name] += 1
+
+                if graph_id is None:
+                    graph = target
+                else:
+                    graph = target.get_graph(graph_id)
+                selected = self._select(graph, matches, stats)
+                self._apply(target, graph_id, matches, selected)
+                for i in selected:
+                    stats.applied[matches[i][0]] += 1
+
+                stats.time = time.perf_counter() - start
+                self.statistics.append(stats)
+                if len(selected) == 0:
+                    self.converged = True
+                    break
+        finally:
+            if owned:
+                pool.shutdown()
+        if not self.converged:
+            warnings.warn(
+                "Fixpoint was not reached in {} rounds".format(
+                    self.max_rounds),
+                ReGraphWarning)
+        return self.statistics
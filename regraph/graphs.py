@@ -10,6 +10,7 @@ import os
 import warnings
 
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 
 from regraph.exceptions import (ReGraphError,
                                 GraphError,
@@ -24,10 +25,49 @@ from regraph.utils import (load_nodes_from_json,
                            add_attrs,
                            remove_attrs,
                            merge_attributes,
-                           keys_by_value,
+                           valid_attributes,
+                           select_non_overlapping,
+                           attrs_fingerprint,
+                           wl_fingerprint,
                            )
 
 
+class UndoLog(object):
+    """Log of the primitive changes performed by rewritings of a graph.
+
+    The log is produced by `Graph.rewrite` (with `record_undo=True`)
+    or by `Graph.transaction` and allows to restore the state of the
+    graph preceding the changes (see `Graph.undo`). Its entries are
+    tuples describing the changes in the order they were performed:
+
+    - `("clone", node, clone)`;
+    - `("remove_node", node, attrs, successors, predecessors)`, where
+      `successors` and `predecessors` are dictionaries mapping the
+      neighbours of the removed node to the attributes of the edges;
+    - `("remove_edge", s, t, attrs)`;
+    - `("merge", merged_node, nodes)`, where `nodes` is a list of
+      tuples `(node, attrs, successors, predecessors)` describing
+      the merged nodes;
+    - `("add_node", node)`, `("add_edge", s, t)`;
+    - `("node_attrs", node, attrs)`, `("edge_attrs", s, t, attrs)`,
+      where `attrs` are the attributes before the change;
+    - `("relabel_node", node, new_id)`.
+
+    Attributes
+    ----------
+    entries : list
+        Entries of the log
+    """
+
+    def __init__(self):
+        """Initialize an empty log."""
+        self.entries = []
+
+    def __len__(self):
+        """Return the number of entries of the log."""
+        return len(self.entries)
+
+
 class Graph(ABC):
     """Abstract class for graph objects in ReGraph."""
 
@@ -237,6 +277,71 @@ class Graph(ABC):
         """Return the set of out-going edges."""
         return [(node_id, s) for s in self.successors(node_id)]
 
+    def fingerprint(self):
+        """Get a structural fingerprint of the graph.
+
+        The fingerprint is computed by the Weisfeiler-Lehman refinement
+        of the labels of the nodes initialised with their attributes
+        (see `regraph.utils.wl_fingerprint`). It covers the attributes
+        of nodes and edges, but does not depend on the ids of the nodes,
+        so isomorphic graphs have equal fingerprints. The fingerprint
+        is stable across Python processes and can be used, for example,
+        to deduplicate graphs (graphs with equal fingerprints are
+        isomorphic with high probability, but not necessarily).
+
+        Returns
+        -------
+        fingerprint : str
+            Hexadecimal fingerprint of the graph
+        """
+        revision = getattr(self, "_revision", None)
+        cached = getattr(self, "_fingerprint", None)
+        if revision is not None and cached is not None and\
+                cached[0] == revision:
+            return cached[1]
+        fingerprint, _ = wl_fingerprint(
+            {
+                n: attrs_fingerprint(attrs)
+                for n, attrs in self.nodes(data=True)
+            },
+            [
+                (s, t, attrs_fingerprint(attrs))
+                for s, t, attrs in self.edges(data=True)
+            ])
+        if revision is not None:
+            self._fingerprint = (revision, fingerprint)
+        return fingerprint
+
+    def get_neighbourhoods(self, nodes):
+        """Get the incident edges of a collection of nodes.
+
+        Parameters
+        ----------
+        nodes : iterable
+            Collection of node ids
+
+        Returns
+        -------
+        successors : dict
+            Dictionary whose keys are the input nodes and whose values
+            are dictionaries mapping successors of the nodes to the
+            attributes of the corresponding edges
+        predecessors : dict
+            Dictionary whose keys are the input nodes and whose values
+            are dictionaries mapping predecessors of the nodes to the
+            attributes of the corresponding edges
+        """
+        successors = dict()
+        predecessors = dict()
+        for n in nodes:
+            successors[n] = {
+                s: self.get_edge(n, s) for s in self.successors(n)
+            }
+            predecessors[n] = {
+                p: self.get_edge(p, n) for p in self.predecessors(n)
+            }
+        return successors, predecessors
+
     def add_nodes_from(self, node_list):
         """Add nodes from a node list.
 
@@ -739,6 +844,7 @@ class Graph(ABC):
             raise ReGraphError(
                 "Attempt to relabel nodes failed: the IDs are not unique!")
 
+        log = self._transaction_log()
         temp_names = {}
         # Relabeling of the nodes: if at some point new ID conflicts
         # with already existing ID - assign temp ID
@@ -750,10 +856,14 @@ class Graph(ABC):
                     new_name = self.generate_new_node_id(value)
                     temp_names[new_name] = value
                 self.relabel_node(key, new_name)
+                if log is not None:
+                    log.entries.append(("relabel_node", key, new_name))
         # Relabeling the nodes with the temp ID to their new IDs
         for key, value in temp_names.items():
             if key != value:
                 self.relabel_node(key, value)
+                if log is not None:
+                    log.entries.append(("relabel_node", key, value))
         return
 
     def generate_new_node_id(self, basename):
@@ -923,7 +1033,7 @@ class Graph(ABC):
                     filename)
             )
 
-    def rewrite(self, rule, instance=None):
+    def rewrite(self, rule, instance=None, record_undo=False):
         """Perform SqPO rewiting of the graph with a rule.
 
         Parameters
@@ -934,89 +1044,342 @@ class Graph(ABC):
             Instance of the input rule. If not specified,
             the identity map of the rule's left-hand side
             is used
+        record_undo : bool, optional
+            If True, the primitive changes performed by the rewriting
+            are recorded in an undo log (see `undo`)
 
+        Returns
+        -------
+        rhs_instance : dict
+            Instance of the right-hand side of the rule
+        undo_log : regraph.graphs.UndoLog
+            Log of the changes (returned only if `record_undo`
+            is True)
         """
         if instance is None:
             instance = {
-                n: n for n in self.lhs.nodes()
+                n: n for n in rule.lhs.nodes()
             }
+        if not record_undo:
+            return self.apply_program(rule.compile(), instance)
+        log = UndoLog()
+        rhs_instance = self.apply_program(rule.compile(), instance, log)
+        return rhs_instance, log
 
-        # Restrictive phase
-        p_g = dict()
-        cloned_lhs_nodes = set()
+    def apply_program(self, program, instance, log=None):
+        """Apply a compiled rule to its instance.
 
-        # Clone nodes
-        for lhs, p_nodes in rule.cloned_nodes().items():
-            for i, p in enumerate(p_nodes):
-                if i == 0:
-                    p_g[p] = instance[lhs]
-                    cloned_lhs_nodes.add(lhs)
-                else:
-                    clone_id = self.clone_node(instance[lhs])
-                    p_g[p] = clone_id
-
-        # Delete nodes and add preserved nodes to p_g dictionary
-        removed_nodes = rule.removed_nodes()
-        for n in rule.lhs.nodes():
-            if n in removed_nodes:
-                self.remove_node(instance[n])
-            elif n not in cloned_lhs_nodes:
-                p_g[keys_by_value(rule.p_lhs, n)[0]] =\
-                    instance[n]
-
-        # Delete edges
-        for u, v in rule.removed_edges():
-            self.remove_edge(p_g[u], p_g[v])
-
-        # Remove node attributes
-        for p_node, attrs in rule.removed_node_attrs().items():
-            self.remove_node_attrs(
-                p_g[p_node],
-                attrs)
-
-        # Remove edge attributes
-        for (u, v), attrs in rule.removed_edge_attrs().items():
-            self.remove_edge_attrs(p_g[u], p_g[v], attrs)
-
-        # Expansive phase
-        rhs_g = dict()
-        merged_nodes = set()
-
-        # Merge nodes
-        for rhs, p_nodes in rule.merged_nodes().items():
-            merge_id = self.merge_nodes(
-                [p_g[p] for p in p_nodes])
-            merged_nodes.add(rhs)
-            rhs_g[rhs] = merge_id
-
-        # Add nodes and add preserved nodes to rhs_g dictionary
-        added_nodes = rule.added_nodes()
-        for n in rule.rhs.nodes():
-            if n in added_nodes:
-                if n in self.nodes():
-                    new_id = self.generate_new_node_id(n)
+        Parameters
+        ----------
+        program : regraph.rules.RuleProgram
+            Program produced by `regraph.Rule.compile`
+            (or its inverse)
+        instance : dict
+            Instance of the left-hand side of the compiled rule
+        log : regraph.graphs.UndoLog, optional
+            Undo log where the performed changes are recorded
+
+        Returns
+        -------
+        rhs_instance : dict
+            Instance of the right-hand side of the compiled rule
+        """
+        transaction_log = self._transaction_log()
+        if log is None:
+            log = transaction_log
+        registers = self._rewrite_restrictive(program, instance, log)
+        rhs_instance = self._rewrite_expansive(program, registers, log)
+        if transaction_log is not None and log is not transaction_log:
+            transaction_log.entries.extend(log.entries)
+        return rhs_instance
+
+    def _transaction_log(self):
+        """Get the undo log of the innermost open transaction."""
+        logs = getattr(self, "_transaction_logs", None)
+        if logs:
+            return logs[-1]
+        return None
+
+    @contextmanager
+    def transaction(self):
+        """Open a transaction undoing the rewritings on errors.
+
+        The changes performed by the rewritings of the graph
+        (`rewrite`, `apply_program` and `rewrite_all`) and by
+        `relabel_nodes` inside the `with` block are recorded in an
+        undo log. If the block raises
+        an exception, the changes are undone and the exception is
+        propagated. The log is returned by the context manager, so the
+        changes can also be undone explicitly, for example::
+
+            with graph.transaction() as log:
+                graph.rewrite(rule, instance)
+                if not is_valid(graph):
+                    graph.undo(log)
+
+        Transactions can be nested, the changes of a committed inner
+        transaction are undone if the outer one fails.
+        """
+        logs = getattr(self, "_transaction_logs", None)
+        if logs is None:
+            logs = []
+            self._transaction_logs = logs
+        log = UndoLog()
+        logs.append(log)
+        try:
+            yield log
+        except BaseException:
+            logs.pop()
+            self.undo(log)
+            raise
+        logs.pop()
+        if len(logs) > 0:
+            logs[-1].entries.extend(log.entries)
+
+    def undo(self, log):
+        """Undo the changes recorded in a log.
+
+        The changes are undone in the reverse order, restoring the
+        graph to its state preceding them (nodes removed by the
+        changes are restored with their original ids, attributes
+        and incident edges). The log is emptied.
+
+        Parameters
+        ----------
+        log : regraph.graphs.UndoLog
+            Log produced by `rewrite` or `transaction`
+        """
+        for entry in reversed(log.entries):
+            name = entry[0]
+            if name == "clone" or name == "add_node":
+                self.remove_node(entry[-1])
+            elif name == "remove_node":
+                self._restore_nodes([entry[1:]])
+            elif name == "remove_edge":
+                _, s, t, attrs = entry
+                self.add_edge(s, t, attrs)
+            elif name == "merge":
+                _, merged_node, nodes = entry
+                self.remove_node(merged_node)
+                self._restore_nodes(nodes)
+            elif name == "add_edge":
+                self.remove_edge(entry[1], entry[2])
+            elif name == "node_attrs":
+                self.update_node_attrs(entry[1], entry[2], normalize=False)
+            elif name == "edge_attrs":
+                self.update_edge_attrs(
+                    entry[1], entry[2], entry[3], normalize=False)
+            elif name == "relabel_node":
+                self.relabel_node(entry[2], entry[1])
+        log.entries = []
+
+    def _restore_nodes(self, nodes):
+        """Restore removed nodes with their attributes and edges."""
+        for node, attrs, _, _ in nodes:
+            self.add_node(node, attrs)
+        for node, _, successors, predecessors in nodes:
+            for s, attrs in successors.items():
+                if not self.exists_edge(node, s):
+                    self.add_edge(node, s, attrs)
+            for p, attrs in predecessors.items():
+                if not self.exists_edge(p, node):
+                    self.add_edge(p, node, attrs)
+
+    def _removed_nodes_entries(self, nodes):
+        """Get the undo log records of nodes to remove."""
+        successors, predecessors = self.get_neighbourhoods(nodes)
+        return [
+            (
+                n, safe_deepcopy_dict(self.get_node(n)),
+                safe_deepcopy_dict(successors[n]),
+                safe_deepcopy_dict(predecessors[n])
+            )
+            for n in nodes
+        ]
+
+    def rewrite_all(self, rule, instances, policy="non_overlapping"):
+        """Rewrite the graph with a rule applied to many instances.
+
+        Parameters
+        ----------
+        rule : regraph.Rule
+            SqPO rewriting rule
+        instances : iterable of dict
+            Instances of the rule in the graph (for example, produced
+            by `find_matching`)
+        policy : str, optional
+            Policy of the selection of the instances to apply:
+
+            - `"non_overlapping"` (default): instances whose images
+              overlap with the image of some previous instance are
+              skipped, the remaining instances are rewritten one by one:
+              the restrictive parts of all of them, then their expansive
+              parts (this method performs one rewriting per instance,
+              backends may override it with batched rewriting, see
+              `regraph.backends.neo4j.graphs.Neo4jGraph.rewrite_all`);
+            - `"sequential"`: instances are applied one by one,
+              instances invalidated by the previous rewritings
+              (whose nodes, edges or attributes no longer exist) are
+              skipped.
+
+        Returns
+        -------
+        rhs_instances : dict
+            Dictionary whose keys are the positions of the applied
+            instances in `instances` and whose values are the
+            corresponding instances of the right-hand side of the rule
+
+        Raises
+        ------
+        ReGraphError
+            If the policy is unknown
+        """
+        instances = list(instances)
+        program = rule.compile()
+        rhs_instances = dict()
+        if policy == "non_overlapping":
+            selected = select_non_overlapping(instances)
+            log = self._transaction_log()
+            registers = dict()
+            for i in selected:
+                registers[i] = self._rewrite_restrictive(
+                    program, instances[i], log)
+            for i in selected:
+                rhs_instances[i] = self._rewrite_expansive(
+                    program, registers[i], log)
+        elif policy == "sequential":
+            for i, instance in enumerate(instances):
+                if self._is_valid_instance(rule.lhs, instance):
+                    rhs_instances[i] = self.apply_program(program, instance)
+        else:
+            raise ReGraphError(
+                "Unknown rewriting policy '{}'".format(policy))
+        return rhs_instances
+
+    def _is_valid_instance(self, pattern, instance):
+        """Test if the instance of a pattern is present in the graph."""
+        if len(set(instance.values())) != len(instance):
+            return False
+        for node, graph_node in instance.items():
+            if graph_node not in self.nodes() or not valid_attributes(
+                    pattern.get_node(node), self.get_node(graph_node)):
+                return False
+        for s, t in pattern.edges():
+            if not self.exists_edge(instance[s], instance[t]) or\
+                    not valid_attributes(
+                        pattern.get_edge(s, t),
+                        self.get_edge(instance[s], instance[t])):
+                return False
+        return True
+
+    def _rewrite_restrictive(self, program, instance, log=None):
+        """Apply the restrictive part of a compiled rule to its instance.
+
+        If `log` is specified, the changes are recorded in this
+        undo log.
+
+        Returns
+        -------
+        registers : list
+            Registers of the program (the registers of the nodes
+            of the interface of the rule are assigned)
+        """
+        registers = [None] * program.n_registers
+        for node, r in program.inputs:
+            registers[r] = instance[node]
+
+        for op in program.restrictive:
+            name = op[0]
+            if name == "clone":
+                _, r, targets = op
+                registers[targets[0]] = registers[r]
+                for t in targets[1:]:
+                    registers[t] = self.clone_node(registers[r])
+                    if log is not None:
+                        log.entries.append(
+                            ("clone", registers[r], registers[t]))
+            elif name == "remove_node":
+                node = registers[op[1]]
+                if log is not None:
+                    log.entries.append(
+                        ("remove_node",) +
+                        self._removed_nodes_entries([node])[0])
+                self.remove_node(node)
+            elif name == "remove_edge":
+                s, t = registers[op[1]], registers[op[2]]
+                if log is not None:
+                    log.entries.append((
+                        "remove_edge", s, t,
+                        safe_deepcopy_dict(self.get_edge(s, t))))
+                self.remove_edge(s, t)
+            elif name == "remove_node_attrs":
+                node = registers[op[1]]
+                if log is not None:
+                    log.entries.append((
+                        "node_attrs", node,
+                        safe_deepcopy_dict(self.get_node(node))))
+                self.remove_node_attrs(node, op[2])
+            elif name == "remove_edge_attrs":
+                s, t = registers[op[1]], registers[op[2]]
+                if log is not None:
+                    log.entries.append((
+                        "edge_attrs", s, t,
+                        safe_deepcopy_dict(self.get_edge(s, t))))
+                self.remove_edge_attrs(s, t, op[3])
+        return registers
+
+    def _rewrite_expansive(self, program, registers, log=None):
+        """Apply the expansive part of a compiled rule.
+
+        If `log` is specified, the changes are recorded in this
+        undo log.
+
+        Returns
+        -------
+        rhs_instance : dict
+            Instance of the right-hand side of the rule
+        """
+        for op in program.expansive:
+            name = op[0]
+            if name == "merge":
+                _, r, sources = op
+                if len(sources) == 1:
+                    registers[r] = registers[sources[0]]
                 else:
-                    new_id = n
-                new_id = self.add_node(new_id)
-                rhs_g[n] = new_id
-            elif n not in merged_nodes:
-                rhs_g[n] = p_g[keys_by_value(rule.p_rhs, n)[0]]
-
-        # Add edges
-        for u, v in rule.added_edges():
-            if (rhs_g[u], rhs_g[v]) not in self.edges():
-                self.add_edge(rhs_g[u], rhs_g[v])
-
-        # Add node attributes
-        for rhs_node, attrs in rule.added_node_attrs().items():
-            self.add_node_attrs(
-                rhs_g[rhs_node], attrs)
-
-        # Add edge attributes
-        for (u, v), attrs in rule.added_edge_attrs().items():
-            self.add_edge_attrs(
-                rhs_g[u], rhs_g[v], attrs)
-        return rhs_g
+                    nodes = [registers[source] for source in sources]
+                    if log is not None:
+                        entries = self._removed_nodes_entries(nodes)
+                    registers[r] = self.merge_nodes(nodes)
+                    if log is not None:
+                        log.entries.append(("merge", registers[r], entries))
+            elif name == "add_node":
+                _, r, node_id = op
+                if node_id in self.nodes():
+                    node_id = self.generate_new_node_id(node_id)
+                registers[r] = self.add_node(node_id)
+                if log is not None:
+                    log.entries.append(("add_node", registers[r]))
+            elif name == "add_edge":
+                s, t = registers[op[1]], registers[op[2]]
+                if not self.exists_edge(s, t):
+                    self.add_edge(s, t)
+                    if log is not None:
+                        log.entries.append(("add_edge", s, t))
+            elif name == "add_node_attrs":
+                node = registers[op[1]]
+                if log is not None:
+                    log.entries.append((
+                        "node_attrs", node,
+                        safe_deepcopy_dict(self.get_node(node))))
+                self.add_node_attrs(node, op[2])
+            elif name == "add_edge_attrs":
+                s, t = registers[op[1]], registers[op[2]]
+                if log is not None:
+                    log.entries.append((
+                        "edge_attrs", s, t,
+                        safe_deepcopy_dict(self.get_edge(s, t))))
+                self.add_edge_attrs(s, t, op[3])
+        return {node: registers[r] for node, r in program.outputs}
 
     def number_of_edges(self, u, v):
         """Return number of directed edges from u to v."""
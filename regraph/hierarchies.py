@@ -9,8 +9,14 @@ undirected edges or, alternatively, spans).
 """
 
 from abc import ABC, abstractmethod
+from concurrent.futures import (Executor,
+                                ThreadPoolExecutor,
+                                ProcessPoolExecutor,
+                                wait)
+from contextlib import contextmanager
 import copy
 import json
+import threading
 
 import os
 
@@ -33,10 +39,26 @@ from regraph.rules import Rule
 from regraph.utils import (attrs_from_json,
                            attrs_to_json,
                            keys_by_value,
+                           keys_by_values,
                            normalize_typing_relation,
                            test_strictness)
 
 
+def _create_propagation_pool(executor):
+    """Create a pool of workers propagating changes in a hierarchy."""
+    if executor is None or executor == "serial":
+        return None, False
+    if isinstance(executor, ProcessPoolExecutor) or executor == "process":
+        raise ReGraphError(
+            "Changes are propagated to the graphs of a hierarchy in "
+            "place, they cannot be propagated in a pool of processes")
+    if isinstance(executor, Executor):
+        return executor, False
+    if executor == "thread":
+        return ThreadPoolExecutor(), True
+    raise ReGraphError("Unknown executor '{}'".format(executor))
+
+
 class Hierarchy(ABC):
     """Abstract class for graph hierarchy objects in ReGraph.
 
@@ -44,6 +66,10 @@ class Hierarchy(ABC):
     edges are homomorphisms representing graph typing in the system.
     """
 
+    # Lock of the state shared by the graphs of the hierarchy, set
+    # while changes are propagated by a pool of workers
+    _propagation_lock = None
+
     @abstractmethod
     def graphs(self, data=False):
         """Return a list of graphs in the hierarchy."""
@@ -249,6 +275,86 @@ class Hierarchy(ABC):
         """
         pass
 
+    @contextmanager
+    def defer_checks(self):
+        """Context deferring the checks of commutativity of typings.
+
+        Backends able to check the typings added inside the context
+        at once override this method, by default the checks are
+        performed by every `add_typing`.
+        """
+        yield
+
+    def add_typings_from(self, typings):
+        """Add typings to the hierarchy.
+
+        All the typings are validated before an error is raised, the
+        error then reports all the invalid typings and none of the
+        typings is added.
+
+        Parameters
+        ----------
+        typings : iterable
+            Typings given by tuples `(source, target, mapping)` or
+            `(source, target, mapping, attrs)`
+
+        Raises
+        ------
+        HierarchyError
+            If some of the typings cannot be added (see `add_typing`)
+        """
+        added = []
+        errors = []
+        for typing_data in typings:
+            source, target = typing_data[:2]
+            try:
+                self.add_typing(*typing_data)
+                added.append((source, target))
+            except (HierarchyError, InvalidHomomorphism) as e:
+                errors.append("'{}->{}': {}".format(source, target, e))
+        if len(errors) > 0:
+            for source, target in added:
+                self.remove_typing(source, target)
+            raise HierarchyError(
+                "Invalid typings:\n" + "\n".join(errors))
+
+    def bulk_load(self, graphs=None, typings=None, relations=None):
+        """Add graphs, typings and relations to the hierarchy.
+
+        The graphs are added first, then the typings are added and
+        validated at once (see `add_typings_from`), finally the
+        relations are added.
+
+        Parameters
+        ----------
+        graphs : dict or iterable, optional
+            Dictionary whose keys are ids of the graphs and whose
+            values are graph objects, or tuples `(graph_id, graph)`
+            or `(graph_id, graph, attrs)`
+        typings : iterable, optional
+            Tuples `(source, target, mapping)` or
+            `(source, target, mapping, attrs)`
+        relations : iterable, optional
+            Tuples `(left, right, relation)` or
+            `(left, right, relation, attrs)`
+
+        Raises
+        ------
+        HierarchyError
+            If some of the typings cannot be added (all of them are
+            reported), or if a graph or a relation cannot be added
+        """
+        if graphs is not None:
+            if isinstance(graphs, dict):
+                graphs = graphs.items()
+            for graph_data in graphs:
+                self.add_graph(*graph_data)
+        if typings is not None:
+            self.add_typings_from(typings)
+        if relations is not None:
+            for relation_data in relations:
+                self.add_relation(*relation_data)
+
     @abstractmethod
     def add_relation(self, left, right, relation, attrs=None):
         """Add relation to the hierarchy.
@@ -492,7 +598,7 @@ class Hierarchy(ABC):
             json_data["typing"].append({
                 "from": s_id,
                 "to": t_id,
-                "mapping": self.get_typing(s, t),
+                "mapping": dict(self.get_typing(s, t)),
                 "attrs": attrs_to_json(attrs)
             })
 
@@ -562,7 +668,8 @@ class Hierarchy(ABC):
                 hierarchy.add_graph_from_json(
                     graph_data["id"], graph_data["graph"], attrs)
 
-        # add typing
+        # add typing (validated once all the typings are added)
+        typings = []
         for typing_data in json_data["typing"]:
             if ignore is not None and\
                "typing" in ignore.keys() and\
@@ -573,11 +680,12 @@ class Hierarchy(ABC):
                     attrs = dict()
                 else:
                     attrs = attrs_from_json(typing_data["attrs"])
-                hierarchy.add_typing(
+                typings.append((
                     typing_data["from"],
                     typing_data["to"],
                     typing_data["mapping"],
-                    attrs)
+                    attrs))
+        hierarchy.add_typings_from(typings)
 
         # add relations
         for relation_data in json_data["relations"]:
@@ -672,7 +780,7 @@ class Hierarchy(ABC):
             if pred in ancestors.keys():
                 ancestors.update(pred_ancestors)
             else:
-                ancestors[pred] = typing
+                ancestors[pred] = dict(typing)
             for anc, anc_typing in pred_ancestors.items():
                 if anc in ancestors.keys():
                     ancestors[anc].update(compose(anc_typing, typing))
@@ -680,6 +788,16 @@ class Hierarchy(ABC):
                     ancestors[anc] = compose(anc_typing, typing)
         return ancestors
 
+    def _scoped_typing(self, source, target):
+        """Get a copy of the typing between two graphs.
+
+        The graphs are not necessarily adjacent, the typing is then
+        composed along the shortest path between them.
+        """
+        if (source, target) in self.edges():
+            return dict(self.get_typing(source, target))
+        return self.compose_path_typing(self.shortest_path(source, target))
+
     def get_descendants(self, graph_id, maybe=None):
         """Return descendants of a graph with the typing morphisms."""
         descendants = dict()
@@ -689,7 +807,7 @@ class Hierarchy(ABC):
             if successor in descendants.keys():
                 descendants[successor].update(mapping)
             else:
-                descendants[successor] = mapping
+                descendants[successor] = dict(mapping)
             for anc, typ in typing_descendants.items():
                 if anc in descendants.keys():
                     descendants[anc].update(compose(mapping, typ))
@@ -737,8 +855,47 @@ class Hierarchy(ABC):
             )
         return homomorphism
 
+    def _lift_rule(self, graph_id, origin_id, rule, instance,
+                   origin_typing):
+        """Compute the canonical lifting of a rule to an ancestor.
+
+        Returns the left-hand side `l_g` of the lifting with its maps
+        to the ancestor and to the left-hand side of the rule, and the
+        canonical interface `p_g` with its maps to `l_g` and to the
+        interface of the rule (the results may be modified in-place
+        by the caller).
+        """
+        l_g, l_g_g, l_g_l = pullback(
+            self.get_graph(graph_id),
+            rule.lhs,
+            self.get_graph(origin_id),
+            origin_typing,
+            instance)
+        canonical_p_g, p_g_l_g, p_g_p = pullback(
+            l_g, rule.p, rule.lhs, l_g_l, rule.p_lhs)
+        return l_g, l_g_g, l_g_l, canonical_p_g, p_g_l_g, p_g_p
+
+    def _project_rule(self, graph_id, rule, instance, origin_typing):
+        """Compute the canonical projection of a rule to a descendant.
+
+        Returns the left-hand side `l_t` of the projection with its
+        maps from the left-hand side of the rule and to the descendant,
+        and the canonical right-hand side `r_t` with the maps to it
+        from `l_t` and from the right-hand side of the rule (the
+        results may be modified in-place by the caller).
+        """
+        l_t, l_l_t, l_t_t = image_factorization(
+            rule.lhs, self.get_graph(graph_id),
+            compose(instance, origin_typing))
+        r_t, l_t_r_t, r_r_t = pushout(
+            rule.p, l_t, rule.rhs,
+            compose(rule.p_lhs, l_l_t),
+            rule.p_rhs)
+        return l_t, l_l_t, l_t_t, r_t, l_t_r_t, r_r_t
+
     def get_rule_hierarchy(self, origin_id, rule, instance=None,
-                           p_typing=None, rhs_typing=None):
+                           p_typing=None, rhs_typing=None,
+                           graphs=None):
         """Find rule hierarchy corresponding to the input rewriting.
 
         Parameters
@@ -761,6 +918,12 @@ class Hierarchy(ABC):
             containing individual relations between the right-hand
             side of the rule and the nodes of a given
             descendant
+        graphs : collection, optional
+            Ids of the ancestors and descendants of the rewritten
+            graph to which the rule is propagated, by default the
+            rule is propagated to all of them (only the typings of
+            the listed graphs are then composed)
+
         Returns
         -------
         rule_hierarchy : dictionary
@@ -783,22 +946,28 @@ class Hierarchy(ABC):
         l_g_ls = {}  # LHS's of rule liftings to LHS of the original rule
         p_g_ps = {}  # interfaces of rule liftings to LHS of the original rule
 
-        ancestors = self.get_ancestors(origin_id)
-        descendants = self.get_descendants(origin_id)
+        if graphs is None:
+            ancestors = self.get_ancestors(origin_id)
+            descendants = self.get_descendants(origin_id)
+        else:
+            # Compose the typings only for the listed graphs
+            ancestors = {
+                a: self._scoped_typing(a, origin_id)
+                for a in self.bfs_tree(origin_id, reverse=True)
+                if a in graphs
+            }
+            descendants = {
+                d: self._scoped_typing(origin_id, d)
+                for d in self.bfs_tree(origin_id)
+                if d in graphs
+            }
 
         # Compute rule liftings
         for ancestor, origin_typing in ancestors.items():
-            # Compute L_G
-            l_g, l_g_g, l_g_l = pullback(
-                self.get_graph(ancestor),
-                rule.lhs,
-                self.get_graph(origin_id),
-                origin_typing,
-                instance)
-
-            # Compute canonical P_G
-            canonical_p_g, p_g_l_g, p_g_p = pullback(
-                l_g, rule.p, rule.lhs, l_g_l, rule.p_lhs)
+            # Compute L_G and canonical P_G
+            (l_g, l_g_g, l_g_l,
+             canonical_p_g, p_g_l_g, p_g_p) = self._lift_rule(
+                ancestor, origin_id, rule, instance, origin_typing)
 
             # Remove controlled things from P_G
             if ancestor in p_typing.keys():
@@ -835,16 +1004,9 @@ class Hierarchy(ABC):
 
         # Compute rule projections
         for descendant, origin_typing in descendants.items():
-            # Compute canonical P_T
-            l_t, l_l_t, l_t_t = image_factorization(
-                rule.lhs, self.get_graph(descendant),
-                compose(instance, origin_typing))
-
-            # Compute canonical R_T
-            r_t, l_t_r_t, r_r_t = pushout(
-                rule.p, l_t, rule.rhs,
-                compose(rule.p_lhs, l_l_t),
-                rule.p_rhs)
+            # Compute canonical P_T and R_T
+            l_t, l_l_t, l_t_t, r_t, l_t_r_t, r_r_t = self._project_rule(
+                descendant, rule, instance, origin_typing)
 
             # Modify P_T and R_T according to the controlling
             # relation rhs_typing
@@ -1360,7 +1522,8 @@ class Hierarchy(ABC):
                     self.get_typing(p, g))
                 visited.add((p, g))
 
-    def relation_to_span(self, left, right, edges=False, attrs=False):
+    def relation_to_span(self, left, right, edges=False, attrs=False,
+                         sparse=False):
         """Convert relation to a span.
 
         This method computes the span of the form
@@ -1380,6 +1543,9 @@ class Hierarchy(ABC):
         attrs : bool, optional
             If True, maximal dict of attrs is added to the nodes of
             the common part graph
+        sparse : bool, optional
+            If True, the span is computed from the CSR representation
+            of the relation (see `regraph.dense.SparseRelation`)
 
         Returns
         -------
@@ -1418,7 +1584,8 @@ class Hierarchy(ABC):
             self.get_graph(right),
             self.get_relation(left, right),
             edges,
-            attrs)
+            attrs,
+            sparse)
         return common, left_h, right_h
 
     def _get_graph_pattern_typing(self, graph_id, pattern, pattern_typing,
@@ -1502,7 +1669,8 @@ class Hierarchy(ABC):
         return instances
 
     def rewrite(self, graph_id, rule, instance,
-                p_typing=None, rhs_typing=None, strict=False):
+                p_typing=None, rhs_typing=None, strict=False,
+                executor=None):
         """Rewrite and propagate the changes backward & forward.
 
         Rewriting in the hierarchy cosists of an application of the
@@ -1545,6 +1713,13 @@ class Hierarchy(ABC):
             some graph, e.g. if we want to perform merging of some types, etc).
         strict : bool, optional
             Rewriting is strict when propagation down is not allowed
+        executor : str or concurrent.futures.Executor, optional
+            Pool of workers propagating the changes: `"thread"`,
+            `"serial"` or an executor object. Graphs are grouped in
+            waves (see `_propagation_waves`), the changes are propagated
+            to the graphs of the same wave by the workers of the pool.
+            By default, the changes are propagated sequentially.
+            The result does not depend on the executor.
 
         Raises
         ------
@@ -1552,120 +1727,490 @@ class Hierarchy(ABC):
             If the graph is not in the database
         RewritingError
             If the provided p and rhs typing are inconsistent
+        ReGraphError
+            If the executor is unknown or is a pool of processes
         """
+        pool, owned = _create_propagation_pool(executor)
+
         # Type check the input rule, its instance and typing
         instance, p_typing, rhs_typing = self._check_rule_instance_typing(
             graph_id, rule, instance, p_typing, rhs_typing, strict)
 
-        # Perform a restrictive rewrite
-        p_g_m, g_m_g = self._restrictive_rewrite(graph_id, rule, instance)
+        try:
+            # Perform a restrictive rewrite
+            p_g_m, g_m_g = self._restrictive_rewrite(
+                graph_id, rule, instance)
 
-        # Propagate backward and fix broken homomorphisms
-        self._propagate_backward(
-            graph_id, rule, instance, p_g_m, g_m_g, p_typing)
+            # Propagate backward and fix broken homomorphisms
+            self._propagate_backward(
+                graph_id, rule, instance, p_g_m, g_m_g, p_typing, pool)
 
-        # Propagate forward and fix broken homomorphisms
-        rhs_g_prime = self._expansive_rewrite_and_propagate_forward(
-            graph_id, rule, instance, p_g_m, rhs_typing)
+            # Propagate forward and fix broken homomorphisms
+            rhs_g_prime = self._expansive_rewrite_and_propagate_forward(
+                graph_id, rule, instance, p_g_m, rhs_typing, pool)
+        finally:
+            if owned:
+                pool.shutdown()
 
         return rhs_g_prime
 
+    def plan_rewrite(self, graph_id, rule, instance=None,
+                     p_typing=None, rhs_typing=None):
+        """Estimate the changes of a rewrite without performing it.
+
+        The changes propagated to the ancestors and to the descendants
+        of the rewritten graph are estimated from the preimages and the
+        images of the nodes of the instance (full typings are not
+        composed and the rule is not lifted or projected): a node of
+        an ancestor is removed or cloned as the node of the instance
+        typing it (unless it is controlled by `p_typing`), the nodes
+        of a descendant typing the nodes merged by the rule (or typing
+        the same node of the rhs in `rhs_typing`) are merged, and the
+        nodes added by the rule and not typed by `rhs_typing` are
+        added to every descendant. Nothing is modified.
+
+        Parameters
+        ----------
+        graph_id
+            Id of the graph in the hierarchy to rewrite
+        rule : regraph.rule.Rule
+            Rule object to apply
+        instance : dict, optional
+            Instance of the lhs of the rule in the graph, by default,
+            the identity of the nodes of the lhs
+        p_typing : dict, optional
+            Typing of the ancestors by the interface of the rule
+            (see `rewrite`)
+        rhs_typing : dict, optional
+            Typing of the rhs by the descendants (see `rewrite`)
+
+        Returns
+        -------
+        plan : dict
+            Dictionary with the keys `"affected_graphs"` (the set of
+            graphs changed by the rewrite, graphs to which the rule
+            adds edges or attributes are included if they type the
+            instance), `"changes"` (a dictionary from the affected
+            graphs to the estimated numbers of nodes created by cloning
+            (`"clones"`), removed (`"removals"`), merged into other
+            nodes (`"merges"`) and added (`"additions"`)),
+            `"affected_rules"` and `"rule_changes"` (the same for the
+            rules typed by the ancestors, their numbers cover the nodes
+            of both the lhs and the rhs) and `"cost"` (a rough number
+            of node operations: the sizes of the affected graphs and
+            rules, which are scanned by propagation, and the numbers
+            of their changed nodes)
 
-    def apply_rule_hierarchy(self, rule_hierarchy, instances):
+        Raises
+        ------
+        HierarchyError
+            If the graph is not in the database
+        RewritingError
+            If the provided p and rhs typing are inconsistent
+        """
+        instance, p_typing, rhs_typing = self._check_rule_instance_typing(
+            graph_id, rule, instance, p_typing, rhs_typing, False)
+        rule_changes = rule.changes()
+        lhs_nodes = {v: k for k, v in instance.items()}
+
+        changes = {
+            graph_id: {
+                "clones": sum(
+                    len(p_nodes) - 1
+                    for p_nodes in rule_changes.cloned_nodes.values()),
+                "removals": len(rule_changes.removed_nodes),
+                "merges": sum(
+                    len(p_nodes) - 1
+                    for p_nodes in rule_changes.merged_nodes.values()),
+                "additions": len(rule_changes.added_nodes)
+            }
+        }
+
+        # Nodes of the lhs whose instances lose attributes or edges
+        updated_lhs_nodes = set(
+            rule.p_lhs[p] for p in rule_changes.removed_node_attrs)
+        for s, t in rule_changes.removed_edges:
+            updated_lhs_nodes.update([rule.p_lhs[s], rule.p_lhs[t]])
+        for s, t in rule_changes.removed_edge_attrs:
+            updated_lhs_nodes.update([rule.p_lhs[s], rule.p_lhs[t]])
+
+        affected = {graph_id}
+        affected_rules = set()
+        rule_changes_by_id = dict()
+        ancestors, rules = self._plan_typed_nodes(
+            graph_id, instance.values(), backward=True)
+        for ancestor, preimages in ancestors.items():
+            ancestor_changes = {
+                "clones": 0, "removals": 0, "merges": 0, "additions": 0}
+            updated = False
+            for node, origin_node in preimages.items():
+                lhs_node = lhs_nodes[origin_node]
+                if ancestor not in rules and ancestor in p_typing and\
+                        node in p_typing[ancestor]:
+                    n_p_nodes = len(p_typing[ancestor][node])
+                else:
+                    n_p_nodes = len(
+                        rule_changes.lhs_preimages.get(lhs_node, []))
+                if n_p_nodes == 0:
+                    ancestor_changes["removals"] += 1
+                else:
+                    ancestor_changes["clones"] += n_p_nodes - 1
+                updated = updated or n_p_nodes != 1 or\
+                    lhs_node in updated_lhs_nodes
+            if updated and ancestor in rules:
+                affected_rules.add(ancestor)
+                rule_changes_by_id[ancestor] = ancestor_changes
+            elif updated:
+                affected.add(ancestor)
+                changes[ancestor] = ancestor_changes
+
+        adds_edges_or_attrs = (
+            len(rule_changes.added_edges) > 0 or
+            len(rule_changes.added_node_attrs) > 0 or
+            len(rule_changes.added_edge_attrs) > 0
+        )
+        descendants, _ = self._plan_typed_nodes(
+            graph_id, instance.values(), backward=False)
+        for descendant, images in descendants.items():
+            descendant_changes = {
+                "clones": 0, "removals": 0, "merges": 0, "additions": 0}
+            typing = rhs_typing.get(descendant, dict())
+            for rhs_node in rule.rhs.nodes():
+                nodes = set(typing.get(rhs_node, set()))
+                for p_node in rule_changes.rhs_preimages.get(rhs_node, []):
+                    nodes.add(images[instance[rule.p_lhs[p_node]]])
+                if len(nodes) == 0:
+                    descendant_changes["additions"] += 1
+                else:
+                    descendant_changes["merges"] += len(nodes) - 1
+            if adds_edges_or_attrs or\
+                    any(v > 0 for v in descendant_changes.values()):
+                affected.add(descendant)
+                changes[descendant] = descendant_changes
+
+        cost = 0
+        for g in affected:
+            cost += len(self.get_graph(g).nodes())
+            cost += sum(changes[g].values())
+        for r in affected_rules:
+            cost += rules[r] + sum(rule_changes_by_id[r].values())
+
+        return {
+            "affected_graphs": affected,
+            "changes": changes,
+            "affected_rules": affected_rules,
+            "rule_changes": rule_changes_by_id,
+            "cost": cost
+        }
+
+    def _plan_typed_nodes(self, graph_id, nodes, backward):
+        """Follow the nodes of a graph along the typings (see `plan_rewrite`).
+
+        If `backward` is True, returns a dictionary from the ancestors
+        of the graph to the dictionaries from their nodes typed by
+        `nodes` to these nodes, otherwise a dictionary from the
+        descendants of the graph to the dictionaries from `nodes` to
+        their types. Only the preimages (images) of `nodes` are kept
+        when following the typings, an ancestor none of whose nodes
+        is typed by `nodes` is not included. Rules typed by the
+        ancestors (whose typings are pairs of typings of their lhs and
+        rhs) are included with the nodes of their lhs and rhs (as
+        pairs `("lhs", node)` and `("rhs", node)`), the second returned
+        value is a dictionary from the rules to the numbers of typed
+        nodes of their lhs and rhs.
+        """
+        typed_nodes = {graph_id: {n: n for n in nodes}}
+        rules = dict()
+        to_visit = [graph_id]
+        while len(to_visit) > 0:
+            current = to_visit.pop()
+            current_nodes = typed_nodes[current]
+            if backward:
+                neighbours = self.predecessors(current)
+            else:
+                neighbours = self.successors(current)
+            for neighbour in neighbours:
+                if neighbour in typed_nodes:
+                    continue
+                if backward:
+                    typing = self.get_typing(neighbour, current)
+                    if isinstance(typing, tuple):
+                        neighbour_nodes = {
+                            (side, k): current_nodes[v]
+                            for side, side_typing in zip(
+                                ["lhs", "rhs"], typing)
+                            for k, v in side_typing.items()
+                            if v in current_nodes
+                        }
+                        if len(neighbour_nodes) > 0:
+                            typed_nodes[neighbour] = neighbour_nodes
+                            rules[neighbour] = sum(len(t) for t in typing)
+                        continue
+                    neighbour_nodes = {
+                        k: current_nodes[v]
+                        for k, v in typing.items()
+                        if v in current_nodes
+                    }
+                    if len(neighbour_nodes) == 0:
+                        continue
+                else:
+                    typing = self.get_typing(current, neighbour)
+                    neighbour_nodes = {
+                        k: typing[v] for k, v in current_nodes.items()
+                    }
+                typed_nodes[neighbour] = neighbour_nodes
+                to_visit.append(neighbour)
+        del typed_nodes[graph_id]
+        return typed_nodes, rules
+
+    def apply_rule_hierarchy(self, rule_hierarchy, instances,
+                             executor=None):
         """Apply rule hierarchy.
 
+        The rules are applied in two phases: the restrictive parts of
+        all the rules and then their expansive parts. In every phase
+        the graphs are rewritten independently (by the workers of
+        the pool, if an executor is specified), then the typings are
+        updated at once (see `_update_mappings`). Only the images of
+        the nodes changed by rewriting are recomputed, the rest of
+        every typing is copied.
+
         Parameters
         ----------
         rule_hierarchy : dict
             Dictionary containing the input rule hierarchy
         instances : dict
             Dictionary containing an instance for every rule in the hierarchy
+        executor : str or concurrent.futures.Executor, optional
+            Pool of workers rewriting the graphs: `"thread"`, `"serial"`
+            or an executor object, by default the graphs are rewritten
+            sequentially (see `rewrite`)
 
         Returns
         -------
         rhs_instances : dict
             Dictionary containing the RHS instances for every
             graph in the hierarchy
+
+        Raises
+        ------
+        RewritingError
+            If the rule hierarchy is not applicable
+        ReGraphError
+            If the executor is unknown or is a pool of processes
         """
         # Check if the rule hierarchy is applicable
         self._check_applicability(rule_hierarchy, instances)
 
-        updated_graphs = {}
-        # Apply rules to the hierarchy
-        for graph_id, rule in rule_hierarchy["rules"].items():
-            instance = instances[graph_id]
-            graph_obj = self.get_graph(graph_id)
+        rules = rule_hierarchy["rules"]
+        homomorphisms = rule_hierarchy["rule_homomorphisms"]
+        typings = [
+            (s, t) for s, t in self.typings() if s in rules or t in rules
+        ]
 
-            if rule.is_restrictive():
-                p_g_m, g_m_g = self._restrictive_rewrite(
-                    graph_id, rule, instance)
-            else:
-                p_g_m = {
-                    k: instance[v]
-                    for k, v in rule.p_lhs.items()
-                }
-                g_m_g = {
-                    n: n for n in graph_obj.nodes()
-                }
-            updated_graphs[graph_id] = {
-                "p_g_m": p_g_m,
-                "g_m_g": g_m_g
-            }
+        pool, owned = _create_propagation_pool(executor)
+        try:
+            # Apply the restrictive parts of the rules
+            restrictive = self._run_waves(
+                [list(rules)],
+                lambda g: self._apply_restrictive_part(
+                    g, rules[g], instances[g]),
+                pool)
+
+            # Restore homomorphisms after restrictive rewrite
+            new_typings = dict()
+            for (s, t) in typings:
+                if s in rules:
+                    new_typings[(s, t)] = self._restrictive_typing_delta(
+                        self.get_typing(s, t), instances[s],
+                        restrictive[s][0], restrictive[t][0],
+                        homomorphisms[(s, t)][1])
+            self._update_mappings(new_typings)
+            self._update_incident_after_restrictive(
+                rules, restrictive, set(typings))
+
+            # Apply the expansive parts of the rules
+            expansive = self._run_waves(
+                [list(rules)],
+                lambda g: self._apply_expansive_part(
+                    g, rules[g], restrictive[g][0]),
+                pool)
+        finally:
+            if owned:
+                pool.shutdown()
 
-        # Restore homomorphisms after restrictive rewrite
-        # and backward propagation
-        for (source, target), (_, p_h, _) in rule_hierarchy[
-                "rule_homomorphisms"].items():
-            old_typing = self.get_typing(source, target)
-            source_m_target_m = get_unique_map_to_pullback_complement(
-                updated_graphs[target]["p_g_m"],
-                updated_graphs[target]["g_m_g"],
-                p_h,
-                updated_graphs[source]["p_g_m"],
-                compose(
-                    updated_graphs[source]["g_m_g"],
-                    old_typing)
-            )
-            self._update_mapping(source, target, source_m_target_m)
+        # Restore homomorphisms after expansive rewrite
+        moves = {
+            g: {k: v for k, v in g_m_g_prime.items() if k != v}
+            for g, (_, g_m_g_prime) in expansive.items()
+        }
+        new_typings = dict()
+        for (s, t) in typings:
+            if s in rules:
+                new_typings[(s, t)] = self._expansive_typing_delta(
+                    self.get_typing(s, t), moves[s], moves[t],
+                    expansive[s][0], expansive[t][0],
+                    homomorphisms[(s, t)][2])
+            elif len(moves[t]) > 0:
+                new_typings[(s, t)] = self._expansive_typing_delta(
+                    self.get_typing(s, t), dict(), moves[t])
+        self._update_mappings(new_typings)
+        self._update_incident_after_expansive(
+            expansive, moves, set(typings))
+
+        return {k: v[0] for k, v in expansive.items()}
+
+    def _apply_restrictive_part(self, graph_id, rule, instance):
+        """Apply the restrictive part of a rule to a graph.
+
+        Returns the instance `p_g_m` of the interface of the rule in
+        the rewritten graph and the map `g_m_g` from the nodes of the
+        rewritten graph to the original nodes, only the nodes of the
+        instance are included in `g_m_g` (the map is the identity
+        on the other nodes).
+        """
+        if rule.is_restrictive():
+            restrictive_rule = Rule(p=rule.p, lhs=rule.lhs, p_lhs=rule.p_lhs)
+            p_g_m = self.get_graph(graph_id).rewrite(
+                restrictive_rule, instance)
+            g_m_g = {
+                v: instance[rule.p_lhs[k]] for k, v in p_g_m.items()
+            }
+        else:
+            p_g_m = {
+                k: instance[v]
+                for k, v in rule.p_lhs.items()
+            }
+            g_m_g = dict()
+        return p_g_m, g_m_g
 
-        for graph_id, rule in rule_hierarchy["rules"].items():
-            graph_obj = self.get_graph(graph_id)
-            if rule.is_relaxing():
-                r_g_prime, g_m_g_prime = self._expansive_rewrite(
-                    graph_id, rule, updated_graphs[graph_id]["p_g_m"])
-            else:
-                g_m_g_prime = {
-                    n: n for n in graph_obj.nodes()
-                }
-                r_g_prime = {
-                    v: updated_graphs[graph_id]["p_g_m"][k]
-                    for k, v in rule.p_rhs.items()
-                }
+    def _apply_expansive_part(self, graph_id, rule, p_g_m):
+        """Apply the expansive part of a rule to a graph.
 
-            updated_graphs[graph_id] = {
-                "g_m_g_prime": g_m_g_prime,
-                "r_g_prime": r_g_prime
+        Returns the instance `r_g_prime` of the right-hand side of the
+        rule in the rewritten graph and the map `g_m_g_prime` from the
+        nodes of the graph before rewriting to the new nodes, only the
+        nodes of the instance are included in `g_m_g_prime` (the map
+        is the identity on the other nodes).
+        """
+        if rule.is_relaxing():
+            expansive_rule = Rule(p=rule.p, rhs=rule.rhs, p_rhs=rule.p_rhs)
+            r_g_prime = self.get_graph(graph_id).rewrite(
+                expansive_rule, p_g_m)
+            g_m_g_prime = {
+                v: r_g_prime[rule.p_rhs[k]] for k, v in p_g_m.items()
             }
+        else:
+            r_g_prime = {
+                v: p_g_m[k]
+                for k, v in rule.p_rhs.items()
+            }
+            g_m_g_prime = dict()
+        return r_g_prime, g_m_g_prime
 
-        # Restore homomorphisms after expansive rewrite
-        # and forward propagation
-        for (source, target), (_, _, rhs_h) in rule_hierarchy[
-                "rule_homomorphisms"].items():
-            old_typing = self.get_typing(source, target)
-            source_p_target_p = get_unique_map_from_pushout(
-                self.get_graph(source).nodes(),
-                updated_graphs[source]["g_m_g_prime"],
-                updated_graphs[source]["r_g_prime"],
-                compose(
-                    old_typing,
-                    updated_graphs[target]["g_m_g_prime"]),
-                compose(
-                    rhs_h,
-                    updated_graphs[target]["r_g_prime"])
-            )
-            self._update_mapping(source, target, source_p_target_p)
+    @staticmethod
+    def _restrictive_typing_delta(typing, instance, p_s_m, p_t_m, p_h):
+        """Update a typing after restrictive rewriting.
+
+        Only the images of the nodes of the instance of the rule
+        in the source (the nodes that are removed or cloned) change,
+        their new images are given by the interfaces of the rules.
+        """
+        new_typing = dict(typing)
+        for node in instance.values():
+            new_typing.pop(node, None)
+        for p_node, node in p_s_m.items():
+            new_typing[node] = p_t_m[p_h[p_node]]
+        return new_typing
 
-        return {k: v["r_g_prime"] for k, v in updated_graphs.items()}
+    @staticmethod
+    def _expansive_typing_delta(typing, s_moves, t_moves,
+                                r_s_prime=None, r_t_prime=None, rhs_h=None):
+        """Update a typing after expansive rewriting.
+
+        The nodes of the source and of the target whose ids are changed
+        (`s_moves` and `t_moves`) are renamed, the images of the nodes of
+        the instance of the right-hand side in the source are given by
+        the rules.
+        """
+        new_typing = dict(typing)
+        for node, new_node in s_moves.items():
+            del new_typing[node]
+            new_typing[new_node] = t_moves.get(typing[node], typing[node])
+        if len(t_moves) > 0:
+            for node, t_node in typing.items():
+                if node not in s_moves and t_node in t_moves:
+                    new_typing[node] = t_moves[t_node]
+        if r_s_prime is not None:
+            for r_node, node in r_s_prime.items():
+                new_typing[node] = r_t_prime[rhs_h[r_node]]
+        return new_typing
+
+    def _update_mappings(self, mappings):
+        """Update the mapping dictionaries of several typings.
+
+        Parameters
+        ----------
+        mappings : dict
+            Dictionary whose keys are pairs (source, target) and whose
+            values are the new mapping dictionaries
+        """
+        for (s, t), mapping in mappings.items():
+            self._update_mapping(s, t, mapping)
+
+    def _update_incident_after_restrictive(self, rules, restrictive,
+                                           updated):
+        """Update relations and other typings of rewritten graphs."""
+        for graph_id, (_, g_m_g) in restrictive.items():
+            # graphs rewritten by rules with empty interfaces lose
+            # nodes, although their maps `g_m_g` are empty
+            if not rules[graph_id].is_restrictive():
+                continue
+            successors = [
+                s for s in self.successors(graph_id)
+                if (graph_id, s) not in updated
+            ]
+            relations = self.adjacent_relations(graph_id)
+            if len(successors) > 0 or len(relations) > 0:
+                full_g_m_g = {
+                    n: g_m_g.get(n, n)
+                    for n in self.get_graph(graph_id).nodes()
+                }
+                for suc in successors:
+                    self._update_mapping(
+                        graph_id, suc,
+                        compose(full_g_m_g, self.get_typing(graph_id, suc)))
+                if len(relations) > 0:
+                    self._restrictive_update_incident_rels(
+                        graph_id, full_g_m_g)
+
+    def _update_incident_after_expansive(self, expansive, moves, updated):
+        """Update relations and other typings of rewritten graphs."""
+        for graph_id, (r_g_prime, g_m_g_prime) in expansive.items():
+            if len(g_m_g_prime) == 0:
+                continue
+            predecessors = [
+                p for p in self.predecessors(graph_id)
+                if (p, graph_id) not in updated
+            ]
+            relations = self.adjacent_relations(graph_id)
+            if len(predecessors) > 0 or len(relations) > 0:
+                rhs_nodes = set(r_g_prime.values())
+                full_g_m_g_prime = {
+                    n: n for n in self.get_graph(graph_id).nodes()
+                    if n not in rhs_nodes
+                }
+                full_g_m_g_prime.update(g_m_g_prime)
+                if len(predecessors) > 0 and len(moves[graph_id]) > 0:
+                    self._expansive_update_incident_homs(
+                        graph_id, full_g_m_g_prime, {
+                            p: self.get_typing(p, graph_id)
+                            for p in predecessors})
+                if len(relations) > 0:
+                    self._expansive_update_incident_rels(
+                        graph_id, full_g_m_g_prime, {
+                            a: self.get_relation(graph_id, a)
+                            for a in relations})
 
     def _check_rule_instance_typing(self, origin_id, rule, instance,
                                     p_typing, rhs_typing, strict):
@@ -1916,59 +2461,180 @@ class Hierarchy(ABC):
             pred_typing,
             pred_m_origin_m)
 
+    def _propagation_waves(self, origin_id, reverse=False):
+        """Group the graphs reachable from the origin in waves.
+
+        Graphs are grouped by the length of the longest path from the
+        origin to the graph (to the origin from the graph if `reverse`
+        is True), groups containing related graphs are further split.
+        Paths between the origin and the graphs of a wave only visit
+        graphs of the previous waves and the graphs of a wave are not
+        related, so the changes of the origin can be propagated to
+        the graphs of a wave independently.
+
+        Returns
+        -------
+        waves : list of lists
+            List of waves ordered by the distance from the origin
+        """
+        graphs = self.bfs_tree(origin_id, reverse=reverse)
+        reachable = set(graphs)
+        reachable.add(origin_id)
+
+        def _dependencies(graph):
+            if reverse:
+                neighbours = self.successors(graph)
+            else:
+                neighbours = self.predecessors(graph)
+            return [n for n in neighbours if n in reachable]
+
+        levels = {origin_id: 0}
+        for graph in graphs:
+            stack = [graph]
+            while len(stack) > 0:
+                node = stack[-1]
+                if node in levels:
+                    stack.pop()
+                    continue
+                dependencies = _dependencies(node)
+                missing = [d for d in dependencies if d not in levels]
+                if len(missing) > 0:
+                    stack.extend(missing)
+                else:
+                    levels[node] = 1 + max(levels[d] for d in dependencies)
+                    stack.pop()
+
+        waves = [[] for _ in range(max(levels.values()))]
+        for graph in graphs:
+            waves[levels[graph] - 1].append(graph)
+
+        # Changes of a graph update its relations, so the graphs
+        # related to each other are put in consecutive waves
+        relations = dict()
+        for left, right in self.relations():
+            relations.setdefault(left, set()).add(right)
+            relations.setdefault(right, set()).add(left)
+        split_waves = []
+        for wave in waves:
+            while len(wave) > 0:
+                split_wave = []
+                rest = []
+                related = set()
+                for graph in wave:
+                    if graph in related:
+                        rest.append(graph)
+                    else:
+                        split_wave.append(graph)
+                        related.update(relations.get(graph, ()))
+                split_waves.append(split_wave)
+                wave = rest
+        return split_waves
+
+    def _run_waves(self, waves, function, pool=None):
+        """Apply the function to the graphs of the waves.
+
+        The waves are processed one after another, the graphs of
+        the same wave are processed by the workers of the pool.
+        If the function fails on some graph, the other graphs of
+        the wave are processed to the end before the exception is
+        re-raised (and the following waves are not processed).
+
+        Returns
+        -------
+        results : dict
+            Dictionary whose keys are graphs and whose values are
+            the results of the function
+        """
+        results = dict()
+        if pool is None:
+            for wave in waves:
+                for graph in wave:
+                    results[graph] = function(graph)
+            return results
+
+        self._propagation_lock = threading.RLock()
+        try:
+            for wave in waves:
+                futures = [
+                    (graph, pool.submit(function, graph)) for graph in wave
+                ]
+                # Let all the workers of the wave finish before
+                # releasing the lock, even if some of them failed
+                wait([future for _, future in futures])
+                for graph, future in futures:
+                    results[graph] = future.result()
+        finally:
+            self._propagation_lock = None
+        return results
+
+    def _propagate_backward_to(self, origin_id, graph_id, rule, instance,
+                               p_origin_m, origin_m_origin, p_typing):
+        """Propagate the restrictive changes of the origin to the graph."""
+        graph_p_typing = {}
+        if graph_id in p_typing.keys():
+            graph_p_typing = p_typing[graph_id]
+
+        origin_typing = self.get_typing(graph_id, origin_id)
+
+        g_m_g = self._get_identity_map(graph_id)
+
+        g_m_origin_m = copy.deepcopy(origin_typing)
+        # Propagate node clones
+        if len(rule.cloned_nodes()) > 0:
+            self._propagate_clone(
+                origin_id, graph_id, p_origin_m,
+                origin_m_origin, graph_p_typing,
+                g_m_g, g_m_origin_m)
+
+        # Propagate node deletes
+        if len(rule.removed_nodes()) > 0:
+            self._propagate_node_removal(
+                origin_id, graph_id, rule, instance,
+                g_m_g, g_m_origin_m)
+
+        # Propagate node attrs deletes
+        if len(rule.removed_node_attrs()) > 0:
+            self._propagate_node_attrs_removal(
+                origin_id, graph_id, rule,
+                p_origin_m, g_m_origin_m)
+
+        # Propagate edge deletes
+        if len(rule.removed_edges()) > 0:
+            self._propagate_edge_removal(
+                origin_id, graph_id, g_m_origin_m)
+
+        # Propagate edge attrs deletes
+        if len(rule.removed_edge_attrs()) > 0:
+            self._propagate_edge_attrs_removal(
+                origin_id, graph_id, rule, p_origin_m,
+                g_m_origin_m)
+
+        return g_m_g, g_m_origin_m
+
     def _propagate_backward(self, origin_id, rule, instance, p_origin_m,
-                            origin_m_origin, p_typing):
+                            origin_m_origin, p_typing, pool=None):
         """Peform backward propagation of the original rewriting.
 
+        The changes are propagated to the ancestors of the origin
+        wave by wave (see `_propagation_waves`), nearest ancestors
+        first.
+
         Parameters
         ----------
 
         Returns
         -------
         """
+        results = self._run_waves(
+            self._propagation_waves(origin_id, reverse=True),
+            lambda graph_id: self._propagate_backward_to(
+                origin_id, graph_id, rule, instance, p_origin_m,
+                origin_m_origin, p_typing),
+            pool)
+
         g_m_gs = {origin_id: origin_m_origin}
         g_m_origin_ms = {}
-
-        for graph_id in self.bfs_tree(origin_id, reverse=True):
-            graph_p_typing = {}
-            if graph_id in p_typing.keys():
-                graph_p_typing = p_typing[graph_id]
-
-            origin_typing = self.get_typing(graph_id, origin_id)
-
-            g_m_g = self._get_identity_map(graph_id)
-
-            g_m_origin_m = copy.deepcopy(origin_typing)
-            # Propagate node clones
-            if len(rule.cloned_nodes()) > 0:
-                self._propagate_clone(
-                    origin_id, graph_id, p_origin_m,
-                    origin_m_origin, graph_p_typing,
-                    g_m_g, g_m_origin_m)
-
-            # Propagate node deletes
-            if len(rule.removed_nodes()) > 0:
-                self._propagate_node_removal(
-                    origin_id, graph_id, rule, instance,
-                    g_m_g, g_m_origin_m)
-
-            # Propagate node attrs deletes
-            if len(rule.removed_node_attrs()) > 0:
-                self._propagate_node_attrs_removal(
-                    origin_id, graph_id, rule,
-                    p_origin_m, g_m_origin_m)
-
-            # Propagate edge deletes
-            if len(rule.removed_edges()) > 0:
-                self._propagate_edge_removal(
-                    origin_id, graph_id, g_m_origin_m)
-
-            # Propagate edge attrs deletes
-            if len(rule.removed_edge_attrs()) > 0:
-                self._propagate_edge_attrs_removal(
-                    origin_id, graph_id, rule, p_origin_m,
-                    g_m_origin_m)
-
+        for graph_id, (g_m_g, g_m_origin_m) in results.items():
             g_m_gs[graph_id] = g_m_g
             g_m_origin_ms[graph_id] = g_m_origin_m
 
@@ -1989,86 +2655,96 @@ class Hierarchy(ABC):
 
                 self._update_mapping(pred, graph_id, pred_graph)
 
-    def _expansive_rewrite_and_propagate_forward(self, origin_id, rule,
-                                                 instance, p_origin_m,
-                                                 rhs_typing):
-        bfs_tree = self.bfs_tree(origin_id)
-        bfs_tree.reverse()
+    def _propagate_forward_to(self, origin_id, graph, rule, p_origin_m,
+                              rhs_typing):
+        """Propagate the expansive changes of the origin to the graph."""
+        origin_typing = self.get_typing(origin_id, graph)
 
-        g_g_primes = {}
-        rhs_g_primes = {}
-
-        for graph in bfs_tree:
-
-            origin_typing = self.get_typing(origin_id, graph)
+        rhs_graph_typing = {}
+        if graph in rhs_typing.keys():
+            rhs_graph_typing = rhs_typing[graph]
 
-            rhs_graph_typing = {}
-            if graph in rhs_typing.keys():
-                rhs_graph_typing = rhs_typing[graph]
+        g_g_prime = {
+            n: n for n in self.get_graph(graph).nodes()
+        }
 
-            g_g_prime = {
-                n: n for n in self.get_graph(graph).nodes()
-            }
+        rhs_g_prime = compose(p_origin_m, origin_typing)
 
-            rhs_g_prime = compose(p_origin_m, origin_typing)
+        pred_typings = {
+            p: self.get_typing(p, graph)
+            for p in self.predecessors(graph)
+        }
+        adj_relations = {
+            a: self.get_relation(graph, a)
+            for a in self.adjacent_relations(graph)
+        }
 
-            pred_typings = {
-                p: self.get_typing(p, graph)
-                for p in self.predecessors(graph)
-            }
-            adj_relations = {
-                a: self.get_relation(graph, a)
-                for a in self.adjacent_relations(graph)
-            }
+        # Propagate node merges
+        if len(rule.merged_nodes()) > 0:
+            self._propagate_merge(
+                origin_id, graph, rule,
+                p_origin_m, g_g_prime, rhs_g_prime)
+
+        # Propagate node additions
+        if len(rule.added_nodes()) > 0:
+            self._propagate_node_addition(
+                origin_id, graph, rule,
+                rhs_graph_typing,
+                g_g_prime, rhs_g_prime)
+
+        self._expansive_update_incident_homs(
+            graph, g_g_prime, pred_typings)
+        self._expansive_update_incident_rels(
+            graph, g_g_prime, adj_relations)
+
+        keys_to_remove = set()
+        keys_to_add = dict()
+        for k, v in rhs_g_prime.items():
+            if k not in rule.rhs.nodes():
+                if k in rule.p.nodes():
+                    keys_to_add[rule.p_rhs[k]] = v
+                    keys_to_remove.add(k)
+        for k in keys_to_remove:
+            del rhs_g_prime[k]
+        for k, v in keys_to_add.items():
+            rhs_g_prime[k] = v
+
+        # Propagate node attrs additions
+        if len(rule.added_node_attrs()) > 0:
+            self._propagate_node_attrs_addition(
+                origin_id, graph, rule,
+                rhs_g_prime)
+
+        # Propagate edge additions
+        if len(rule.added_edges()) > 0:
+            self._propagate_edge_addition(
+                origin_id, graph, rule,
+                rhs_g_prime)
+
+        # Propagate edge attrs additions
+        if len(rule.added_edge_attrs()) > 0:
+            self._propagate_edge_attrs_addition(
+                origin_id, graph, rule,
+                rhs_g_prime)
+
+        return g_g_prime, rhs_g_prime
 
-            # Propagate node merges
-            if len(rule.merged_nodes()) > 0:
-                self._propagate_merge(
-                    origin_id, graph, rule,
-                    p_origin_m, g_g_prime, rhs_g_prime)
-
-            # Propagate node additions
-            if len(rule.added_nodes()) > 0:
-                self._propagate_node_addition(
-                    origin_id, graph, rule,
-                    rhs_graph_typing,
-                    g_g_prime, rhs_g_prime)
-
-            self._expansive_update_incident_homs(
-                graph, g_g_prime, pred_typings)
-            self._expansive_update_incident_rels(
-                graph, g_g_prime, adj_relations)
-
-            keys_to_remove = set()
-            keys_to_add = dict()
-            for k, v in rhs_g_prime.items():
-                if k not in rule.rhs.nodes():
-                    if k in rule.p.nodes():
-                        keys_to_add[rule.p_rhs[k]] = v
-                        keys_to_remove.add(k)
-            for k in keys_to_remove:
-                del rhs_g_prime[k]
-            for k, v in keys_to_add.items():
-                rhs_g_prime[k] = v
-
-            # Propagate node attrs additions
-            if len(rule.added_node_attrs()) > 0:
-                self._propagate_node_attrs_addition(
-                    origin_id, graph, rule,
-                    rhs_g_prime)
-
-            # Propagate edge additions
-            if len(rule.added_edges()) > 0:
-                self._propagate_edge_addition(
-                    origin_id, graph, rule,
-                    rhs_g_prime)
-
-            # Propagate edge attrs additions
-            if len(rule.added_edge_attrs()) > 0:
-                self._propagate_edge_attrs_addition(
-                    origin_id, graph, rule,
-                    rhs_g_prime)
+    def _expansive_rewrite_and_propagate_forward(self, origin_id, rule,
+                                                 instance, p_origin_m,
+                                                 rhs_typing, pool=None):
+        # The changes are propagated to the descendants of the origin
+        # wave by wave (see `_propagation_waves`), farthest first
+        waves = self._propagation_waves(origin_id)
+        waves.reverse()
+        results = self._run_waves(
+            waves,
+            lambda graph: self._propagate_forward_to(
+                origin_id, graph, rule, p_origin_m, rhs_typing),
+            pool)
 
+        g_g_primes = {}
+        rhs_g_primes = {}
+        for graph, (g_g_prime, rhs_g_prime) in results.items():
             g_g_primes[graph] = g_g_prime
             rhs_g_primes[graph] = rhs_g_prime
 
@@ -2083,7 +2759,7 @@ class Hierarchy(ABC):
         for graph_id, g_g_prime in g_g_primes.items():
             graph_nodes = self.get_graph(graph_id).nodes()
             for suc in self.successors(graph_id):
-                suc_typing = self.get_typing(graph_id, suc)
+                suc_typing = dict(self.get_typing(graph_id, suc))
                 for rhs_node in rule.rhs.nodes():
                     g_nodes = keys_by_value(
                         g_g_prime, rhs_g_primes[graph_id][rhs_node])
@@ -2206,11 +2882,12 @@ class Hierarchy(ABC):
                 del g_m_g[node]
                 del g_m_origin_m[node]
 
-        for node in graph.nodes():
+        # nodes typed by the removed nodes of the intermediate graphs
+        for node in list(graph.nodes()):
             if node not in origin_typing.keys():
                 graph.remove_node(node)
                 del g_m_g[node]
-                del g_m_origin_m[node]
+                g_m_origin_m.pop(node, None)
 
         self._restrictive_update_incident_homs(node_id, g_m_g)
         self._restrictive_update_incident_rels(node_id, g_m_g)
@@ -2504,35 +3181,49 @@ class Hierarchy(ABC):
 
     def _check_applicability(self, rule_hierarchy, instances):
         """Check if a rule hierarchy is applicable."""
-        # Check that instances commute
+        rules = rule_hierarchy["rules"]
         for (s, t) in self.typings():
-            typing = self.get_typing(s, t)
-            lhs_s_t1 = compose(instances[s], typing)
-            lhs_s_t2 = compose(
-                rule_hierarchy["rule_homomorphisms"][(s, t)][0],
-                instances[t])
-            if (lhs_s_t1 != lhs_s_t2):
+            if s not in rules and t not in rules:
+                continue
+            if t not in rules:
                 raise RewritingError(
-                    "Instance of a specified rule for '{}' ({}) ".format(
-                        s, instances[s]) +
-                    "is not compatible with such instance for '{}' ({})".format(
-                        t, instances[t]))
+                    "Specified rule hierarchy is not applicable: "
+                    "'{}' is rewritten, but no rule is ".format(s) +
+                    "specified for the graph '{}' typing it".format(t))
+            typing = self.get_typing(s, t)
+
+            # Check that instances commute
+            if s in rules:
+                s_instance = instances[s]
+                lhs_s_t1 = compose(s_instance, typing)
+                lhs_s_t2 = compose(
+                    rule_hierarchy["rule_homomorphisms"][(s, t)][0],
+                    instances[t])
+                if (lhs_s_t1 != lhs_s_t2):
+                    raise RewritingError(
+                        "Instance of a specified rule for '{}' ({}) ".format(
+                            s, instances[s]) +
+                        "is not compatible with such instance for '{}' ({})".format(
+                            t, instances[t]))
+            else:
+                s_instance = dict()
 
             # Check the applicability
-            t_rule = rule_hierarchy["rules"][t]
+            t_rule = rules[t]
             if t_rule.is_restrictive():
+                preimages = keys_by_values(typing)
+                s_instance_nodes = set(s_instance.values())
                 # Check the square L_S -> S -> T and L_S -> L_T -> T is a PB
                 for lhs_t_node in t_rule.lhs.nodes():
                     t_node = instances[t][lhs_t_node]
-                    s_nodes = keys_by_value(typing, t_node)
+                    s_nodes = preimages.get(t_node, [])
                     if lhs_t_node in t_rule.removed_nodes():
                         for s_node in s_nodes:
                             error = False
-                            if s_node not in instances[s].values():
+                            if s_node not in s_instance_nodes:
                                 error = True
-                            elif keys_by_value(instances[s], s_node)[
-                                    0] not in rule_hierarchy[
-                                        "rules"][s].removed_nodes():
+                            elif keys_by_value(s_instance, s_node)[
+                                    0] not in rules[s].removed_nodes():
                                 error = True
                             if error:
                                 raise RewritingError(
@@ -2546,7 +3237,7 @@ class Hierarchy(ABC):
 
                     if lhs_t_node in t_rule.cloned_nodes():
                         for s_node in s_nodes:
-                            if s_node not in instances[s].values():
+                            if s_node not in s_instance_nodes:
                                 raise RewritingError(
                                     "Specified rule hierarchy is not applicable "
                                     "the typing of the node '{}' ".format(s_node) +
@@ -0,0 +1,392 @@
+"""Overlay graph views.
+
+This module contains a lightweight graph object that represents
+a modification of another graph without copying it:
+
+* `OverlayGraph` -- graph given by a base graph together with added,
+  removed and modified nodes and edges.
+
+The base graph is never modified through the overlay, all the
+changes are recorded in the overlay itself and can be turned into
+a standalone graph with `OverlayGraph.materialize`.
+"""
+from regraph.exceptions import GraphError, GraphAttrsWarning
+from regraph.graphs import Graph
+from regraph.backends.networkx.graphs import NXGraph
+from regraph.utils import normalize_attrs, safe_deepcopy_dict
+
+import warnings
+
+
+class _OverlayNodeView(object):
+    """Set-like view of the nodes of an overlay."""
+
+    def __init__(self, overlay):
+        self._overlay = overlay
+
+    def __contains__(self, node):
+        return self._overlay._has_node(node)
+
+    def __iter__(self):
+        overlay = self._overlay
+        for n in overlay._base.nodes():
+            if n not in overlay._removed_nodes:
+                yield n
+        for n in overlay._added_nodes:
+            yield n
+
+    def __len__(self):
+        overlay = self._overlay
+        return (
+            len(overlay._base.nodes()) -
+            len(overlay._removed_nodes) +
+            len(overlay._added_nodes)
+        )
+
+    def __repr__(self):
+        return "OverlayNodeView({})".format(list(self))
+
+
+class _OverlayEdgeView(object):
+    """Set-like view of the edges of an overlay."""
+
+    def __init__(self, overlay):
+        self._overlay = overlay
+
+    def __contains__(self, edge):
+        s, t = edge
+        return self._overlay._has_edge(s, t)
+
+    def __iter__(self):
+        overlay = self._overlay
+        for s, t in overlay._base.edges():
+            if overlay._has_base_edge(s, t):
+                yield (s, t)
+        for e in overlay._added_edges:
+            yield e
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "OverlayEdgeView({})".format(list(self))
+
+
+class OverlayGraph(Graph):
+    """Graph given by a base graph and a set of changes.
+
+    Attributes
+    ----------
+    _base : regraph.Graph
+        Base graph (never modified by the overlay)
+    _added_nodes : dict
+        Nodes that are not present in the base graph and their attributes
+    _removed_nodes : set
+        Nodes of the base graph removed in the overlay
+    _modified_nodes : dict
+        Nodes of the base graph whose attributes are modified in
+        the overlay and their new attributes
+    _added_edges : dict
+        Edges that are not present in the base graph and their attributes
+    _removed_edges : set
+        Edges of the base graph removed in the overlay
+    _modified_edges : dict
+        Edges of the base graph whose attributes are modified in
+        the overlay and their new attributes
+    """
+
+    def __init__(self, base):
+        """Initialize an overlay on top of the base graph."""
+        self._base = base
+        self._added_nodes = dict()
+        self._removed_nodes = set()
+        self._modified_nodes = dict()
+        self._added_edges = dict()
+        self._added_succ = dict()
+        self._added_pred = dict()
+        self._removed_edges = set()
+        self._modified_edges = dict()
+
+    def _is_base_node(self, node_id):
+        return (
+            node_id not in self._removed_nodes and
+            node_id in self._base.nodes()
+        )
+
+    def _has_node(self, node_id):
+        return node_id in self._added_nodes or self._is_base_node(node_id)
+
+    def _has_base_edge(self, s, t):
+        return (
+            (s, t) not in self._removed_edges and
+            s not in self._removed_nodes and
+            t not in self._removed_nodes
+        )
+
+    def _has_edge(self, s, t):
+        if (s, t) in self._added_edges:
+            return True
+        return (
+            self._is_base_node(s) and self._is_base_node(t) and
+            (s, t) not in self._removed_edges and
+            (s, t) in self._base.edges()
+        )
+
+    def _remove_added_edge(self, s, t):
+        del self._added_edges[(s, t)]
+        self._added_succ[s].discard(t)
+        self._added_pred[t].discard(s)
+
+    # Implementation of abstract methods
+
+    def nodes(self, data=False):
+        """Return the list of nodes."""
+        if data:
+            return [(n, self.get_node(n)) for n in self.nodes()]
+        return _OverlayNodeView(self)
+
+    def edges(self, data=False):
+        """Return the list of edges."""
+        if data:
+            return [(s, t, self.get_edge(s, t)) for s, t in self.edges()]
+        return _OverlayEdgeView(self)
+
+    def get_node(self, n):
+        """Get node attributes.
+
+        Parameters
+        ----------
+        n : hashable
+            Node id.
+        """
+        if n in self._added_nodes:
+            return self._added_nodes[n]
+        if n in self._modified_nodes:
+            return self._modified_nodes[n]
+        if self._is_base_node(n):
+            return self._base.get_node(n)
+        raise GraphError("Node '{}' does not exist!".format(n))
+
+    def get_edge(self, s, t):
+        """Get edge attributes.
+
+        Parameters
+        ----------
+        s : hashable, source node id.
+        t : hashable, target node id.
+        """
+        if (s, t) in self._added_edges:
+            return self._added_edges[(s, t)]
+        if not self._has_edge(s, t):
+            raise GraphError("Edge '{}->{}' does not exist!".format(s, t))
+        if (s, t) in self._modified_edges:
+            return self._modified_edges[(s, t)]
+        return self._base.get_edge(s, t)
+
+    def add_node(self, node_id, attrs=None):
+        """Add a node to the overlay.
+
+        Parameters
+        ----------
+        node_id : hashable
+            Id of the new node.
+        attrs : dict, optional
+            Node attributes.
+        """
+        if attrs is None:
+            new_attrs = dict()
+        else:
+            new_attrs = safe_deepcopy_dict(attrs)
+            normalize_attrs(new_attrs)
+        if self._has_node(node_id):
+            raise GraphError("Node '{}' already exists!".format(node_id))
+        self._added_nodes[node_id] = new_attrs
+        self._added_succ[node_id] = set()
+        self._added_pred[node_id] = set()
+        return node_id
+
+    def remove_node(self, node_id):
+        """Remove a node from the overlay.
+
+        Parameters
+        ----------
+        node_id : hashable, node to remove.
+        """
+        if not self._has_node(node_id):
+            raise GraphError("Node '{}' does not exist!".format(node_id))
+        for t in list(self._added_succ.get(node_id, [])):
+            self._remove_added_edge(node_id, t)
+        for s in list(self._added_pred.get(node_id, [])):
+            self._remove_added_edge(s, node_id)
+        if node_id in self._added_nodes:
+            del self._added_nodes[node_id]
+            del self._added_succ[node_id]
+            del self._added_pred[node_id]
+        else:
+            self._removed_nodes.add(node_id)
+            if node_id in self._modified_nodes:
+                del self._modified_nodes[node_id]
+
+    def add_edge(self, s, t, attrs=None, **attr):
+        """Add an edge to the overlay.
+
+        Parameters
+        ----------
+        s : hashable, source node id.
+        t : hashable, target node id.
+        attrs : dict
+            Edge attributes.
+        """
+        if attrs is None:
+            attrs = attr
+        else:
+            attrs.update(attr)
+        new_attrs = safe_deepcopy_dict(attrs)
+        normalize_attrs(new_attrs)
+        if not self._has_node(s):
+            raise GraphError("Node '{}' does not exist!".format(s))
+        if not self._has_node(t):
+            raise GraphError("Node '{}' does not exist!".format(t))
+        if self._has_edge(s, t):
+            raise GraphError(
+                "Edge '{}'->'{}' already exists!".format(s, t))
+
+        if (s, t) in self._removed_edges and\
+                self._is_base_node(s) and self._is_base_node(t):
+            # restore a previously removed edge of the base graph
+            self._removed_edges.remove((s, t))
+            self._modified_edges[(s, t)] = new_attrs
+        else:
+            self._added_edges[(s, t)] = new_attrs
+            self._added_succ.setdefault(s, set()).add(t)
+            self._added_pred.setdefault(t, set()).add(s)
+
+    def remove_edge(self, s, t):
+        """Remove an edge from the overlay.
+
+        Parameters
+        ----------
+        s : hashable, source node id.
+        t : hashable, target node id.
+        """
+        if not self._has_edge(s, t):
+            raise GraphError(
+                "Edge '{}->{}' does not exist!".format(s, t))
+        if (s, t) in self._added_edges:
+            self._remove_added_edge(s, t)
+        else:
+            self._removed_edges.add((s, t))
+            if (s, t) in self._modified_edges:
+                del self._modified_edges[(s, t)]
+
+    def update_node_attrs(self, node_id, attrs, normalize=True):
+        """Update attributes of a node.
+
+        Parameters
+        ----------
+        node_id : hashable, node to update.
+        attrs : dict
+            New attributes to assign to the node
+        """
+        if not self._has_node(node_id):
+            raise GraphError(
+                "Node '{}' does not exist!".format(node_id))
+        if attrs is None:
+            warnings.warn(
+                "You want to update '{}' attrs with an empty attrs_dict!".format(
+                    node_id),
+                GraphAttrsWarning
+            )
+            return
+        new_attrs = safe_deepcopy_dict(attrs)
+        if normalize is True:
+            normalize_attrs(new_attrs)
+        if node_id in self._added_nodes:
+            self._added_nodes[node_id] = new_attrs
+        else:
+            self._modified_nodes[node_id] = new_attrs
+
+    def update_edge_attrs(self, s, t, attrs, normalize=True):
+        """Update attributes of an edge.
+
+        Parameters
+        ----------
+        s : hashable, source node of the edge to update.
+        t : hashable, target node of the edge to update.
+        attrs : dict
+            New attributes to assign to the edge
+        """
+        if not self._has_edge(s, t):
+            raise GraphError("Edge '{}->{}' does not exist!".format(s, t))
+        if attrs is None:
+            warnings.warn(
+                "You want to update '{}->{}' attrs with an empty attrs_dict".format(
+                    s, t), GraphAttrsWarning
+            )
+            return
+        new_attrs = safe_deepcopy_dict(attrs)
+        if normalize is True:
+            normalize_attrs(new_attrs)
+        if (s, t) in self._added_edges:
+            self._added_edges[(s, t)] = new_attrs
+        else:
+            self._modified_edges[(s, t)] = new_attrs
+
+    def successors(self, node_id):
+        """Return the set of successors."""
+        if not self._has_node(node_id):
+            raise GraphError(
+                "Node '{}' does not exist in the graph".format(node_id))
+        result = []
+        if self._is_base_node(node_id):
+            result = [
+                t for t in self._base.successors(node_id)
+                if self._has_base_edge(node_id, t)
+            ]
+        return result + list(self._added_succ.get(node_id, []))
+
+    def predecessors(self, node_id):
+        """Return the set of predecessors."""
+        if not self._has_node(node_id):
+            raise GraphError(
+                "Node '{}' does not exist in the graph".format(node_id))
+        result = []
+        if self._is_base_node(node_id):
+            result = [
+                s for s in self._base.predecessors(node_id)
+                if self._has_base_edge(s, node_id)
+            ]
+        return result + list(self._added_pred.get(node_id, []))
+
+    def find_matching(self, pattern, nodes=None,
+                      graph_typing=None, pattern_typing=None):
+        """Find matching of a pattern in the materialized overlay."""
+        return self.materialize().find_matching(
+            pattern, nodes, graph_typing, pattern_typing)
+
+    # Overlay-specific methods
+
+    @property
+    def base(self):
+        """Return the base graph of the overlay."""
+        return self._base
+
+    def is_modified(self):
+        """Test if the overlay differs from its base graph."""
+        return any([
+            self._added_nodes, self._removed_nodes, self._modified_nodes,
+            self._added_edges, self._removed_edges, self._modified_edges
+        ])
+
+    def materialize(self):
+        """Create a standalone graph object from the overlay.
+
+        Returns
+        -------
+        graph : regraph.NXGraph
+            New graph containing the nodes and the edges of the overlay
+        """
+        graph = NXGraph()
+        graph.add_nodes_from(self.nodes(data=True))
+        graph.add_edges_from(self.edges(data=True))
+        return graph
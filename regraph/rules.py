@@ -7,16 +7,25 @@ https://link.springer.com/chapter/10.1007/11841883_4).
 import copy
 import warnings
 
+from concurrent.futures import ProcessPoolExecutor
+from types import MappingProxyType
+
 from regraph.backends.networkx.graphs import NXGraph
 from regraph.backends.networkx.plotting import plot_rule
 
-from regraph.command_parser import parser
+from regraph.attribute_sets import FiniteSet
+from regraph.command_parser import parse_script
 from regraph.utils import (keys_by_value,
+                           keys_by_values,
+                           generate_new_id,
+                           safe_deepcopy_dict,
                            make_canonical_commands,
                            dict_sub,
                            attrs_union,
                            remove_forbidden,
-                           normalize_attrs)
+                           normalize_attrs,
+                           attrs_fingerprint,
+                           wl_fingerprint)
 from regraph.category_utils import (identity,
                                     check_homomorphism,
                                     pullback_complement,
@@ -30,6 +39,470 @@ from regraph.exceptions import (ReGraphWarning, ParsingError,
                                 RuleError)
 
 
+class RuleChangeSet(object):
+    """Summary of the changes performed by a rule.
+
+    A change-set is computed from a rule in a single pass over its
+    graphs and homomorphisms (see `Rule.changes`) and is shared by
+    all its users, so it should not be modified: sets of nodes and edges
+    are frozen sets, dictionaries are read-only mappings (the attribute
+    dictionaries they contain are not copied). The getters of the rule
+    (such as `Rule.removed_nodes`) return modifiable copies of
+    the change-set.
+
+    Attributes
+    ----------
+    added_nodes : frozenset
+        Nodes from `rhs` added by the rule
+    added_edges : frozenset
+        Edges from `rhs` added by the rule
+    added_node_attrs : mapping
+        Node attributes added by the rule (keys are nodes from `rhs`)
+    added_edge_attrs : mapping
+        Edge attributes added by the rule (keys are edges from `rhs`)
+    merged_nodes : mapping
+        Nodes from `rhs` and sets of nodes from `p` merged into them
+    removed_nodes : frozenset
+        Nodes from `lhs` removed by the rule
+    removed_edges : frozenset
+        Edges from `p` removed by the rule
+    removed_node_attrs : mapping
+        Node attributes removed by the rule (keys are nodes from `p`)
+    removed_edge_attrs : mapping
+        Edge attributes removed by the rule (keys are edges from `p`)
+    cloned_nodes : mapping
+        Nodes from `lhs` and sets of their clones from `p`
+    lhs_preimages : mapping
+        Nodes from `lhs` and lists of their preimages in `p`
+    rhs_preimages : mapping
+        Nodes from `rhs` and lists of their preimages in `p`
+    is_restrictive : bool
+        True if the rule removes nodes/edges/attributes or clones nodes
+    is_relaxing : bool
+        True if the rule adds nodes/edges/attributes or merges nodes
+    """
+
+    def __init__(self, rule):
+        """Compute the change-set of a rule."""
+        self._components = (
+            rule.p, rule.lhs, rule.rhs, rule.p_lhs, rule.p_rhs)
+        self._revisions = _graph_revisions(self._components)
+
+        p, lhs, rhs = rule.p, rule.lhs, rule.rhs
+        lhs_preimages = keys_by_values(rule.p_lhs)
+        rhs_preimages = keys_by_values(rule.p_rhs)
+
+        # Changes performed by the restrictive part p->lhs
+        removed_nodes = set()
+        cloned_nodes = dict()
+        removed_node_attrs = dict()
+        for node in lhs.nodes():
+            p_nodes = lhs_preimages.get(node, [])
+            if len(p_nodes) == 0:
+                removed_nodes.add(node)
+            elif len(p_nodes) > 1:
+                cloned_nodes[node] = frozenset(p_nodes)
+            for p_node in p_nodes:
+                new_attrs = dict_sub(lhs.get_node(node), p.get_node(p_node))
+                if len(new_attrs) > 0:
+                    normalize_attrs(new_attrs)
+                    removed_node_attrs[p_node] = new_attrs
+
+        removed_edges = set()
+        removed_edge_attrs = dict()
+        for s, t in lhs.edges():
+            for s_p_node in lhs_preimages.get(s, []):
+                for t_p_node in lhs_preimages.get(t, []):
+                    if (s_p_node, t_p_node) not in p.edges():
+                        removed_edges.add((s_p_node, t_p_node))
+                    else:
+                        new_attrs = dict_sub(
+                            lhs.get_edge(s, t),
+                            p.get_edge(s_p_node, t_p_node)
+                        )
+                        if len(new_attrs) > 0:
+                            normalize_attrs(new_attrs)
+                            removed_edge_attrs[(s_p_node, t_p_node)] =\
+                                new_attrs
+
+        # Changes performed by the expansive part p->rhs
+        added_nodes = set()
+        merged_nodes = dict()
+        added_node_attrs = dict()
+        for node in rhs.nodes():
+            p_nodes = rhs_preimages.get(node, [])
+            if len(p_nodes) == 0:
+                added_nodes.add(node)
+                if len(rhs.get_node(node)) > 0:
+                    added_node_attrs[node] = safe_deepcopy_dict(
+                        rhs.get_node(node))
+            elif len(p_nodes) > 1:
+                merged_nodes[node] = frozenset(p_nodes)
+            new_attrs = {}
+            for p_node in p_nodes:
+                new_attrs = attrs_union(new_attrs, dict_sub(
+                    rhs.get_node(node), p.get_node(p_node)))
+            if len(new_attrs) > 0:
+                added_node_attrs[node] = new_attrs
+
+        added_edges = set()
+        added_edge_attrs = dict()
+        for s, t in rhs.edges():
+            s_p_nodes = rhs_preimages.get(s, [])
+            t_p_nodes = rhs_preimages.get(t, [])
+            if len(s_p_nodes) == 0 or len(t_p_nodes) == 0:
+                added_edges.add((s, t))
+                if len(rhs.get_edge(s, t)) > 0:
+                    added_edge_attrs[(s, t)] = safe_deepcopy_dict(
+                        rhs.get_edge(s, t))
+            found_edge = False
+            new_attrs = {}
+            for s_p_node in s_p_nodes:
+                for t_p_node in t_p_nodes:
+                    if (s_p_node, t_p_node) in p.edges():
+                        found_edge = True
+                        new_attrs = attrs_union(
+                            new_attrs,
+                            dict_sub(
+                                rhs.get_edge(s, t),
+                                p.get_edge(s_p_node, t_p_node)
+                            )
+                        )
+                    else:
+                        new_attrs = safe_deepcopy_dict(rhs.get_edge(s, t))
+            if len(s_p_nodes) > 0 and len(t_p_nodes) > 0 and not found_edge:
+                added_edges.add((s, t))
+            if len(new_attrs) > 0:
+                added_edge_attrs[(s, t)] = new_attrs
+
+        self.added_nodes = frozenset(added_nodes)
+        self.added_edges = frozenset(added_edges)
+        self.added_node_attrs = MappingProxyType(added_node_attrs)
+        self.added_edge_attrs = MappingProxyType(added_edge_attrs)
+        self.merged_nodes = MappingProxyType(merged_nodes)
+        self.removed_nodes = frozenset(removed_nodes)
+        self.removed_edges = frozenset(removed_edges)
+        self.removed_node_attrs = MappingProxyType(removed_node_attrs)
+        self.removed_edge_attrs = MappingProxyType(removed_edge_attrs)
+        self.cloned_nodes = MappingProxyType(cloned_nodes)
+        self.lhs_preimages = MappingProxyType(lhs_preimages)
+        self.rhs_preimages = MappingProxyType(rhs_preimages)
+        self.is_restrictive = (
+            len(removed_nodes) > 0 or
+            len(cloned_nodes) > 0 or
+            len(removed_node_attrs) > 0 or
+            len(removed_edges) > 0 or
+            len(removed_edge_attrs) > 0
+        )
+        self.is_relaxing = (
+            len(added_nodes) > 0 or
+            len(merged_nodes) > 0 or
+            len(added_node_attrs) > 0 or
+            len(added_edges) > 0 or
+            len(added_edge_attrs) > 0
+        )
+
+    def is_valid(self, rule):
+        """Test if the change-set is up to date with the rule.
+
+        The change-set is up to date if the graphs and the homomorphisms
+        of the rule are the same objects that were not modified since
+        the change-set was computed (according to their modification
+        counters), the test takes constant time.
+        """
+        components = (rule.p, rule.lhs, rule.rhs, rule.p_lhs, rule.p_rhs)
+        if any(c is not old_c
+               for c, old_c in zip(components, self._components)):
+            return False
+        revisions = _graph_revisions(components)
+        return revisions is not None and revisions == self._revisions
+
+
+class RuleProgram(object):
+    """Program of primitive graph operations performing a rule.
+
+    A program is compiled from a rule by `Rule.compile` and can be
+    applied to an instance of the left-hand side of the rule in any
+    graph (see `regraph.Graph.apply_program`). Nodes of the left-hand
+    side, the interface and the right-hand side of the rule are
+    assigned to registers (integers), the operations of the program
+    are tuples of an operation name followed by registers and
+    attributes:
+
+    - `("clone", r, (r_1, ..., r_k))`: `r_1` is assigned the node of `r`,
+      `r_2, ..., r_k` are assigned new clones of this node;
+    - `("remove_node", r)`, `("remove_edge", r_1, r_2)`;
+    - `("remove_node_attrs", r, attrs)`,
+      `("remove_edge_attrs", r_1, r_2, attrs)`;
+    - `("merge", r, (r_1, ..., r_k))`: `r` is assigned the result of
+      the merge of the nodes of `r_1, ..., r_k` (or the node of `r_1`,
+      if `k` is 1);
+    - `("add_node", r, node_id)`: `r` is assigned a new node
+      (whose id is `node_id`, if it is not used in the graph);
+    - `("add_edge", r_1, r_2)`;
+    - `("add_node_attrs", r, attrs)`,
+      `("add_edge_attrs", r_1, r_2, attrs)`.
+
+    Programs are picklable. A program is cached by the rule it is
+    compiled from (see `Rule.compile`) and shared by its callers, so
+    it should not be modified.
+
+    Attributes
+    ----------
+    n_registers : int
+        Number of registers of the program
+    inputs : tuple
+        Pairs `(node, register)` of the nodes of the left-hand side
+        of the rule
+    outputs : tuple
+        Pairs `(node, register)` of the nodes of the right-hand side
+        of the rule
+    restrictive : tuple
+        Operations of the restrictive part of the rule (clones and
+        removals)
+    expansive : tuple
+        Operations of the expansive part of the rule (merges and
+        additions)
+    key : tuple
+        Hashable description of the structure of the compiled rule:
+        programs compiled from rules with the same nodes (in the same
+        order), edges, attributes and homomorphisms have equal keys
+        (used to cache backend-specific forms of programs, for example,
+        Cypher queries)
+    """
+
+    def __init__(self, n_registers, inputs, outputs,
+                 restrictive, expansive, inverse=None, key=None):
+        """Initialize a program.
+
+        `inverse` is a tuple `(restrictive, expansive)` with the
+        operations of the inverse program.
+        """
+        self.n_registers = n_registers
+        self.inputs = inputs
+        self.outputs = outputs
+        self.restrictive = restrictive
+        self.expansive = expansive
+        self.key = key
+        self._inverse = inverse
+
+    @classmethod
+    def from_rule(cls, rule):
+        """Compile a rule into a program."""
+        lhs_registers = {n: i for i, n in enumerate(rule.lhs.nodes())}
+        offset = len(lhs_registers)
+        p_registers = {
+            n: offset + i for i, n in enumerate(rule.p.nodes())}
+        offset += len(p_registers)
+        rhs_registers = {
+            n: offset + i for i, n in enumerate(rule.rhs.nodes())}
+        n_registers = offset + len(rhs_registers)
+
+        restrictive, expansive = _compile_operations(
+            rule.lhs, rule.rhs, rule.changes(),
+            lhs_registers, p_registers, rhs_registers)
+        inverse = _compile_operations(
+            rule.rhs, rule.lhs,
+            RuleChangeSet(rule.get_inverted_rule()),
+            rhs_registers, p_registers, lhs_registers)
+
+        return cls(
+            n_registers,
+            tuple(lhs_registers.items()),
+            tuple(rhs_registers.items()),
+            restrictive, expansive, inverse,
+            _rule_key(rule))
+
+    def inverse(self):
+        """Get the program performing the inverse rule.
+
+        The inverse program takes an instance of the right-hand side
+        of the rule (for example, returned by the application of this
+        program) and undoes the rewriting (if the rule is refined, see
+        `Rule.refined`, the original graph is restored up to the ids
+        of the cloned and merged nodes).
+        """
+        restrictive, expansive = self._inverse
+        key = None
+        if self.key is not None:
+            key = ("inverse", self.key)
+        return RuleProgram(
+            self.n_registers, self.outputs, self.inputs,
+            restrictive, expansive,
+            (self.restrictive, self.expansive), key)
+
+    def is_in_place(self):
+        """Test if the program neither clones, merges nor adds nodes."""
+        for op in self.restrictive:
+            if op[0] == "clone" and len(op[2]) > 1:
+                return False
+        for op in self.expansive:
+            if op[0] == "add_node" or (op[0] == "merge" and len(op[2]) > 1):
+                return False
+        return True
+
+    def in_place_output(self, instance):
+        """Get the output of an in-place program without applying it.
+
+        The nodes of an instance are not renamed by a program that
+        neither clones, merges nor adds nodes, so its output
+        (an instance of the right-hand side of the rule) is determined
+        by its input.
+        """
+        registers = [None] * self.n_registers
+        for node, r in self.inputs:
+            registers[r] = instance[node]
+        for op in self.restrictive:
+            if op[0] == "clone":
+                registers[op[2][0]] = registers[op[1]]
+        for op in self.expansive:
+            if op[0] == "merge":
+                registers[op[1]] = registers[op[2][0]]
+        return {node: registers[r] for node, r in self.outputs}
+
+    def __len__(self):
+        """Return the number of operations of the program."""
+        return len(self.restrictive) + len(self.expansive)
+
+
+def _compile_operations(lhs, rhs, changes, lhs_registers,
+                        p_registers, rhs_registers):
+    """Compile the operations performing a change-set."""
+    restrictive = []
+    # Clone nodes
+    for n, p_nodes in changes.cloned_nodes.items():
+        restrictive.append((
+            "clone", lhs_registers[n],
+            tuple(p_registers[p] for p in p_nodes)))
+    # Remove nodes and bind preserved nodes
+    for n in lhs.nodes():
+        if n in changes.removed_nodes:
+            restrictive.append(("remove_node", lhs_registers[n]))
+        elif n not in changes.cloned_nodes:
+            restrictive.append((
+                "clone", lhs_registers[n],
+                (p_registers[changes.lhs_preimages[n][0]],)))
+    for u, v in changes.removed_edges:
+        restrictive.append(("remove_edge", p_registers[u], p_registers[v]))
+    for n, attrs in changes.removed_node_attrs.items():
+        restrictive.append(("remove_node_attrs", p_registers[n], attrs))
+    for (u, v), attrs in changes.removed_edge_attrs.items():
+        restrictive.append((
+            "remove_edge_attrs", p_registers[u], p_registers[v], attrs))
+
+    expansive = []
+    # Merge nodes
+    for n, p_nodes in changes.merged_nodes.items():
+        expansive.append((
+            "merge", rhs_registers[n],
+            tuple(p_registers[p] for p in p_nodes)))
+    # Add nodes and bind preserved nodes
+    for n in rhs.nodes():
+        if n in changes.added_nodes:
+            expansive.append(("add_node", rhs_registers[n], n))
+        elif n not in changes.merged_nodes:
+            expansive.append((
+                "merge", rhs_registers[n],
+                (p_registers[changes.rhs_preimages[n][0]],)))
+    for u, v in changes.added_edges:
+        expansive.append(("add_edge", rhs_registers[u], rhs_registers[v]))
+    for n, attrs in changes.added_node_attrs.items():
+        expansive.append(("add_node_attrs", rhs_registers[n], attrs))
+    for (u, v), attrs in changes.added_edge_attrs.items():
+        expansive.append((
+            "add_edge_attrs", rhs_registers[u], rhs_registers[v], attrs))
+    return tuple(restrictive), tuple(expansive)
+
+
+def _attrs_key(attrs):
+    """Get a hashable description of attributes."""
+    key = []
+    for k, v in attrs.items():
+        if isinstance(v, FiniteSet):
+            value = frozenset(v.fset)
+        else:
+            value = repr(v.to_json())
+        key.append((k, value))
+    return frozenset(key)
+
+
+def _graph_key(graph):
+    """Get a hashable description of a graph (sensitive to node order)."""
+    return (
+        tuple((n, _attrs_key(graph.get_node(n))) for n in graph.nodes()),
+        frozenset(
+            (u, v, _attrs_key(graph.get_edge(u, v)))
+            for u, v in graph.edges())
+    )
+
+
+def _rule_key(rule):
+    """Get a hashable description of the structure of a rule."""
+    return (
+        _graph_key(rule.lhs), _graph_key(rule.p), _graph_key(rule.rhs),
+        tuple(rule.p_lhs[n] for n in rule.p.nodes()),
+        tuple(rule.p_rhs[n] for n in rule.p.nodes())
+    )
+
+
+class _Homomorphism(dict):
+    """Dictionary of a homomorphism of a rule with a modification counter.
+
+    The counter `_revision` is incremented by every modification of
+    the dictionary, so that the change-set of the rule can be validated
+    without comparing the homomorphisms (see `RuleChangeSet.is_valid`).
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the homomorphism."""
+        super().__init__(*args, **kwargs)
+        self._revision = 0
+
+    def __reduce__(self):
+        """Reduce the homomorphism to its items (for copy and pickle)."""
+        return (_Homomorphism, (dict(self),))
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._revision += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._revision += 1
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        super().clear()
+        self._revision += 1
+
+    def pop(self, *args):
+        self._revision += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self._revision += 1
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self._revision += 1
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._revision += 1
+
+
+def _graph_revisions(graphs):
+    """Get modification counters of graphs (None if not available)."""
+    revisions = tuple(getattr(g, "_revision", None) for g in graphs)
+    if None in revisions:
+        return None
+    return revisions
+
+
 class Rule(object):
     """Class representing rewriting rules.
 
@@ -121,8 +594,45 @@ class Rule(object):
             check_homomorphism(p, rhs, p_rhs)
             self.p_rhs = copy.deepcopy(p_rhs)
 
+        self._changes = None
+        self._program = None
+        self._fingerprint = None
+        self._canonical = None
         return
 
+    def __getstate__(self):
+        """Get the state of the rule (without the cached change-set)."""
+        state = self.__dict__.copy()
+        state["_changes"] = None
+        state["_program"] = None
+        state["_fingerprint"] = None
+        state["_canonical"] = None
+        return state
+
+    @property
+    def p_lhs(self):
+        """Homomorphism from `p` to `lhs`."""
+        return self._p_lhs
+
+    @p_lhs.setter
+    def p_lhs(self, mapping):
+        """Set the homomorphism from `p` to `lhs` (the dict is copied)."""
+        if not isinstance(mapping, _Homomorphism):
+            mapping = _Homomorphism(mapping)
+        self._p_lhs = mapping
+
+    @property
+    def p_rhs(self):
+        """Homomorphism from `p` to `rhs`."""
+        return self._p_rhs
+
+    @p_rhs.setter
+    def p_rhs(self, mapping):
+        """Set the homomorphism from `p` to `rhs` (the dict is copied)."""
+        if not isinstance(mapping, _Homomorphism):
+            mapping = _Homomorphism(mapping)
+        self._p_rhs = mapping
+
     @classmethod
     def from_transform(cls, pattern, commands=None):
         """Initialize a rule from the transformation.
@@ -139,9 +649,14 @@ class Rule(object):
         ----------
         pattern : networkx.(Di)Graph
             Pattern graph to initialize and the lhs of the rule.
-        commands : str, optional
-            Script containing transformation commands, which
-            can be parsed by `regraph.parser.parse`.
+        commands : str or list of str, optional
+            Script containing transformation commands (one per line),
+            which can be parsed by `regraph.command_parser.parse_script`.
+
+        Raises
+        ------
+        ParsingError
+            If some of the commands cannot be parsed
 
         """
         if not isinstance(pattern, NXGraph):
@@ -164,17 +679,9 @@ class Rule(object):
             # commands = make_canonical_commands(p, commands, True)
             # 2. apply the commands
 
-            command_strings = [
-                c for b in commands if len(b) > 0 for c in b.splitlines()
-            ]
-
-            actions = []
-            for command in command_strings:
-                try:
-                    parsed = parser.parseString(command).asDict()
-                    actions.append(parsed)
-                except:
-                    raise ParsingError("Cannot parse command '%s'" % command)
+            if not isinstance(commands, str):
+                commands = "\n".join(commands)
+            actions = parse_script(commands)
 
             for action in actions:
                 if action["keyword"] == "clone":
@@ -787,6 +1294,157 @@ class Rule(object):
     #         rhs_g_prime = graph.rewrite(self, instance)
 
     #     return (g_prime, rhs_g_prime)
+    def changes(self):
+        """Get the change-set of the rule.
+
+        The change-set is computed once and cached, the cache is
+        invalidated whenever `lhs`, `p`, `rhs`, `p_lhs` or `p_rhs`
+        are modified (either by the `inject_*` methods or directly),
+        so repeated applications of the same rule do not recompute
+        its changes.
+
+        Returns
+        -------
+        changes : regraph.rules.RuleChangeSet
+        """
+        changes = getattr(self, "_changes", None)
+        if changes is None or not changes.is_valid(self):
+            changes = RuleChangeSet(self)
+            self._changes = changes
+        return changes
+
+    def compile(self):
+        """Compile the rule into a program of primitive graph operations.
+
+        The program is parameterised by an instance of the left-hand
+        side of the rule and can be applied to any graph backend
+        (see `regraph.Graph.apply_program`). As the change-set,
+        the program is cached and recompiled only if the rule
+        was modified.
+
+        Returns
+        -------
+        program : regraph.rules.RuleProgram
+        """
+        changes = self.changes()
+        cached = getattr(self, "_program", None)
+        if cached is None or cached[0] is not changes:
+            cached = (changes, RuleProgram.from_rule(self))
+            self._program = cached
+        return cached[1]
+
+    def fingerprint(self):
+        """Get a structural fingerprint of the rule.
+
+        The fingerprint is computed by the Weisfeiler-Lehman refinement
+        (see `regraph.utils.wl_fingerprint`) of the graph whose nodes
+        are the nodes of `lhs`, `p` and `rhs` (labelled by the graph
+        they belong to and by their attributes) and whose edges are the
+        edges of the three graphs together with the homomorphisms
+        `p_lhs` and `p_rhs`. It covers the attributes, but not the ids
+        of the nodes: rules that differ only by the naming of nodes
+        have equal fingerprints. The fingerprint is stable across
+        Python processes and, as the change-set, is cached until
+        the rule is modified.
+
+        Returns
+        -------
+        fingerprint : str
+            Hexadecimal fingerprint of the rule
+        """
+        return self._refinement()[0]
+
+    def _refinement(self):
+        """Get the fingerprint of the rule and the labels of its nodes.
+
+        The labels are the final labels of the refinement computed
+        by `fingerprint`, their keys are the pairs `(graph, node)`,
+        where `graph` is one of `"lhs"`, `"p"` and `"rhs"`.
+        """
+        changes = self.changes()
+        cached = getattr(self, "_fingerprint", None)
+        if cached is None or cached[0] is not changes:
+            node_labels = dict()
+            edges = []
+            for name, graph in [("lhs", self.lhs), ("p", self.p),
+                                ("rhs", self.rhs)]:
+                for n, attrs in graph.nodes(data=True):
+                    node_labels[(name, n)] = name + attrs_fingerprint(attrs)
+                for u, v, attrs in graph.edges(data=True):
+                    edges.append(
+                        ((name, u), (name, v), attrs_fingerprint(attrs)))
+            for p_node, lhs_node in self.p_lhs.items():
+                edges.append((("p", p_node), ("lhs", lhs_node), "p_lhs"))
+            for p_node, rhs_node in self.p_rhs.items():
+                edges.append((("p", p_node), ("rhs", rhs_node), "p_rhs"))
+            fingerprint, labels = wl_fingerprint(node_labels, edges)
+            cached = (changes, (fingerprint, labels))
+            self._fingerprint = cached
+        return cached[1]
+
+    def _canonical_form(self):
+        """Get a copy of the rule with canonically named nodes.
+
+        The nodes of `lhs`, `p` and `rhs` are ordered by their labels
+        in the refinement computed by `fingerprint` (ties are broken by
+        the order of the nodes in the rule) and renamed to their
+        positions in this order. Rules that differ only by the naming
+        of nodes usually have equal canonical forms, which allows to
+        share the structures derived from rules (e.g. the query
+        templates of the Neo4j backend) independently of the names.
+        As the change-set, the canonical form is cached until the rule
+        is modified.
+
+        Returns
+        -------
+        rule : regraph.Rule
+            Rule with canonically named nodes
+        lhs_names : dict
+            Dictionary mapping the nodes of `lhs` to their new names
+        rhs_names : dict
+            Dictionary mapping the nodes of `rhs` to their new names
+        """
+        changes = self.changes()
+        cached = getattr(self, "_canonical", None)
+        if cached is None or cached[0] is not changes:
+            cached = (changes, self._rename_canonically())
+            self._canonical = cached
+        return cached[1]
+
+    def _rename_canonically(self):
+        """Build the canonical form of the rule (see `_canonical_form`)."""
+        _, labels = self._refinement()
+        names = dict()
+        for graph_name, graph in [("lhs", self.lhs), ("p", self.p),
+                                  ("rhs", self.rhs)]:
+            ordered = sorted(
+                enumerate(graph.nodes()),
+                key=lambda x: (labels[(graph_name, x[1])], x[0]))
+            names[graph_name] = {
+                n: "{}{}".format(graph_name, i)
+                for i, (_, n) in enumerate(ordered)
+            }
+
+        graphs = dict()
+        for graph_name, graph in [("lhs", self.lhs), ("p", self.p),
+                                  ("rhs", self.rhs)]:
+            renaming = names[graph_name]
+            new_graph = NXGraph()
+            new_graph.add_nodes_from(sorted(
+                ((renaming[n], attrs)
+                 for n, attrs in graph.nodes(data=True)),
+                key=lambda x: int(x[0][len(graph_name):])))
+            new_graph.add_edges_from(sorted(
+                (renaming[u], renaming[v], attrs)
+                for u, v, attrs in graph.edges(data=True)))
+            graphs[graph_name] = new_graph
+
+        rule = Rule(
+            graphs["p"], graphs["lhs"], graphs["rhs"],
+            {names["p"][p]: names["lhs"][l] for p, l in self.p_lhs.items()},
+            {names["p"][p]: names["rhs"][r] for p, r in self.p_rhs.items()})
+        return rule, names["lhs"], names["rhs"]
+
     def added_nodes(self):
         """Get nodes added by the rule.
 
@@ -795,12 +1453,7 @@ class Rule(object):
         nodes : set
             Set of nodes from `rhs` added by the rule.
         """
-        nodes = set()
-        for r_node in self.rhs.nodes():
-            p_nodes = keys_by_value(self.p_rhs, r_node)
-            if len(p_nodes) == 0:
-                nodes.add(r_node)
-        return nodes
+        return set(self.changes().added_nodes)
 
     def added_edges(self):
         """Get edges added by the rule.
@@ -810,21 +1463,7 @@ class Rule(object):
         edges : set
             Set of edges from `rhs` added by the rule.
         """
-        edges = set()
-        for s, t in self.rhs.edges():
-            s_p_nodes = keys_by_value(self.p_rhs, s)
-            t_p_nodes = keys_by_value(self.p_rhs, t)
-            if len(s_p_nodes) == 0 or len(t_p_nodes) == 0:
-                edges.add((s, t))
-            else:
-                found_edge = False
-                for s_p_node in s_p_nodes:
-                    for t_p_node in t_p_nodes:
-                        if (s_p_node, t_p_node) in self.p.edges():
-                            found_edge = True
-                if not found_edge:
-                    edges.add((s, t))
-        return edges
+        return set(self.changes().added_edges)
 
     def added_node_attrs(self):
         """Get node attributes added by the rule.
@@ -835,19 +1474,10 @@ class Rule(object):
             Dictionary where keys are nodes from `rhs`
             and values are attribute dictionaries to add.
         """
-        attrs = dict()
-        for node in self.rhs.nodes():
-            p_nodes = keys_by_value(self.p_rhs, node)
-            if len(p_nodes) == 0:
-                if len(self.rhs.get_node(node)) > 0:
-                    attrs[node] = self.rhs.get_node(node)
-            new_attrs = {}
-            for p_node in p_nodes:
-                new_attrs = attrs_union(new_attrs, dict_sub(
-                    self.rhs.get_node(node), self.p.get_node(p_node)))
-            if len(new_attrs) > 0:
-                attrs[node] = new_attrs
-        return attrs
+        return {
+            k: safe_deepcopy_dict(v)
+            for k, v in self.changes().added_node_attrs.items()
+        }
 
     def added_edge_attrs(self):
         """Get edge attributes added by the rule.
@@ -858,29 +1488,10 @@ class Rule(object):
             Dictionary where keys are edges from `rhs`
             and values are attribute dictionaries to add.
         """
-        attrs = dict()
-        for s, t in self.rhs.edges():
-            s_p_nodes = keys_by_value(self.p_rhs, s)
-            t_p_nodes = keys_by_value(self.p_rhs, t)
-            if len(s_p_nodes) == 0 or len(t_p_nodes) == 0:
-                if len(self.rhs.get_edge(s, t)) > 0:
-                    attrs[(s, t)] = self.rhs.get_edge(s, t)
-            new_attrs = {}
-            for s_p_node in s_p_nodes:
-                for t_p_node in t_p_nodes:
-                    if (s_p_node, t_p_node) in self.p.edges():
-                        new_attrs = attrs_union(
-                            new_attrs,
-                            dict_sub(
-                                self.rhs.get_edge(s, t),
-                                self.p.get_edge(s_p_node, t_p_node)
-                            )
-                        )
-                    else:
-                        new_attrs = self.rhs.get_edge(s, t)
-            if len(new_attrs) > 0:
-                attrs[(s, t)] = new_attrs
-        return attrs
+        return {
+            k: safe_deepcopy_dict(v)
+            for k, v in self.changes().added_edge_attrs.items()
+        }
 
     def merged_nodes(self):
         """Get nodes merged by the rule.
@@ -891,12 +1502,9 @@ class Rule(object):
             Dictionary where keys are nodes from `rhs` and
             values are sets of nodes from `p` that are merged.
         """
-        nodes = dict()
-        for node in self.rhs.nodes():
-            p_nodes = keys_by_value(self.p_rhs, node)
-            if len(p_nodes) > 1:
-                nodes[node] = set(p_nodes)
-        return nodes
+        return {
+            k: set(v) for k, v in self.changes().merged_nodes.items()
+        }
 
     def removed_nodes(self):
         """Get nodes removed by the rule.
@@ -906,12 +1514,7 @@ class Rule(object):
         nodes : set
             Set of nodes from `lhs` removed by the rule.
         """
-        nodes = set()
-        for node in self.lhs.nodes():
-            p_nodes = keys_by_value(self.p_lhs, node)
-            if len(p_nodes) == 0:
-                nodes.add(node)
-        return nodes
+        return set(self.changes().removed_nodes)
 
     def removed_edges(self):
         """Get edges removed by the rule.
@@ -919,18 +1522,9 @@ class Rule(object):
         Returns
         -------
         edges : set
-            Set of edges from `lhs` removed by the rule.
+            Set of edges from `p` removed by the rule.
         """
-        edges = set()
-        for s, t in self.lhs.edges():
-            s_p_nodes = keys_by_value(self.p_lhs, s)
-            t_p_nodes = keys_by_value(self.p_lhs, t)
-            if len(s_p_nodes) != 0 and len(t_p_nodes) != 0:
-                for s_p_node in s_p_nodes:
-                    for t_p_node in t_p_nodes:
-                        if (s_p_node, t_p_node) not in self.p.edges():
-                            edges.add((s_p_node, t_p_node))
-        return edges
+        return set(self.changes().removed_edges)
 
     def removed_node_attrs(self):
         """Get node attributes removed by the rule.
@@ -941,16 +1535,10 @@ class Rule(object):
             Dictionary where keys are nodes from `p`
             and values are attribute dictionaries to remove.
         """
-        attrs = dict()
-        for node in self.lhs.nodes():
-            p_nodes = keys_by_value(self.p_lhs, node)
-            for p_node in p_nodes:
-                new_attrs = dict_sub(
-                    self.lhs.get_node(node), self.p.get_node(p_node))
-                if len(new_attrs) > 0:
-                    normalize_attrs(new_attrs)
-                    attrs[p_node] = new_attrs
-        return attrs
+        return {
+            k: safe_deepcopy_dict(v)
+            for k, v in self.changes().removed_node_attrs.items()
+        }
 
     def removed_edge_attrs(self):
         """Get edge attributes removed by the rule.
@@ -961,21 +1549,10 @@ class Rule(object):
             Dictionary where keys are edges from `p`
             and values are attribute dictionaries to remove.
         """
-        attrs = dict()
-        for s, t in self.lhs.edges():
-            s_p_nodes = keys_by_value(self.p_lhs, s)
-            t_p_nodes = keys_by_value(self.p_lhs, t)
-            for s_p_node in s_p_nodes:
-                for t_p_node in t_p_nodes:
-                    if (s_p_node, t_p_node) in self.p.edges():
-                        new_attrs = dict_sub(
-                            self.lhs.get_edge(s, t),
-                            self.p.get_edge(s_p_node, t_p_node)
-                        )
-                        if len(new_attrs) > 0:
-                            normalize_attrs(new_attrs)
-                            attrs[(s_p_node, t_p_node)] = new_attrs
-        return attrs
+        return {
+            k: safe_deepcopy_dict(v)
+            for k, v in self.changes().removed_edge_attrs.items()
+        }
 
     def cloned_nodes(self):
         """Get nodes cloned by the rule.
@@ -986,12 +1563,9 @@ class Rule(object):
             Dictionary where keys are nodes from `lhs` and
             values are sets of corresponding nodes from `p`.
         """
-        nodes = dict()
-        for node in self.lhs.nodes():
-            p_nodes = keys_by_value(self.p_lhs, node)
-            if len(p_nodes) > 1:
-                nodes[node] = set(p_nodes)
-        return nodes
+        return {
+            k: set(v) for k, v in self.changes().cloned_nodes.items()
+        }
 
     def is_restrictive(self):
         """Check if the rule is  restrictive.
@@ -1005,11 +1579,7 @@ class Rule(object):
         otherwise
 
         """
-        return len(self.removed_nodes()) > 0 or\
-            len(self.cloned_nodes()) > 0 or\
-            len(self.removed_node_attrs()) > 0 or\
-            len(self.removed_edges()) > 0 or\
-            len(self.removed_edge_attrs()) > 0
+        return self.changes().is_restrictive
 
     def is_relaxing(self):
         """Check if the rule is relaxing.
@@ -1022,11 +1592,7 @@ class Rule(object):
         `True` if the rule is relaxing, `False` otherwise
 
         """
-        return len(self.added_nodes()) > 0 or\
-            len(self.merged_nodes()) > 0 or\
-            len(self.added_node_attrs()) > 0 or\
-            len(self.added_edges()) > 0 or\
-            len(self.added_edge_attrs()) > 0
+        return self.changes().is_relaxing
 
     def to_commands(self):
         """Convert the rule to a list of commands.
@@ -1297,105 +1863,137 @@ class Rule(object):
         plot_rule(self, filename, title)
 
     def refine(self, graph, instance):
-        """Get refined (side-effect-free) version of the rule."""
-        new_instance = {}
-        for k, v in instance.items():
-            new_instance[k] = v
+        """Get refined (side-effect-free) version of the rule.
 
-        removed_attrs = self.removed_node_attrs()
-        removed_edge_attrs = self.removed_edge_attrs()
+        The rule is refined in-place, see `Rule.refined` for
+        the version that does not modify the rule.
+        """
+        return self._refine(graph, instance)
 
-        added_nodes = set()
+    def refined(self, graph, instance):
+        """Get refined (side-effect-free) copy of the rule.
 
-        def add_neighbors_to_rule(n, removed_edges):
-
-            def add_preserved_edges(lhs_source, lhs_target, edge_attrs, removed_edges):
-                # Add preserved edges
-                p_sources = keys_by_value(self.p_lhs, lhs_source)
-                p_targets = keys_by_value(self.p_lhs, lhs_target)
-                for sp in p_sources:
-                    for tp in p_targets:
-                        if (sp, tp) not in removed_edges:
-                            if not self.p.exists_edge(sp, tp):
-                                self.p.add_edge(sp, tp)
-                                if not self.rhs.exists_edge(
-                                        self.p_rhs[sp], self.p_rhs[tp]):
-                                    self.rhs.add_edge(self.p_rhs[sp], self.p_rhs[tp])
-                            # Compute preserved edge attributes
-                            for k, v in edge_attrs.items():
-                                if (sp, tp) not in removed_edge_attrs.keys() or\
-                                   k not in removed_edge_attrs[(sp, tp)]:
-                                    self.p.add_edge_attrs(sp, tp, {k: v})
-                                    self.rhs.add_edge_attrs(
-                                        self.p_rhs[sp], self.p_rhs[tp],
-                                        {k: v})
-
-            visited = set()
-            # add successors
-            for s in graph.successors(instance[n]):
-                if s not in visited:
-                    visited.add(s)
-                    if s in new_instance.values():
-                        # node 's' has already been added
-                        lhs_s_node = keys_by_value(new_instance, s)[0]
-                    else:
-                        # we need to add 's'
-                        lhs_s_node = self.lhs.generate_new_node_id(s)
-                        self._add_node_lhs(lhs_s_node)
-                        added_nodes.add(s)
-                        new_instance[lhs_s_node] = s
-
-                    edge_attrs = graph.get_edge(instance[n], s)
-                    if not self.lhs.exists_edge(n, lhs_s_node):
-                        self.lhs.add_edge(n, lhs_s_node, edge_attrs)
-                    else:
-                        self.lhs.add_edge_attrs(n, lhs_s_node, edge_attrs)
-                    add_preserved_edges(n, lhs_s_node, edge_attrs, removed_edges)
-
-            visited = set()
-            # add predecessors
-            for p in graph.predecessors(instance[n]):
-                if p not in visited:
-                    visited.add(p)
-                    if p in new_instance.values():
-                        # node 'p' has already been added
-                        lhs_p_node = keys_by_value(new_instance, p)[0]
-                    else:
-                        # we need to add 'p'
-                        lhs_p_node = self.lhs.generate_new_node_id(p)
-                        self._add_node_lhs(lhs_p_node)
-                        added_nodes.add(p)
-                        new_instance[lhs_p_node] = p
-
-                    edge_attrs = graph.get_edge(p, instance[n])
-                    if not self.lhs.exists_edge(lhs_p_node, n):
-                        self.lhs.add_edge(lhs_p_node, n, edge_attrs)
-                    else:
-                        self.lhs.add_edge_attrs(lhs_p_node, n, edge_attrs)
-                    add_preserved_edges(lhs_p_node, n, edge_attrs, removed_edges)
+        The left-hand side of the refined rule contains the
+        neighbourhoods of the nodes removed or merged by the rule,
+        so that its application does not produce side-effects
+        (implicit removal of incident edges, implicit merge of
+        attributes). The original rule is not modified.
+
+        Parameters
+        ----------
+        graph : regraph.Graph
+            Graph to rewrite
+        instance : dict
+            Instance of the left-hand side of the rule in the graph
+
+        Returns
+        -------
+        rule : regraph.Rule
+            Refined rule
+        instance : dict
+            Instance of the left-hand side of the refined rule
+        """
+        rule = copy.deepcopy(self)
+        new_instance = rule._refine(graph, instance)
+        return rule, new_instance
+
+    def _refine(self, graph, instance):
+        """Refine the rule in-place and return the new instance."""
+        new_instance = dict(instance)
+        # Graph node -> node of the lhs, maintained together with
+        # the instance
+        inverse_instance = dict()
+        for k, v in new_instance.items():
+            inverse_instance.setdefault(v, k)
+
+        changes = self.changes()
+        removed_attrs = changes.removed_node_attrs
+        removed_edge_attrs = changes.removed_edge_attrs
+        # Sets of removed nodes, removed edges and merged nodes are
+        # not affected by the refinement
+        removed_nodes = list(changes.removed_nodes)
+        removed_edges = changes.removed_edges
+        merged_nodes = dict(changes.merged_nodes)
+
+        lhs_preimages = {
+            k: list(v) for k, v in changes.lhs_preimages.items()
+        }
+        lhs_nodes = set(self.lhs.nodes())
+
+        affected = list(removed_nodes)
+        for p_nodes in merged_nodes.values():
+            affected.extend(self.p_lhs[p] for p in p_nodes)
+        successors, predecessors = graph.get_neighbourhoods(
+            set(instance[n] for n in affected))
+
+        def add_preserved_edges(lhs_source, lhs_target, edge_attrs):
+            for sp in lhs_preimages.get(lhs_source, []):
+                for tp in lhs_preimages.get(lhs_target, []):
+                    if (sp, tp) not in removed_edges:
+                        if not self.p.exists_edge(sp, tp):
+                            self.p.add_edge(sp, tp)
+                            if not self.rhs.exists_edge(
+                                    self.p_rhs[sp], self.p_rhs[tp]):
+                                self.rhs.add_edge(
+                                    self.p_rhs[sp], self.p_rhs[tp])
+                        # Compute preserved edge attributes
+                        for k, v in edge_attrs.items():
+                            if (sp, tp) not in removed_edge_attrs.keys() or\
+                               k not in removed_edge_attrs[(sp, tp)]:
+                                self.p.add_edge_attrs(sp, tp, {k: v})
+                                self.rhs.add_edge_attrs(
+                                    self.p_rhs[sp], self.p_rhs[tp],
+                                    {k: v})
+
+        def get_lhs_node(node):
+            if node in inverse_instance:
+                # node has already been added
+                return inverse_instance[node]
+            lhs_node = generate_new_id(lhs_nodes, node)
+            lhs_nodes.add(lhs_node)
+            p_node, _ = self._add_node_lhs(lhs_node)
+            lhs_preimages[lhs_node] = [p_node]
+            new_instance[lhs_node] = node
+            inverse_instance[node] = lhs_node
+            return lhs_node
+
+        def add_neighbors_to_rule(n):
+            for s, edge_attrs in successors[instance[n]].items():
+                lhs_s_node = get_lhs_node(s)
+                if not self.lhs.exists_edge(n, lhs_s_node):
+                    self.lhs.add_edge(n, lhs_s_node, edge_attrs)
+                else:
+                    self.lhs.add_edge_attrs(n, lhs_s_node, edge_attrs)
+                add_preserved_edges(n, lhs_s_node, edge_attrs)
+
+            for p, edge_attrs in predecessors[instance[n]].items():
+                lhs_p_node = get_lhs_node(p)
+                if not self.lhs.exists_edge(lhs_p_node, n):
+                    self.lhs.add_edge(lhs_p_node, n, edge_attrs)
+                else:
+                    self.lhs.add_edge_attrs(lhs_p_node, n, edge_attrs)
+                add_preserved_edges(lhs_p_node, n, edge_attrs)
 
         # Remove side-effects of node removal
-        for n in self.removed_nodes():
-            # Add nodes adjacent to removed nodes
+        for n in removed_nodes:
             all_attrs = graph.get_node(instance[n])
             self.lhs.set_node_attrs(n, all_attrs, update=True)
             # Add nodes adjacent to removed nodes
-            add_neighbors_to_rule(n, self.removed_edges())
+            add_neighbors_to_rule(n)
 
         # Remove side-effects of edge removal
         visited_edges = set()
-        for sp, tp in self.removed_edges():
-            if (instance[self.p_lhs[sp]], instance[self.p_lhs[tp]]) not in visited_edges:
-                visited_edges.add((
-                    instance[self.p_lhs[sp]], instance[self.p_lhs[tp]]))
-                all_edge_attrs = graph.get_edge(
-                    instance[self.p_lhs[sp]], instance[self.p_lhs[tp]])
+        for sp, tp in removed_edges:
+            s = instance[self.p_lhs[sp]]
+            t = instance[self.p_lhs[tp]]
+            if (s, t) not in visited_edges:
+                visited_edges.add((s, t))
                 self.lhs.set_edge(
                     self.p_lhs[sp], self.p_lhs[tp],
-                    all_edge_attrs)
+                    graph.get_edge(s, t))
 
         # Remove side-effects of merges
-        for rhs_node, p_nodes in self.merged_nodes().items():
+        for rhs_node, p_nodes in merged_nodes.items():
             for p_node in p_nodes:
                 all_attrs = graph.get_node(
                     instance[self.p_lhs[p_node]])
@@ -1410,8 +2008,8 @@ class Rule(object):
                         self.rhs.add_node_attrs(
                             rhs_node, {k: v})
 
-                # Add nodes adjacent to removed nodes
-                add_neighbors_to_rule(self.p_lhs[p_node], self.removed_edges())
+                # Add nodes adjacent to merged nodes
+                add_neighbors_to_rule(self.p_lhs[p_node])
         return new_instance
 
     def get_inverted_rule(self):
@@ -1595,6 +2193,83 @@ def compose_rules(rule1, lhs_instance1, rhs_instance1,
         return rule, lhs_instance, rhs_instance
 
 
+def _compose_pair(args):
+    (rule1, lhs1, rhs1), (rule2, lhs2, rhs2) = args
+    return compose_rules(rule1, lhs1, rhs1, rule2, lhs2, rhs2)
+
+
+def _compose_hierarchy_pair(args):
+    (h1, lhs1, rhs1), (h2, lhs2, rhs2) = args
+    return compose_rule_hierarchies(h1, lhs1, rhs1, h2, lhs2, rhs2)
+
+
+def _compose_balanced(items, compose_pair, parallel=False, n_workers=None):
+    """Compose a sequence of items pairwise in a balanced tree.
+
+    At every level of the tree consecutive pairs of items are composed
+    (these compositions are independent and, if `parallel` is True,
+    are computed in a pool of processes), so that the size of the
+    composed objects grows uniformly.
+    """
+    items = list(items)
+    pool = None
+    if parallel and len(items) > 2:
+        pool = ProcessPoolExecutor(n_workers)
+    try:
+        while len(items) > 1:
+            pairs = [
+                (items[i], items[i + 1])
+                for i in range(0, len(items) - 1, 2)
+            ]
+            if pool is not None and len(pairs) > 1:
+                composed = list(pool.map(compose_pair, pairs))
+            else:
+                composed = [compose_pair(pair) for pair in pairs]
+            if len(items) % 2 == 1:
+                composed.append(items[-1])
+            items = composed
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return items[0]
+
+
+def compose_rule_sequence(rules_with_instances, parallel=False,
+                          n_workers=None):
+    """Compose a sequence of rules respecting instances.
+
+    The rules are composed pairwise in a balanced tree, which avoids
+    the growth of the intermediate rules produced by composing a long
+    sequence from left to right.
+
+    Parameters
+    ----------
+    rules_with_instances : iterable of tuples
+        Sequence of triples `(rule, lhs_instance, rhs_instance)`,
+        where the instance of the left-hand side of every rule is given
+        in the result of the application of the previous rule
+    parallel : bool, optional
+        If True, independent pairs of rules are composed in a pool
+        of processes
+    n_workers : int, optional
+        Number of processes of the pool
+
+    Returns
+    -------
+    rule : regraph.Rule
+        Composed rule
+    lhs_instance : dict
+        Instance of the left-hand side of the composed rule
+    rhs_instance : dict
+        Instance of the right-hand side of the composed rule
+    """
+    rules_with_instances = list(rules_with_instances)
+    if len(rules_with_instances) == 0:
+        return Rule.identity_rule(), dict(), dict()
+    return _compose_balanced(
+        rules_with_instances, _compose_pair, parallel, n_workers)
+
+
 def _fold_lhs(rule, lhs_instance, rhs_instance):
     # Create a non-injective map from P to G
     # following P -> L >-> G
@@ -1822,6 +2497,41 @@ def compose_rule_hierarchies(rule_hierarchy1, lhs_instances1, rhs_instances1,
     return new_rule_hierarchy, new_lhs_instances, new_rhs_instances
 
 
+def compose_rule_hierarchy_sequence(hierarchies_with_instances,
+                                    parallel=False, n_workers=None):
+    """Compose a sequence of rule hierarchies respecting instances.
+
+    The rule hierarchies are composed pairwise in a balanced tree
+    (see `compose_rule_sequence`).
+
+    Parameters
+    ----------
+    hierarchies_with_instances : iterable of tuples
+        Sequence of triples `(rule_hierarchy, lhs_instances,
+        rhs_instances)`
+    parallel : bool, optional
+        If True, independent pairs of rule hierarchies are composed
+        in a pool of processes
+    n_workers : int, optional
+        Number of processes of the pool
+
+    Returns
+    -------
+    rule_hierarchy : dict
+        Composed rule hierarchy
+    lhs_instances : dict
+        Instances of the left-hand sides of the composed rules
+    rhs_instances : dict
+        Instances of the right-hand sides of the composed rules
+    """
+    hierarchies_with_instances = list(hierarchies_with_instances)
+    if len(hierarchies_with_instances) == 0:
+        return {"rules": {}, "rule_homomorphisms": {}}, dict(), dict()
+    return _compose_balanced(
+        hierarchies_with_instances, _compose_hierarchy_pair,
+        parallel, n_workers)
+
+
 def invert_rule_hierarchy(rule_hierarchy):
     """Get inverted rule hierarchy (swapped lhs and rhs)."""
     new_rule_hierarchy = {
@@ -1,8 +1,10 @@
 """A collection of utils for ReGraph library."""
 import copy
+import hashlib
+import json
 
-from regraph.command_parser import parser
-from regraph.exceptions import ReGraphError, ParsingError, RewritingError
+from regraph.command_parser import parse_command
+from regraph.exceptions import ReGraphError, RewritingError
 from regraph.attribute_sets import AttributeSet, FiniteSet
 
 
@@ -258,6 +260,137 @@ def keys_by_value(dictionary, val):
     return res
 
 
+def keys_by_values(dictionary):
+    """Group keys of a dictionary by their values.
+
+    Computes in a single pass the index of preimages, such that
+    `keys_by_values(d)[val] == keys_by_value(d, val)` for every
+    value `val` of the dictionary.
+    """
+    res = dict()
+    for key, value in dictionary.items():
+        if value in res:
+            res[value].append(key)
+        else:
+            res[value] = [key]
+    return res
+
+
+def select_non_overlapping(instances):
+    """Select instances with pairwise disjoint images.
+
+    Instances are selected greedily in the input order: an instance
+    is selected if its image does not intersect the images of
+    the previously selected ones.
+
+    Parameters
+    ----------
+    instances : list of dict
+        Instances of a pattern in a graph
+
+    Returns
+    -------
+    selected : list of int
+        Positions of the selected instances in `instances`
+    """
+    selected = []
+    used = set()
+    for i, instance in enumerate(instances):
+        image = set(instance.values())
+        if used.isdisjoint(image):
+            selected.append(i)
+            used.update(image)
+    return selected
+
+
+def _digest(*parts):
+    """Get a hexadecimal digest of a sequence of strings."""
+    return hashlib.blake2b(
+        "\x1f".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def attrs_fingerprint(attrs):
+    """Get a canonical string representation of attributes.
+
+    The representation does not depend on the order of the attributes
+    and on the order of the elements of finite sets, and is the same
+    in different Python processes.
+    """
+    items = []
+    for key, value in attrs.items():
+        if isinstance(value, FiniteSet):
+            data = sorted(repr(v) for v in value.fset)
+        elif isinstance(value, AttributeSet):
+            data = value.to_json()
+        else:
+            data = sorted(repr(v) for v in to_set(value))
+        items.append(
+            (repr(key), json.dumps(data, sort_keys=True, default=str)))
+    return repr(sorted(items))
+
+
+def wl_fingerprint(node_labels, edges, n_iterations=None):
+    """Compute the Weisfeiler-Lehman fingerprint of a labelled graph.
+
+    Labels of the nodes are iteratively refined by hashing them
+    together with the multisets of the labels of their in- and
+    out-edges and of the corresponding neighbours. The fingerprint
+    is the hash of the multisets of the final labels of the nodes and
+    the edges, it does not depend on the ids of the nodes: isomorphic
+    graphs have equal fingerprints (the converse does not hold in
+    general, for example, for some regular graphs).
+
+    Parameters
+    ----------
+    node_labels : dict
+        Dictionary whose keys are the nodes of the graph and
+        whose values are their labels (strings)
+    edges : iterable
+        Triples `(source, target, label)` (labels are strings)
+    n_iterations : int, optional
+        Number of refinement iterations, by default the labels are
+        refined until the partition of the nodes is stable
+
+    Returns
+    -------
+    fingerprint : str
+        Hexadecimal fingerprint of the graph
+    labels : dict
+        Final labels of the nodes
+    """
+    edges = list(edges)
+    successors = {n: [] for n in node_labels}
+    predecessors = {n: [] for n in node_labels}
+    for s, t, label in edges:
+        successors[s].append((label, t))
+        predecessors[t].append((label, s))
+
+    labels = {n: _digest(label) for n, label in node_labels.items()}
+    n_classes = len(set(labels.values()))
+    iteration = 0
+    while n_iterations is None or iteration < n_iterations:
+        labels = {
+            n: _digest(
+                label,
+                "out", *sorted(
+                    _digest(l, labels[t]) for l, t in successors[n]),
+                "in", *sorted(
+                    _digest(l, labels[s]) for l, s in predecessors[n]))
+            for n, label in labels.items()
+        }
+        iteration += 1
+        new_n_classes = len(set(labels.values()))
+        if n_iterations is None and new_n_classes == n_classes:
+            break
+        n_classes = new_n_classes
+
+    fingerprint = _digest(
+        "nodes", *sorted(labels.values()),
+        "edges", *sorted(
+            _digest(labels[s], labels[t], label) for s, t, label in edges))
+    return fingerprint, labels
+
+
 def fold_left(f, init, l):
     """ f : a -> b -> b
         init : b
@@ -343,12 +476,7 @@ def simplify_commands(commands, di=False):
     command_strings = [c for c in commands.splitlines() if len(c) > 0]
     actions = []
     for command in command_strings:
-        try:
-            print(command)
-            parsed = parser.parseString(command).asDict()
-            actions.append(parsed)
-        except:
-            raise ParsingError("Cannot parse command '%s'" % command)
+        actions.append(parse_command(command))
 
     # We keep updated a list of the element we added, the lines of
     # transformations that added them or added attributes to them
@@ -737,11 +865,7 @@ def make_canonical_commands(g, commands, di=False):
         command_strings = [c for c in next_step.splitlines() if len(c) > 0]
         actions = []
         for command in command_strings:
-            try:
-                parsed = parser.parseString(command).asDict()
-                actions.append(parsed)
-            except:
-                raise ParsingError("Cannot parse command '%s'" % command)
+            actions.append(parse_command(command))
 
         next_step = ''
 
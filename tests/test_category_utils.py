@@ -1,5 +1,6 @@
 import networkx as nx
 import copy
+import random
 
 from nose.tools import assert_equals
 
@@ -9,7 +10,101 @@ from regraph import (print_graph,
 from regraph.category_utils import (pullback,
                                     pushout,
                                     pullback_complement,
-                                    get_unique_map_to_pullback_complement)
+                                    get_unique_map_to_pullback_complement,
+                                    get_unique_map_to_pullback,
+                                    get_unique_map_from_pushout,
+                                    image_factorization,
+                                    compose_chain,
+                                    relation_to_span,
+                                    pushout_from_relation)
+from regraph.exceptions import ReGraphError
+from regraph.utils import keys_by_value
+from regraph.dense import NodeIndex, DenseHomomorphism, SparseRelation
+from regraph.overlay import OverlayGraph
+
+
+def _reference_image_factorization(a, b, a_b):
+    c = NXGraph.copy(a)
+    a_c = {}
+    c_b = {}
+    for n in b.nodes():
+        if n in a_b.values():
+            a_nodes = keys_by_value(a_b, n)
+            if len(a_nodes) > 1:
+                new_id = c.merge_nodes(a_nodes)
+            else:
+                new_id = a_nodes[0]
+            for a_node in a_nodes:
+                a_c[a_node] = new_id
+            c_b[new_id] = n
+    return c, a_c, c_b
+
+
+def _reference_unique_map_to_pullback(p, p_a, p_b, z_a, z_b):
+    z_p = dict()
+    for value in p:
+        z_keys_from_a = set()
+        if value in p_a.keys():
+            z_keys_from_a = set(keys_by_value(z_a, p_a[value]))
+        z_keys_from_b = set()
+        if value in p_b.keys():
+            z_keys_from_b.update(keys_by_value(z_b, p_b[value]))
+        for z_key in z_keys_from_a.intersection(z_keys_from_b):
+            z_p[z_key] = value
+    return z_p
+
+
+def _reference_unique_map_from_pushout(p, a_p, b_p, a_z, b_z):
+    p_z = dict()
+    for value in p:
+        z_values = set()
+        for a_value in set(keys_by_value(a_p, value)):
+            if a_value in a_z.keys():
+                z_values.add(a_z[a_value])
+        for b_value in set(keys_by_value(b_p, value)):
+            if b_value in b_z.keys():
+                z_values.add(b_z[b_value])
+        if len(z_values) > 0:
+            if len(z_values) > 1:
+                raise ReGraphError("Cannot construct a unique map!")
+            p_z[value] = z_values.pop()
+    return p_z
+
+
+def _reference_unique_map_to_pullback_complement(a_p, p_c, a_prime_a,
+                                                 a_prime_z, z_c):
+    z_p = {}
+    for z_element, c_element in z_c.items():
+        p_elements1 = set()
+        for a_prime_element in keys_by_value(a_prime_z, z_element):
+            p_elements1.add(a_p[a_prime_a[a_prime_element]])
+        p_elements2 = keys_by_value(p_c, c_element)
+        if len(p_elements1) == 0:
+            if len(p_elements2) == 1:
+                z_p[z_element] = p_elements2[0]
+            else:
+                raise ValueError()
+        else:
+            intersection = p_elements1.intersection(p_elements2)
+            if len(intersection) == 1:
+                z_p[z_element] = list(intersection)[0]
+            else:
+                raise ValueError()
+    return z_p
+
+
+def _random_mapping(rng, domain, codomain, total=True):
+    return {
+        x: rng.choice(codomain) for x in domain
+        if total or rng.random() < 0.7
+    }
+
+
+def _outcome(f, *args):
+    try:
+        return f(*args)
+    except (ValueError, ReGraphError) as e:
+        return type(e)
 
 
 def assert_edges_undir(edges1, edges2):
@@ -220,3 +315,165 @@ class TestCategoryUtils:
             a_prime_a, a_prime_z,
             z_c)
         assert(z_p == {'circle1': 'c1', 'circle2': 'c2', 'square': 'square'})
+
+    def test_compose_chain_dense(self):
+        chain = [
+            {i: i // 2 for i in range(100)},
+            {i: "x{}".format(i % 7) for i in range(40)},
+            {"x{}".format(i): i % 3 for i in range(7)},
+        ]
+        assert_equals(
+            compose_chain(chain, dense=True), compose_chain(chain))
+        assert_equals(
+            compose_chain([self.homAB, self.homBD], dense=True),
+            compose_chain([self.homAB, self.homBD]))
+
+    def test_dense_homomorphism(self):
+        b_index = NodeIndex.from_graph(self.B)
+        d_index = NodeIndex.from_graph(self.D)
+        hom_bd = DenseHomomorphism.from_dict(self.homBD, b_index, d_index)
+        assert(hom_bd.is_total())
+        assert_equals(hom_bd.to_dict(), self.homBD)
+
+        # image of 'dark_square' is not defined
+        hom_cd = DenseHomomorphism.from_dict(
+            {2: 'circle', 3: 'dark_circle'},
+            NodeIndex.from_graph(self.C), d_index)
+        assert(not hom_cd.is_total())
+        assert_equals(len(hom_cd), 2)
+
+        hom_ab = DenseHomomorphism.from_dict(self.homAB)
+        assert_equals(
+            hom_ab.compose(hom_bd).to_dict(),
+            {2: 'circle', 3: 'dark_circle'})
+
+    def test_sparse_relation(self):
+        rng = random.Random(0)
+        for i in range(10):
+            left = {
+                rng.randrange(20): set(
+                    "b{}".format(rng.randrange(15)) for _ in range(3))
+                for _ in range(15)
+            }
+            right = {
+                "b{}".format(rng.randrange(15)): set(
+                    rng.randrange(10) for _ in range(2))
+                for _ in range(10)
+            }
+            sparse_left = SparseRelation.from_dict(left)
+            assert_equals(sparse_left.to_dict(), left)
+            assert_equals(dict(sparse_left), left)
+            assert_equals(
+                sparse_left.n_pairs(), sum(len(v) for v in left.values()))
+
+            inverse = dict()
+            for a, bs in left.items():
+                for b in bs:
+                    inverse.setdefault(b, set()).add(a)
+            assert_equals(sparse_left.invert().to_dict(), inverse)
+
+            composition = dict()
+            for a, bs in left.items():
+                for b in bs:
+                    for c in right.get(b, set()):
+                        composition.setdefault(a, set()).add(c)
+            assert_equals(
+                sparse_left.compose(
+                    SparseRelation.from_dict(right)).to_dict(),
+                composition)
+
+    def test_sparse_relation_span(self):
+        relation = {2: {2, 3}, 3: {1, 3}}
+        common, left_h, right_h = relation_to_span(
+            self.A, self.B, relation, attrs=True)
+        sparse_common, sparse_left_h, sparse_right_h = relation_to_span(
+            self.A, self.B, relation, attrs=True, sparse=True)
+        assert(common == sparse_common)
+        assert_equals(left_h, sparse_left_h)
+        assert_equals(right_h, sparse_right_h)
+
+        pairs = [(2, 2), (3, 2)]
+        g, g1_g, g2_g = pushout_from_relation(self.A, self.B, pairs)
+        sparse_g, sparse_g1_g, sparse_g2_g = pushout_from_relation(
+            self.A, self.B, SparseRelation.from_pairs(pairs))
+        assert(g == sparse_g)
+        assert_equals(g1_g, sparse_g1_g)
+        assert_equals(g2_g, sparse_g2_g)
+
+    def test_overlay_constructions(self):
+        C, homAC, homCD = pullback_complement(
+            self.A, self.B, self.D, self.homAB, self.homBD, overlay=True
+        )
+        assert_equals(type(C), OverlayGraph)
+        C_copy, _, _ = pullback_complement(
+            self.A, self.B, self.D, self.homAB, self.homBD
+        )
+        assert(C == C_copy)
+        assert(C.materialize() == C_copy)
+        assert(C.base is self.D)
+
+        D, homBD, homCD = pushout(
+            self.A, self.B, self.C, self.homAB, self.homAC, overlay=True
+        )
+        assert_equals(type(D), OverlayGraph)
+        D_copy, _, _ = pushout(
+            self.A, self.B, self.C, self.homAB, self.homAC
+        )
+        assert(D == D_copy)
+        assert_equals(len(self.B.nodes()), 3)
+
+    def test_image_factorization_reference(self):
+        rng = random.Random(0)
+        for i in range(20):
+            a = NXGraph()
+            a.add_nodes_from([(n, {"x": {rng.randrange(3)}}) for n in range(30)])
+            a.add_edges_from(set(
+                (rng.randrange(30), rng.randrange(30)) for _ in range(40)))
+            b = NXGraph()
+            b.add_nodes_from(["b{}".format(n) for n in range(10)])
+            a_b = _random_mapping(rng, list(a.nodes()), list(b.nodes()))
+            c, a_c, c_b = image_factorization(a, b, a_b)
+            ref_c, ref_a_c, ref_c_b = _reference_image_factorization(
+                a, b, a_b)
+            assert(c == ref_c)
+            assert_equals(a_c, ref_a_c)
+            assert_equals(c_b, ref_c_b)
+
+    def test_unique_maps_reference(self):
+        rng = random.Random(1)
+        for i in range(200):
+            p = list(range(rng.randint(1, 15)))
+            a = ["a{}".format(n) for n in range(rng.randint(1, 10))]
+            b = ["b{}".format(n) for n in range(rng.randint(1, 10))]
+            z = ["z{}".format(n) for n in range(rng.randint(1, 15))]
+
+            args = (
+                p, _random_mapping(rng, p, a, False),
+                _random_mapping(rng, p, b, False),
+                _random_mapping(rng, z, a, False),
+                _random_mapping(rng, z, b, False))
+            assert_equals(
+                get_unique_map_to_pullback(*args),
+                _reference_unique_map_to_pullback(*args))
+
+            args = (
+                p, _random_mapping(rng, a, p, False),
+                _random_mapping(rng, b, p, False),
+                _random_mapping(rng, a, z, False),
+                _random_mapping(rng, b, z, False))
+            assert_equals(
+                _outcome(get_unique_map_from_pushout, *args),
+                _outcome(_reference_unique_map_from_pushout, *args))
+
+            a_prime = ["a'{}".format(n) for n in range(rng.randint(1, 10))]
+            c = ["c{}".format(n) for n in range(rng.randint(1, 5))]
+            a_p = dict(zip(a, rng.sample(p, min(len(a), len(p)))))
+            args = (
+                a_p, _random_mapping(rng, p, c),
+                _random_mapping(rng, a_prime, list(a_p.keys())),
+                _random_mapping(rng, a_prime, z),
+                _random_mapping(rng, z, c))
+            assert_equals(
+                _outcome(get_unique_map_to_pullback_complement, *args),
+                _outcome(
+                    _reference_unique_map_to_pullback_complement, *args))
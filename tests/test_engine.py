@@ -0,0 +1,104 @@
+"""Unit tests for the fixpoint transformation engine."""
+import copy
+import warnings
+
+from nose.tools import assert_equals, raises
+
+from regraph import Rule, NXGraph, NXHierarchy
+from regraph.engine import TransformationEngine
+from regraph.exceptions import ReGraphError, ReGraphWarning
+
+
+class TestEngine(object):
+    """Class for testing `regraph.engine` module."""
+
+    def __init__(self):
+        """Initialize test."""
+        self.graph = NXGraph()
+        self.graph.add_nodes_from([
+            (i, {"color": "red" if i % 2 == 0 else "blue"})
+            for i in range(10)])
+        self.graph.add_edges_from([(i, i + 1) for i in range(9)])
+
+        pattern = NXGraph()
+        pattern.add_nodes_from(["x", "y"])
+        pattern.add_edge("x", "y")
+        self.remove_edge = Rule.from_transform(pattern)
+        self.remove_edge.inject_remove_edge("x", "y")
+
+        pattern = NXGraph()
+        pattern.add_node("x", {"color": "red"})
+        self.paint = Rule.from_transform(pattern)
+        self.paint.inject_remove_node_attrs("x", {"color": "red"})
+        self.paint.inject_add_node_attrs("x", {"color": "green"})
+
+    def test_fixpoint(self):
+        engine = TransformationEngine([self.remove_edge])
+        statistics = engine.run(self.graph)
+        assert_equals(len(self.graph.edges()), 0)
+        assert_equals(len(self.graph.nodes()), 10)
+
+        first = statistics[0]
+        assert_equals(first.matches_found[0], 9)
+        # consecutive edges share nodes
+        assert_equals(first.conflicts, 8)
+        assert_equals(first.applied[0], 5)
+        assert_equals(statistics[-1].total_matches(), 0)
+        assert_equals(
+            sum(s.total_applied() for s in statistics), 9)
+        assert(engine.converged)
+
+    def test_max_rounds(self):
+        engine = TransformationEngine([self.remove_edge], max_rounds=1)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            statistics = engine.run(self.graph)
+        assert_equals(len(statistics), 1)
+        assert(not engine.converged)
+        assert(any(
+            issubclass(w.category, ReGraphWarning) for w in caught))
+
+    def test_executors(self):
+        rules = {"remove_edge": self.remove_edge, "paint": self.paint}
+        serial = copy.deepcopy(self.graph)
+        TransformationEngine(rules, executor="serial").run(serial)
+        for executor in ["thread", "process"]:
+            graph = copy.deepcopy(self.graph)
+            engine = TransformationEngine(
+                rules, executor=executor, n_workers=2)
+            engine.run(graph)
+            assert(engine.converged)
+            assert(graph == serial)
+
+    def test_priorities(self):
+        engine = TransformationEngine(
+            {"remove_edge": self.remove_edge, "paint": self.paint},
+            priorities={"paint": 1}, executor="serial")
+        statistics = engine.run(self.graph)
+        assert_equals(statistics[0].applied["paint"], 5)
+        assert_equals(len(self.graph.edges()), 0)
+        for n in self.graph.nodes():
+            assert("red" not in self.graph.get_node(n)["color"])
+        assert(all(
+            "round" in s.to_json() for s in statistics))
+
+    def test_hierarchy(self):
+        hierarchy = NXHierarchy()
+        hierarchy.add_graph("G", self.graph)
+        colors = NXGraph()
+        colors.add_nodes_from([
+            ("c", {"color": {"red", "blue", "green"}})])
+        colors.add_edge("c", "c")
+        hierarchy.add_graph("T", colors)
+        hierarchy.add_typing(
+            "G", "T", {n: "c" for n in self.graph.nodes()})
+
+        engine = TransformationEngine([self.paint])
+        engine.run(hierarchy, "G")
+        graph = hierarchy.get_graph("G")
+        for n in graph.nodes():
+            assert("red" not in graph.get_node(n)["color"])
+
+    @raises(ReGraphError)
+    def test_unknown_executor(self):
+        TransformationEngine([self.paint], executor="gpu")
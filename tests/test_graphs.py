@@ -1,8 +1,15 @@
 """Units tests for graph classes."""
 from regraph import Rule
+from regraph.utils import keys_by_value
 from regraph import Neo4jGraph, NXGraph
+from regraph.overlay import OverlayGraph
+from regraph.backends.neo4j.cypher_utils import rewriting
 
+import copy
 import logging
+import os
+import pickle
+import tempfile
 import warnings
 
 neo4j_log = logging.getLogger("neobolt")
@@ -174,16 +181,254 @@ class TestGraphClasses:
                     self.neo4j_graph.out_edges("a")))
 
     def test_load_export(self):
-        self.nx_graph.export("nxgraph.json")
-        if self.neo4j_graph:
-            self.neo4j_graph.export("neo4jgraph.json")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            nx_filename = os.path.join(tmp_dir, "nxgraph.json")
+            neo4j_filename = os.path.join(tmp_dir, "neo4jgraph.json")
+            self.nx_graph.export(nx_filename)
+            if self.neo4j_graph:
+                self.neo4j_graph.export(neo4j_filename)
 
-        g1 = NXGraph.load("nxgraph.json")
-        if self.neo4j_graph:
-            p = Neo4jGraph(
-                driver=self.neo4j_graph._driver, node_label="new_node", edge_label="new_edge")
-            p._clear()
-            g2 = Neo4jGraph.load(
-                driver=self.neo4j_graph._driver, filename="neo4jgraph.json",
-                node_label="new_node", edge_label="new_edge")
-            assert(g1 == g2)
+            g1 = NXGraph.load(nx_filename)
+            if self.neo4j_graph:
+                p = Neo4jGraph(
+                    driver=self.neo4j_graph._driver, node_label="new_node",
+                    edge_label="new_edge")
+                p._clear()
+                g2 = Neo4jGraph.load(
+                    driver=self.neo4j_graph._driver, filename=neo4j_filename,
+                    node_label="new_node", edge_label="new_edge")
+                assert(g1 == g2)
+
+    def test_overlay(self):
+        """Test overlay graphs agree with the graphs they modify."""
+        base = NXGraph.copy(self.nx_graph)
+        graph = NXGraph.copy(self.nx_graph)
+        overlay = OverlayGraph(base)
+        assert(overlay == graph)
+        assert(not overlay.is_modified())
+
+        for g in [graph, overlay]:
+            g.add_node("x", {"name": "Xavier"})
+            g.add_edge("x", "a", {"type": "friends"})
+            g.clone_node("a", "a_clone")
+            g.remove_edge("a", "b")
+            g.add_node_attrs("b", {"age": 42})
+            g.remove_node("a_copy")
+            g.merge_nodes(["x", "a_clone"], "xa")
+            g.remove_node("a")
+            g.add_node("a", {"name": "Anna"})
+            g.add_edge("xa", "a")
+
+        assert(overlay == graph)
+        assert(overlay.materialize() == graph)
+        assert(set(overlay.successors("xa")) == set(graph.successors("xa")))
+        assert(set(overlay.predecessors("a")) == set(graph.predecessors("a")))
+        assert(base == self.nx_graph)
+        assert(overlay.is_modified())
+
+    def test_rewrite_all(self):
+        """Test rewriting with a rule applied to many instances."""
+        graph = NXGraph()
+        graph.add_nodes_from([
+            (i, {"name": "n{}".format(i)}) for i in range(6)])
+        graph.add_edges_from([(i, (i + 1) % 6) for i in range(6)])
+
+        pattern = NXGraph()
+        pattern.add_nodes_from(["x", "y"])
+        pattern.add_edge("x", "y")
+        rule = Rule.from_transform(pattern)
+        rule.inject_remove_edge("x", "y")
+        rule.inject_clone_node("x")
+        rule.inject_add_node("z", {"name": "new"})
+        rule.inject_add_edge("z", "y")
+        rule.inject_add_node_attrs("y", {"visited": True})
+
+        instances = graph.find_matching(rule.lhs)
+        assert(len(instances) == 6)
+
+        expected = NXGraph.copy(graph)
+        batch = NXGraph.copy(graph)
+        rhs_instances = batch.rewrite_all(rule, instances)
+        assert(len(rhs_instances) == 3)
+        for i in sorted(rhs_instances):
+            expected_rhs = expected.rewrite(rule, instances[i])
+            assert(expected_rhs == rhs_instances[i])
+        assert(batch == expected)
+
+        sequential = NXGraph.copy(graph)
+        rhs_instances = sequential.rewrite_all(
+            rule, instances, policy="sequential")
+        assert(len(rhs_instances) == 6)
+        assert(len(sequential.nodes()) == 18)
+
+        # instances whose nodes were removed by the previous
+        # rewritings are skipped
+        rule = Rule.from_transform(pattern)
+        rule.inject_remove_node("y")
+        sequential = NXGraph.copy(graph)
+        rhs_instances = sequential.rewrite_all(
+            rule, instances, policy="sequential")
+        assert(len(rhs_instances) < 6)
+        assert(len(sequential.nodes()) == 6 - len(rhs_instances))
+
+        # batched queries take the instances as a parameter
+        query, parameters = rewriting.batch_rule_to_cypher(
+            rule, [{"x": "it's", "y": 1}])
+        assert("$instances" in query and "it's" not in query)
+        assert(rewriting.batch_rule_to_cypher(
+            rule, [{"x": 2, "y": 3}])[0] == query)
+        assert(list(parameters["instances"][0].values()) == ["it's", "1"])
+
+    def test_compiled_rule(self):
+        graph = NXGraph()
+        graph.add_nodes_from([
+            ("a", {"name": "Alice"}), ("b", {"name": "Bob"}), "c"])
+        graph.add_edges_from([("a", "b"), ("b", "c"), ("c", "a")])
+        backup = NXGraph.copy(graph)
+
+        pattern = NXGraph()
+        pattern.add_nodes_from(["x", "y"])
+        pattern.add_edge("x", "y")
+        rule = Rule.from_transform(pattern)
+        rule.inject_clone_node("x")
+        rule.inject_remove_edge("x", "y")
+        rule.inject_add_node("z")
+        rule.inject_add_edge("z", "y")
+        instance = {"x": "a", "y": "b"}
+        rule, instance = rule.refined(graph, instance)
+
+        program = rule.compile()
+        assert(rule.compile() is program)
+        program = pickle.loads(pickle.dumps(program))
+
+        expected = NXGraph.copy(graph)
+        expected_rhs = expected.rewrite(rule, instance)
+        rhs_instance = graph.apply_program(program, instance)
+        assert(rhs_instance == expected_rhs)
+        assert(graph == expected)
+
+        # the inverse program undoes the rewriting
+        lhs_instance = graph.apply_program(program.inverse(), rhs_instance)
+        assert(set(lhs_instance.keys()) == set(instance.keys()))
+        assert(len(graph.nodes()) == len(backup.nodes()))
+        assert(len(graph.edges()) == len(backup.edges()))
+        for node in instance:
+            assert(
+                graph.get_node(lhs_instance[node]) ==
+                backup.get_node(instance[node]))
+
+    def test_rule_templates(self):
+        pattern = NXGraph()
+        pattern.add_nodes_from([("x", {"name": "Alice"}), "y"])
+        pattern.add_edge("x", "y")
+        rule = Rule.from_transform(pattern)
+        rule.inject_remove_node_attrs("x", {"name": "Alice"})
+        rule.inject_remove_edge("x", "y")
+        copied_rule = copy.deepcopy(rule)
+
+        # structurally equal rules share the query templates
+        assert(rule.compile().key == copied_rule.compile().key)
+        assert(
+            rewriting.program_to_cypher_template(rule.compile()) is
+            rewriting.program_to_cypher_template(copied_rule.compile()))
+        query, _ = rewriting.rule_to_cypher_template(rule)
+        assert(rewriting.rule_to_cypher_template(copied_rule)[0] is query)
+        assert("$instance" in query)
+        parameters = rewriting.rule_instance_parameters(
+            rule, {"x": "a", "y": 1})
+        assert(set(parameters["instance"].keys()) == {"n0", "n1"})
+        assert(set(parameters["instance"].values()) == {"a", "1"})
+
+        # the templates do not depend on the names of the nodes
+        renamed_pattern = NXGraph()
+        renamed_pattern.add_nodes_from([("u", {"name": "Alice"}), "v"])
+        renamed_pattern.add_edge("u", "v")
+        renamed_rule = Rule.from_transform(renamed_pattern)
+        renamed_rule.inject_remove_node_attrs("u", {"name": "Alice"})
+        renamed_rule.inject_remove_edge("u", "v")
+        assert(rewriting.rule_to_cypher_template(renamed_rule)[0] is query)
+        renamed_parameters = rewriting.rule_instance_parameters(
+            renamed_rule, {"u": "a", "v": 1})
+        assert(renamed_parameters == parameters)
+
+        clone_rule = Rule.from_transform(pattern)
+        _, x_clone = clone_rule.inject_clone_node("x")
+        renamed_clone_rule = Rule.from_transform(renamed_pattern)
+        _, u_clone = renamed_clone_rule.inject_clone_node("u")
+        query, rhs_vars = rewriting.rule_to_cypher_template(clone_rule)
+        renamed_query, renamed_rhs_vars =\
+            rewriting.rule_to_cypher_template(renamed_clone_rule)
+        assert(renamed_query is query)
+        assert(set(rhs_vars.values()) == {"x", x_clone, "y"})
+        assert(set(renamed_rhs_vars.values()) == {"u", u_clone, "v"})
+        assert(renamed_rhs_vars[
+            keys_by_value(rhs_vars, "y")[0]] == "v")
+
+        copied_rule.inject_add_node_attrs("y", {"name": "Bob"})
+        assert(rule.compile().key != copied_rule.compile().key)
+
+    def test_fingerprint(self):
+        graph = NXGraph()
+        graph.add_nodes_from([
+            ("a", {"name": "Alice"}), ("b", {"name": "Bob"}), "c"])
+        graph.add_edges_from([("a", "b"), ("b", "c", {"w": {1, 2}})])
+        fingerprint = graph.fingerprint()
+
+        # fingerprints do not depend on the ids of nodes
+        relabeled = NXGraph.copy(graph)
+        relabeled.relabel_nodes({"a": 1, "b": 2, "c": 3})
+        assert(relabeled.fingerprint() == fingerprint)
+
+        relabeled.add_node_attrs(3, {"name": "Carol"})
+        assert(relabeled.fingerprint() != fingerprint)
+        relabeled.remove_node_attrs(3, {"name": "Carol"})
+        assert(relabeled.fingerprint() == fingerprint)
+        relabeled.add_edge(3, 1)
+        assert(relabeled.fingerprint() != fingerprint)
+
+    def test_undo(self):
+        graph = NXGraph()
+        graph.add_nodes_from([
+            ("a", {"name": "Alice"}), ("b", {"name": "Bob"}), "c", "d"])
+        graph.add_edges_from([
+            ("a", "b", {"w": {1}}), ("b", "c"), ("c", "a"), ("d", "d")])
+        backup = NXGraph.copy(graph)
+
+        pattern = NXGraph()
+        pattern.add_nodes_from(["x", "y", "z", "t"])
+        pattern.add_edges_from([("x", "y"), ("y", "z")])
+        rule = Rule.from_transform(pattern)
+        rule.inject_clone_node("x")
+        rule.inject_remove_edge_attrs("x", "y", {"w": {1}})
+        rule.inject_remove_node("t")
+        rule.inject_merge_nodes(["y", "z"])
+        rule.inject_add_node("new", {"name": "Eve"})
+        rule.inject_add_edge("new", "x")
+        instance = {"x": "a", "y": "b", "z": "c", "t": "d"}
+
+        _, log = graph.rewrite(rule, instance, record_undo=True)
+        assert(len(log) > 0)
+        assert(graph != backup)
+        graph.undo(log)
+        assert(len(log) == 0)
+        assert(graph == backup)
+
+        # failed transactions are rolled back
+        try:
+            with graph.transaction():
+                graph.rewrite(rule, instance)
+                graph.relabel_nodes({n: str(n) + "_" for n in graph.nodes()})
+                raise ValueError()
+        except ValueError:
+            pass
+        assert(graph == backup)
+
+        with graph.transaction() as log:
+            graph.rewrite(rule, instance)
+            assert(graph != backup)
+            graph.undo(log)
+        assert(graph == backup)
+
+        with graph.transaction():
+            graph.rewrite(rule, instance)
+        assert(graph != backup)
@@ -1,12 +1,15 @@
 """."""
 import copy
+import time
 import warnings
 
+from concurrent.futures import ThreadPoolExecutor
+
 from nose.tools import raises
 
 from regraph import Rule
 from regraph import NXGraph
-from regraph import (HierarchyError)
+from regraph import (HierarchyError, ReGraphError)
 import regraph.primitives as prim
 
 
@@ -459,6 +462,267 @@ class TestHierarchy(object):
             for s, t, attrs in old_g00_edges:
                 assert(self.neo4j_hierarchy.get_graph("g00").get_edge(s, t) == attrs)
 
+    def test_rewrite_executor(self):
+        pattern = NXGraph()
+        pattern.add_nodes_from(["circle", "square", "triangle"])
+        clone_remove = Rule.from_transform(pattern)
+        clone_remove.inject_clone_node("circle")
+        clone_remove.inject_remove_node("triangle")
+
+        pattern = NXGraph()
+        pattern.add_nodes_from([1, 2])
+        merge_add = Rule.from_transform(pattern)
+        merge_add.inject_merge_nodes([1, 2])
+        merge_add.inject_add_node(3)
+
+        serial = copy.deepcopy(self.nx_hierarchy)
+        parallel = copy.deepcopy(self.nx_hierarchy)
+        for h, executor in [(serial, None), (parallel, "thread")]:
+            h.rewrite(
+                "g0", clone_remove,
+                {"circle": "circle", "square": "square",
+                 "triangle": "triangle"},
+                executor=executor)
+            h.rewrite("g4", merge_add, {1: 1, 2: 2}, executor=executor)
+        assert(serial == parallel)
+        for g in parallel.graphs():
+            for s in parallel.graphs():
+                if (g, s) in parallel.edges():
+                    assert(
+                        parallel.get_typing(g, s) ==
+                        serial.get_typing(g, s))
+        assert(
+            len(parallel.get_graph("g4").nodes()) ==
+            len(self.nx_hierarchy.get_graph("g4").nodes()))
+
+        try:
+            parallel.rewrite(
+                "g4", merge_add, {1: 1, 2: 3}, executor="process")
+            raise ValueError("Process pool was accepted")
+        except ReGraphError:
+            pass
+
+    def test_run_waves_failure(self):
+        hierarchy = copy.deepcopy(self.nx_hierarchy)
+        finished = []
+
+        def process(graph):
+            if graph == "g1":
+                raise ValueError("Failed on g1")
+            time.sleep(0.1)
+            # the lock is held until all the workers finish
+            assert(hierarchy._propagation_lock is not None)
+            finished.append(graph)
+            return graph
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            try:
+                hierarchy._run_waves(
+                    [["g1", "g2", "g3"], ["g4"]], process, pool)
+                raise AssertionError("Failure was not re-raised")
+            except ValueError:
+                pass
+        assert(set(finished) == {"g2", "g3"})
+        assert(hierarchy._propagation_lock is None)
+
+    def test_lazy_rewrite(self):
+        eager = copy.deepcopy(self.nx_hierarchy)
+        lazy = copy.deepcopy(self.nx_hierarchy)
+        lazy.lazy = True
+
+        pattern = NXGraph()
+        pattern.add_node("circle")
+        clone = Rule.from_transform(pattern)
+        clone.inject_clone_node("circle")
+        add = Rule.from_transform(pattern)
+        add.inject_add_node("new_shape")
+        add.inject_add_edge("circle", "new_shape")
+
+        for rule in [clone, add]:
+            rhs_instance = eager.rewrite("g0", rule, {"circle": "circle"})
+            assert(
+                lazy.rewrite("g0", rule, {"circle": "circle"}) ==
+                rhs_instance)
+        assert(lazy.pending_rewrites() == ["g0"])
+
+        # access to an ancestor applies the composed rewrite
+        g1_nodes = lazy.get_graph("g1").nodes()
+        assert(lazy.pending_rewrites() == [])
+        assert(set(g1_nodes) == set(eager.get_graph("g1").nodes()))
+        assert(eager == lazy)
+
+    def test_snapshot(self):
+        h = copy.deepcopy(self.nx_hierarchy)
+        old_h = copy.deepcopy(h)
+        snapshot = h.snapshot()
+        assert(snapshot.get_graph("g00")._shared() is h.get_graph("g00"))
+
+        pattern = NXGraph()
+        pattern.add_node("circle")
+        rule = Rule.from_transform(pattern)
+        rule.inject_clone_node("circle")
+        h.rewrite("g0", rule, {"circle": "circle"})
+
+        for graph_id in old_h.graphs():
+            assert(
+                snapshot.get_graph(graph_id) == old_h.get_graph(graph_id))
+        for s, t in old_h.typings():
+            assert(snapshot.get_typing(s, t) == old_h.get_typing(s, t))
+        assert(snapshot.get_graph("g0") != h.get_graph("g0"))
+        # graphs untouched by the rewrite are still shared
+        assert(snapshot.get_graph("g00")._shared() is h.get_graph("g00"))
+        assert(snapshot.get_graph("g0")._shared() is not h.get_graph("g0"))
+
+        # graphs and typings of the snapshot are read-only
+        try:
+            snapshot.get_graph("g00").add_node("leak")
+            raise ValueError("Snapshot graph was modified")
+        except ReGraphError:
+            pass
+        try:
+            snapshot.get_typing("g1", "g00")["leak"] = "black"
+            raise ValueError("Snapshot typing was modified")
+        except TypeError:
+            pass
+        assert("leak" not in h.get_graph("g00").nodes())
+        assert("leak" not in h.get_typing("g1", "g00"))
+        graph_copy = NXGraph.copy(snapshot.get_graph("g00"))
+        graph_copy.add_node("leak")
+        assert("leak" not in h.get_graph("g00").nodes())
+
+        try:
+            snapshot.rewrite("g0", rule, {"circle": "circle"})
+            raise ValueError("Snapshot was modified")
+        except ReGraphError:
+            pass
+        try:
+            snapshot.remove_graph("g00")
+            raise ValueError("Snapshot was modified")
+        except ReGraphError:
+            pass
+
+    def test_changes_since(self):
+        h = copy.deepcopy(self.nx_hierarchy)
+        version = h.current_version()
+        changes = h.changes_since(version)
+        assert(all(len(v) == 0 for v in changes.values()))
+
+        pattern = NXGraph()
+        pattern.add_node("circle")
+        rule = Rule.from_transform(pattern)
+        rule.inject_clone_node("circle")
+        h.rewrite("g0", rule, {"circle": "circle"})
+        changes = h.changes_since(version)
+        assert(set(changes["graphs"]) == {"g0", "g1", "g2", "g3", "g4"})
+        assert(set(changes["typings"]) == set(h.typings()))
+
+        version = h.current_version()
+        h.get_graph("g5").add_node("new_node")
+        h.add_relation("g5", "g00", {})
+        changes = h.changes_since(version)
+        assert(set(changes["graphs"]) == {"g5"})
+        assert(set(changes["relations"]) == {("g5", "g00"), ("g00", "g5")})
+        assert(len(changes["typings"]) == 0)
+        assert(all(v > version for v in changes["graphs"].values()))
+
+        version = h.current_version()
+        h.remove_graph("g5")
+        changes = h.changes_since(version)
+        assert(set(changes["graphs"]) == {"g5"})
+        assert(len(changes["relations"]) == 2)
+        assert(h.snapshot().current_version() == h.current_version())
+
+    def test_plan_rewrite(self):
+        def _check_plan(graph_id, rule, instance, rhs_typing=None):
+            h = copy.deepcopy(self.nx_hierarchy)
+            version = h.current_version()
+            plan = h.plan_rewrite(
+                graph_id, rule, instance, rhs_typing=rhs_typing)
+            assert(h.current_version() == version)
+            sizes = {g: len(h.get_graph(g).nodes()) for g in h.graphs()}
+            h.rewrite(graph_id, rule, instance, rhs_typing=rhs_typing)
+            changed = h.changes_since(version)["graphs"]
+            assert(plan["affected_graphs"] == set(changed))
+            for g, c in plan["changes"].items():
+                assert(
+                    len(h.get_graph(g).nodes()) - sizes[g] ==
+                    c["clones"] - c["removals"] - c["merges"] +
+                    c["additions"])
+            return plan
+
+        pattern = NXGraph()
+        pattern.add_node("circle")
+        rule = Rule.from_transform(pattern)
+        rule.inject_clone_node("circle")
+        plan = _check_plan("g0", rule, {"circle": "circle"})
+        assert(plan["affected_graphs"] == {"g0", "g1", "g2", "g3", "g4"})
+        assert(plan["changes"]["g1"]["clones"] == 2)
+        assert(plan["cost"] > 0)
+
+        # rules typed by the affected graphs are reported separately
+        h = copy.deepcopy(self.nx_hierarchy)
+        lhs = NXGraph()
+        lhs.add_nodes_from(["a", "b"])
+        typed_rule = Rule.from_transform(lhs)
+        typed_rule.inject_remove_node("b")
+        h.add_rule("r", typed_rule)
+        h.add_rule_typing(
+            "r", "g0", {"a": "circle", "b": "square"}, {"a": "circle"})
+        plan = h.plan_rewrite("g0", rule, {"circle": "circle"})
+        assert(plan["affected_rules"] == {"r"})
+        assert(plan["rule_changes"]["r"]["clones"] == 2)
+        assert("r" not in plan["affected_graphs"])
+
+        pattern = NXGraph()
+        pattern.add_nodes_from(["a", "b"])
+        rule = Rule.from_transform(pattern)
+        rule.inject_merge_nodes(["a", "b"])
+        rule.inject_add_node("new_node")
+        plan = _check_plan(
+            "g1", rule, {"a": "black_circle", "b": "white_square"},
+            rhs_typing={"g0": {"new_node": "circle"}})
+        assert(plan["changes"]["g0"]["merges"] == 1)
+        assert(plan["changes"]["g0"]["additions"] == 0)
+        assert(plan["changes"]["g00"]["additions"] == 1)
+
+    def test_bulk_load(self):
+        h = NXHierarchy()
+        h.bulk_load(
+            graphs=[
+                (graph_id, copy.deepcopy(self.nx_hierarchy.get_graph(graph_id)),
+                 self.nx_hierarchy.get_graph_attrs(graph_id))
+                for graph_id in self.nx_hierarchy.graphs()],
+            typings=[
+                (s, t, self.nx_hierarchy.get_typing(s, t))
+                for s, t in self.nx_hierarchy.typings()],
+            relations=[
+                (l, r, self.nx_hierarchy.get_relation(l, r))
+                for l, r in self.nx_hierarchy.relations()])
+        assert(h == self.nx_hierarchy)
+
+        # all the invalid typings are reported, none is added
+        h = NXHierarchy()
+        h.bulk_load(graphs={
+            graph_id: self.nx_hierarchy.get_graph(graph_id)
+            for graph_id in ["g0", "g00", "g1"]})
+        g1_g0 = self.nx_hierarchy.get_typing("g1", "g0")
+        g1_g00 = self.nx_hierarchy.get_typing("g1", "g00")
+        try:
+            h.add_typings_from([
+                ("g1", "g0", g1_g0),
+                ("g1", "g00", g1_g00),
+                # does not commute with g1->g00
+                ("g0", "g00", {
+                    "circle": "white", "square": "white",
+                    "triangle": "black"}),
+                # not a valid homomorphism
+                ("g00", "g1", g1_g00),
+                ("g1", "g5", dict())])
+            raise ValueError("Invalid typings were added")
+        except HierarchyError as e:
+            assert(len(str(e).splitlines()) == 4)
+        assert(len(h.typings()) == 0)
+
     def test_node_type(self):
         assert(
             self.nx_hierarchy.node_type("g1", "white_circle") ==
@@ -479,6 +743,70 @@ class TestHierarchy(object):
                 {"g00": "black", "g0": "square"}
             )
 
+    def test_compose_path_typing_dense(self):
+        for path in [["g4", "g2", "g1", "g0"], ["g4", "g3", "g1", "g00"]]:
+            assert(
+                self.nx_hierarchy.compose_path_typing(path, dense=True) ==
+                self.nx_hierarchy.compose_path_typing(path)
+            )
+
+    def test_typing_cache(self):
+        h = copy.deepcopy(self.nx_hierarchy)
+        h.clear_typing_cache()
+        old_info = h.typing_cache_info()
+        path = ["g4", "g2", "g1", "g0"]
+        typing = h.get_typing("g4", "g0")
+        assert(typing == h.compose_path_typing(path))
+        typing["new_node"] = "circle"
+        assert(h.get_typing("g4", "g0") == h.compose_path_typing(path))
+        info = h.typing_cache_info()
+        assert(info["hits"] == old_info["hits"] + 1)
+        assert(info["misses"] == old_info["misses"] + 1)
+        assert(info["size"] == 1)
+
+        # rewriting of a graph on the path invalidates the typing
+        pattern = NXGraph()
+        pattern.add_node("x")
+        rule = Rule.from_transform(pattern)
+        rule.inject_clone_node("x")
+        node = list(h.get_graph("g2").nodes())[0]
+        h.rewrite("g2", rule, {"x": node})
+        assert(h.typing_cache_info()["invalidations"] > info["invalidations"])
+        assert(h.get_typing("g4", "g0") == h.compose_path_typing(path))
+
+        h.remove_typing("g1", "g0")
+        assert(h.typing_cache_info()["size"] == 0)
+
+    def test_defer_checks(self):
+        h = copy.deepcopy(self.nx_hierarchy)
+        g2_g0 = h.get_typing("g2", "g0")
+        g4_g1 = h.get_typing("g4", "g1")
+
+        # the typing does not commute with 'g4->g2->g1->g0'
+        wrong_typing = copy.deepcopy(g2_g0)
+        wrong_typing[6] = "circle"
+        try:
+            h.add_typing("g2", "g0", wrong_typing)
+            raise ValueError("Non-commuting typing was added")
+        except HierarchyError:
+            pass
+
+        try:
+            with h.defer_checks():
+                h.add_typing("g4", "g1", g4_g1)
+                h.add_typing("g2", "g0", wrong_typing)
+                assert(("g2", "g0") in h.edges())
+            raise ValueError("Non-commuting typing was added")
+        except HierarchyError:
+            pass
+        assert(("g2", "g0") not in h.edges())
+        assert(("g4", "g1") not in h.edges())
+
+        with h.defer_checks():
+            h.add_typing("g4", "g1", g4_g1)
+            h.add_typing("g2", "g0", g2_g0)
+        assert(h.get_typing("g2", "g0") == g2_g0)
+
     def test_to_json(self):
         res = self.nx_hierarchy.to_json()
         new_h = NXHierarchy.from_json(res)
@@ -1,4 +1,6 @@
 import copy
+import os
+import tempfile
 
 from regraph import Rule, NXGraph
 from regraph.utils import (valid_attributes,
@@ -178,8 +180,10 @@ class TestPrimitives(object):
 
     def test_load_export(self):
         g1 = load_networkx_graph("tests/graph_example.json")
-        export_graph(g1, "tests/graph_output.json")
-        g2 = load_networkx_graph("tests/graph_output.json")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "graph_output.json")
+            export_graph(g1, filename)
+            g2 = load_networkx_graph(filename)
         assert(set(g1.nodes()) == set(g2.nodes()))
         assert(set(g1.edges()) == set(g2.edges()))
 
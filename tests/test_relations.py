@@ -90,6 +90,11 @@ class TestRelations(object):
 
         g, l, r = self.hierarchy.relation_to_span(
             "a1", "a2", edges=True, attrs=True)
+        sparse_g, sparse_l, sparse_r = self.hierarchy.relation_to_span(
+            "a1", "a2", edges=True, attrs=True, sparse=True)
+        assert(g == sparse_g)
+        assert(l == sparse_l)
+        assert(r == sparse_r)
         # print_graph(g)
         # print(l)
         # print(r)
@@ -1,3 +1,5 @@
+import copy
+
 import networkx as nx
 
 from regraph import Rule
@@ -165,6 +167,107 @@ class TestRuleHierarchies(object):
         #     print("Rule for ", k)
         #     print(v)
 
+    def test_apply_rule_hierarchy_executor(self):
+        pattern = NXGraph()
+        pattern.add_nodes_from(["student", "prof"])
+        rule = Rule.from_transform(pattern)
+        rule.inject_clone_node("student")
+        rule.inject_merge_nodes(["prof", "student"])
+        rule.inject_add_node("phd")
+
+        rule_hierarchy, instances = self.hierarchy.get_rule_hierarchy(
+            "b", rule)
+        serial = NXHierarchy.copy(self.hierarchy)
+        rhs_instances = serial.apply_rule_hierarchy(
+            rule_hierarchy, instances)
+        threads = NXHierarchy.copy(self.hierarchy)
+        assert(threads.apply_rule_hierarchy(
+            rule_hierarchy, instances, executor="thread") == rhs_instances)
+
+        for graph_id in serial.graphs():
+            assert(
+                serial.get_graph(graph_id) == threads.get_graph(graph_id))
+        for s, t in serial.typings():
+            assert(serial.get_typing(s, t) == threads.get_typing(s, t))
+            check_homomorphism(
+                serial.get_graph(s), serial.get_graph(t),
+                serial.get_typing(s, t))
+
+    def test_apply_rule_hierarchy_relations(self):
+        hierarchy = NXHierarchy()
+        a = NXGraph()
+        a.add_nodes_from(["x", "y"])
+        b = NXGraph()
+        b.add_node("u")
+        hierarchy.add_graph("A", a)
+        hierarchy.add_graph("B", b)
+        hierarchy.add_relation("A", "B", {"x": {"u"}, "y": {"u"}})
+
+        pattern = NXGraph()
+        pattern.add_node("x")
+        rule = Rule.from_transform(pattern)
+        rule.inject_remove_node("x")
+        hierarchy.apply_rule_hierarchy(
+            {"rules": {"A": rule}, "rule_homomorphisms": {}},
+            {"A": {"x": "x"}})
+        assert(hierarchy.get_relation("A", "B") == {"y": {"u"}})
+
+    def test_memoised_liftings(self):
+        pattern = NXGraph()
+        pattern.add_node("student")
+        rule = Rule.from_transform(pattern)
+        rule.inject_clone_node("student")
+
+        rule_hierarchy1, instances1 = self.hierarchy.get_rule_hierarchy(
+            "b", rule)
+        rule_hierarchy2, instances2 = self.hierarchy.get_rule_hierarchy(
+            "b", rule)
+        assert(instances1 == instances2)
+        assert(rule_hierarchy1["rules"] == rule_hierarchy2["rules"])
+        assert(
+            rule_hierarchy1["rule_homomorphisms"] ==
+            rule_hierarchy2["rule_homomorphisms"])
+        # cached results are copied
+        assert(
+            rule_hierarchy1["rules"]["c"].lhs is not
+            rule_hierarchy2["rules"]["c"].lhs)
+
+        rule_hierarchy, instances = self.hierarchy.get_rule_hierarchy(
+            "b", rule, graphs=["c"])
+        assert(set(rule_hierarchy["rules"].keys()) == {"b", "c"})
+        assert(set(rule_hierarchy["rule_homomorphisms"].keys()) == {
+            ("c", "b")})
+        valid_hierarchy(rule_hierarchy)
+        assert(rule_hierarchy["rules"]["c"] == rule_hierarchy1["rules"]["c"])
+        assert(instances["c"] == instances1["c"])
+
+        # the typings of the graphs that are not listed are not composed
+        scoped = copy.deepcopy(self.hierarchy)
+        composed = []
+        compose_path_typing = scoped.compose_path_typing
+
+        def compose_spy(path, *args, **kwargs):
+            composed.append(path)
+            return compose_path_typing(path, *args, **kwargs)
+
+        scoped.compose_path_typing = compose_spy
+        scoped.get_ancestors = None
+        scoped.get_descendants = None
+        clone_alice = Rule.from_transform(NXGraph.copy(pattern))
+        clone_alice.inject_clone_node("student")
+        rule_hierarchy, _ = scoped.get_rule_hierarchy(
+            "c", clone_alice, {"student": "Alice"}, graphs=["a"])
+        assert(set(rule_hierarchy["rules"].keys()) == {"a", "c"})
+        assert(composed == [["c", "b", "a"]])
+
+        # modification of a graph invalidates its cached lifting
+        add_rule = Rule.from_transform(NXGraph())
+        add_rule.inject_add_node("Eve")
+        self.hierarchy.rewrite(
+            "c", add_rule, {}, rhs_typing={"b": {"Eve": "student"}})
+        _, instances = self.hierarchy.get_rule_hierarchy("b", rule)
+        assert("Eve" in instances["c"].values())
+
     def test_refinement(self):
 
         pattern = NXGraph()
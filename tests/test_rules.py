@@ -1,8 +1,12 @@
+import copy
+
 from regraph.backends.networkx.graphs import NXGraph
 from regraph import Rule
-from regraph.rules import compose_rules, _create_merging_rule
+from regraph.rules import (compose_rules, compose_rule_sequence,
+                           _create_merging_rule)
 from regraph import keys_by_value
-from regraph import RuleError
+from regraph import RuleError, ParsingError
+from regraph.command_parser import parse_command, parse_script
 from regraph.category_utils import check_homomorphism
 import regraph.primitives as prim
 
@@ -256,12 +260,48 @@ class TestRule(object):
     def test_inject_update_edge_attrs(self):
         pass
 
-    # def test_from_script(self):
-    #     commands = "clone 2 as '21'.\nadd_node 'a' {'a': 1}.\ndelete_node 3."
-    #     rule = Rule.from_transform(self.pattern, commands=commands)
-    #     assert('a' in rule.rhs.nodes())
-    #     assert('21' in rule.rhs.nodes())
-    #     assert(3 not in rule.rhs.nodes())
+    def test_from_script(self):
+        commands = "clone 2 as '21'.\nadd_node 'a' {'a': 1}.\ndelete_node 3."
+        rule = Rule.from_transform(self.pattern, commands=commands)
+        assert('a' in rule.rhs.nodes())
+        assert('21' in rule.rhs.nodes())
+        assert(3 not in rule.rhs.nodes())
+
+        # the same script given as a list of commands
+        rule2 = Rule.from_transform(
+            self.pattern, commands=commands.splitlines())
+        assert(rule == rule2)
+
+        commands = (
+            "MERGE [1, 2] METHOD union AS 'm' EDGES intersection.\n"
+            "ADD_NODE_ATTRS 'm' {'b': {1, 2}, 'c': 'x'}."
+        )
+        rule = Rule.from_transform(self.pattern, commands=commands)
+        assert('m' in rule.rhs.nodes())
+        assert(rule.rhs.get_node('m')['b'] == {1, 2})
+
+    def test_parse_command(self):
+        actions = parse_script(
+            "clone 2 as '21'.\n\nADD_EDGE 1 'a' {'a': [1, 2.5]}.")
+        assert(actions[0] == {
+            "keyword": "clone", "node": 2, "node_name": "21"})
+        assert(actions[1] == {
+            "keyword": "add_edge", "node_1": 1, "node_2": "a",
+            "attributes": {"a": [1, 2.5]}})
+        # actions returned from the cache can be modified
+        actions[1]["attributes"]["a"].append(3)
+        assert(parse_script(
+            "clone 2 as '21'.\n\nADD_EDGE 1 'a' {'a': [1, 2.5]}.")[1] == {
+                "keyword": "add_edge", "node_1": 1, "node_2": "a",
+                "attributes": {"a": [1, 2.5]}})
+        for command in ["clone 2", "clone2.", "unknown 1.",
+                        "merge [1, 2] method union edges.",
+                        "add_node 'a' {'a': }."]:
+            try:
+                parse_command(command)
+                raise ValueError()
+            except ParsingError as e:
+                assert(str(e) == "Cannot parse command '%s'" % command)
 
     def test_component_getters(self):
         pattern = NXGraph()
@@ -305,6 +345,64 @@ class TestRule(object):
                100 in rule.added_node_attrs()[3]["a3"])
         assert(rule.is_restrictive() and rule.is_relaxing())
 
+    def test_cached_changes(self):
+        pattern = NXGraph()
+        prim.add_nodes_from(pattern, [1, 2, 3])
+        prim.add_edges_from(pattern, [(1, 2), (2, 3)])
+
+        rule = Rule.from_transform(pattern)
+        changes = rule.changes()
+        assert(not rule.is_restrictive() and not rule.is_relaxing())
+        assert(rule.changes() is changes)
+
+        # the cache is invalidated by the inject_* methods
+        rule.inject_remove_node(1)
+        assert(rule.changes() is not changes)
+        assert(rule.removed_nodes() == {1})
+        changes = rule.changes()
+        assert(rule.changes() is changes)
+
+        # and by the direct modification of the rule
+        rule.rhs.add_node(4)
+        assert(rule.added_nodes() == {4})
+        rule.p.add_node(4)
+        rule.p_rhs[4] = 4
+        assert(rule.added_nodes() == set())
+        rule.lhs = NXGraph.copy(rule.lhs)
+        rule.lhs.add_node(4)
+        rule.p_lhs[4] = 4
+        assert(rule.removed_nodes() == {1})
+
+        copied_rule = copy.deepcopy(rule)
+        assert(copied_rule.changes() is not rule.changes())
+        assert(copied_rule.removed_nodes() == rule.removed_nodes())
+
+        # the homomorphisms can be replaced or updated in place
+        changes = rule.changes()
+        rule.p_rhs = dict(rule.p_rhs)
+        assert(rule.changes() is not changes)
+        changes = rule.changes()
+        rule.p_rhs.update({4: 4})
+        assert(rule.changes() is not changes)
+
+        # the getters return modifiable copies
+        rule.inject_clone_node(2)
+        rule.inject_add_node_attrs(3, {"a": {1}})
+        removed_nodes = rule.removed_nodes()
+        assert(type(removed_nodes) == set)
+        removed_nodes.add(2)
+        assert(rule.removed_nodes() == {1})
+        cloned_nodes = rule.cloned_nodes()
+        assert(type(cloned_nodes) == dict)
+        assert(type(cloned_nodes[2]) == set)
+        cloned_nodes[2].add(5)
+        assert(5 not in rule.cloned_nodes()[2])
+        changes = rule.changes()
+        added_node_attrs = rule.added_node_attrs()
+        added_node_attrs[3]["b"] = {2}
+        assert(rule.changes() is changes)
+        assert("b" not in rule.added_node_attrs()[3])
+
     # def test_from_commands(self):
     #     pattern = NXGraph()
     #     prim.add_nodes_from(
@@ -461,6 +559,39 @@ class TestRule(object):
 
         assert(backup == graph)
 
+    def test_refined(self):
+        graph = NXGraph()
+        graph.add_nodes_from([
+            ("a", {"name": "Bob"}), ("b", {"name": "Jane"}),
+            ("c", {"name": "Alice"}), ("d", {"name": "Joe"})])
+        graph.add_edges_from([
+            ("a", "a", {"type": "friends"}),
+            ("a", "b", {"type": "enemies"}),
+            ("c", "a", {"type": "colleages"}),
+            ("d", "a", {"type": "siblings"})])
+
+        pattern = NXGraph()
+        pattern.add_nodes_from(["x", "y"])
+        pattern.add_edge("y", "x")
+        instance = {"x": "a", "y": "d"}
+
+        rule = Rule.from_transform(pattern)
+        rule.inject_merge_nodes(["x", "y"])
+        original = copy.deepcopy(rule)
+
+        new_rule, new_instance = rule.refined(graph, instance)
+        # the original rule is not modified
+        assert(rule.lhs == original.lhs)
+        assert(rule.p == original.p)
+        assert(rule.rhs == original.rhs)
+        assert(instance == {"x": "a", "y": "d"})
+
+        refined_instance = rule.refine(graph, instance)
+        assert(new_instance == refined_instance)
+        assert(new_rule.lhs == rule.lhs)
+        assert(new_rule.p == rule.p)
+        assert(new_rule.rhs == rule.rhs)
+
     def test_compose_rules(self):
         lhs1 = NXGraph()
         p1 = NXGraph()
@@ -514,6 +645,64 @@ class TestRule(object):
             'circle_square2': 'circle_square2',
             'star': 'star', 'triangle': 'triangle'})
 
+    def test_compose_rule_sequence(self):
+        graph = NXGraph()
+        graph.add_nodes_from([
+            ("a", {"x": {1}}), ("b", {"x": {2}}), ("c", {"x": {3}})])
+        graph.add_edges_from([("a", "b"), ("b", "c"), ("c", "a")])
+        initial = NXGraph.copy(graph)
+
+        deltas = []
+        for n in ["a", "b", "c"]:
+            pattern = NXGraph()
+            pattern.add_node("x")
+            rule = Rule.from_transform(pattern)
+            rule.inject_clone_node("x")
+            rule.inject_add_node("new")
+            rule.inject_add_edge("new", "x")
+            rhs_instance = graph.rewrite(rule, {"x": n})
+            deltas.append((rule, {"x": n}, rhs_instance))
+        pattern = NXGraph()
+        pattern.add_nodes_from(["x", "y"])
+        rule = Rule.from_transform(pattern)
+        rule.inject_merge_nodes(["x", "y"])
+        lhs_instance = {"x": "a", "y": deltas[1][2]["new"]}
+        rhs_instance = graph.rewrite(rule, lhs_instance)
+        deltas.append((rule, lhs_instance, rhs_instance))
+
+        for parallel in [False, True]:
+            rule, lhs_instance, rhs_instance = compose_rule_sequence(
+                deltas, parallel=parallel, n_workers=2)
+            result = NXGraph.copy(initial)
+            result.rewrite(rule, lhs_instance)
+            assert(len(result.nodes()) == len(graph.nodes()))
+            assert(len(result.edges()) == len(graph.edges()))
+
+        rule, lhs_instance, rhs_instance = compose_rule_sequence([])
+        assert(rule.is_identity())
+
+    def test_fingerprint(self):
+        rule = Rule.from_transform(self.pattern)
+        rule.inject_clone_node(2)
+        rule.inject_add_node_attrs(1, {"a": {1, 2}})
+        fingerprint = rule.fingerprint()
+        assert(rule.fingerprint() == fingerprint)
+        assert(copy.deepcopy(rule).fingerprint() == fingerprint)
+
+        # rules differing only by the naming of nodes
+        mapping = {n: "n{}".format(n) for n in self.pattern.nodes()}
+        pattern = NXGraph.copy(self.pattern)
+        pattern.relabel_nodes(mapping)
+        renamed_rule = Rule.from_transform(pattern)
+        renamed_rule.inject_clone_node(mapping[2], "clone")
+        renamed_rule.inject_add_node_attrs(mapping[1], {"a": {2, 1}})
+        assert(renamed_rule.fingerprint() == fingerprint)
+
+        renamed_rule.inject_add_node_attrs(mapping[1], {"a": {3}})
+        assert(renamed_rule.fingerprint() != fingerprint)
+        rule.inject_remove_edge(1, 2)
+        assert(rule.fingerprint() != fingerprint)
+
     def test_create_merging_rule(test):
         # Create a rule
         pattern = NXGraph()